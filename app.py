@@ -16,14 +16,22 @@ from src.utils import (
     get_gspread_client,
     load_matching_sheet_orders,
     load_excel_products,
+    load_excel_products_streaming,
+    load_excel_fingerprints,
+    refresh_excel_products_streaming,
     update_matching_result,
     get_matching_sheet_headers,
     get_spreadsheet_url,
     batch_update_matching_results
 )
-from src.matcher import find_matching_products, auto_match_products
-from src.image_handler import download_and_resize_image, validate_image_url
-from src.excel_processor import remove_images_from_xlsx
+from src.matcher import batch_match_products, auto_match_products, build_catalog_index
+from src.image_handler import validate_image_url, iter_thumbnails, get_thumbnail_cache
+from src.excel_processor import strip_images_from_xlsx_stream
+from src.catalog_cache import CatalogSnapshotCache, catalog_cache_key
+from src.catalog_registry import CatalogRegistry
+from src.sheet_session import SheetSession
+from src.write_queue import shared_write_queue
+from src.embedded_images import EmbeddedThumbnailStore, harvest_embedded_thumbnails
 
 
 # 페이지 설정
@@ -104,29 +112,249 @@ def init_gspread_client():
         return None, str(e)
 
 
-def display_image_from_url(image_url, width=100):
-    """URL에서 이미지 다운로드하여 표시"""
-    if not validate_image_url(image_url):
-        st.write("이미지 없음")
+@st.cache_resource(show_spinner=False)
+def init_sheet_session(_client):
+    """상품매칭용시트 핸들 캐시 초기화 (모든 세션이 공유, 스크립트 실행마다 다시 찾지 않음)"""
+    return SheetSession(_client, "상품매칭용시트")
+
+
+@st.cache_resource(show_spinner=False)
+def init_write_queue(_sheets):
+    """수동 매칭 결과 쓰기 큐 (모든 세션이 공유, 백그라운드에서 모아서 반영)"""
+    return shared_write_queue(_sheets, "상품매칭용시트")
+
+
+@st.cache_resource(show_spinner=False)
+def init_catalog_cache():
+    """엑셀 카탈로그 스냅샷 캐시 초기화 (캐싱)"""
+    return CatalogSnapshotCache()
+
+
+@st.cache_resource(show_spinner=False)
+def init_catalog_registry():
+    """프로세스 공용 카탈로그 레지스트리 초기화 (모든 세션이 공유)"""
+    return CatalogRegistry()
+
+
+@st.cache_resource(show_spinner=False)
+def init_embedded_store():
+    """엑셀 내장 이미지 썸네일 저장소 초기화 (모든 세션이 공유)"""
+    return EmbeddedThumbnailStore()
+
+
+def harvest_uploaded_images(uploaded_file, cache_key, sheet_names, width=100):
+    """
+    업로드 파일의 내장 이미지를 썸네일로 만들어 저장 (카탈로그 키당 한 번)
+
+    Args:
+        uploaded_file: Streamlit 업로드 파일
+        cache_key: catalog_cache_key() 결과
+        sheet_names: 대상 탭 이름 목록 (로드된 탭)
+        width: 썸네일 크기
+    """
+    if not uploaded_file.name.lower().endswith(('.xlsx', '.xlsm')):
+        return
+
+    store = init_embedded_store()
+    if store.has(cache_key):
         return
 
     try:
-        image_bytes = download_and_resize_image(image_url, size=(width, width))
-        if image_bytes:
-            image = Image.open(BytesIO(image_bytes))
-            st.image(image, width=width)
-        else:
-            st.write("이미지 로드 실패")
+        uploaded_file.seek(0)
+        thumbnails = harvest_embedded_thumbnails(uploaded_file, sheet_names=sheet_names, size=(width, width))
     except Exception as e:
-        st.write(f"오류: {str(e)}")
+        st.warning(f"⚠️ 내장 이미지 수집 실패: {str(e)}")
+        return
+
+    # 내장 이미지가 없는 파일도 빈 결과로 기록 (다시 수집하지 않도록)
+    store.put_all(cache_key, thumbnails)
+    if thumbnails:
+        st.info(f"🖼️ 내장 이미지 {len(thumbnails)}개 수집")
+
 
+def refresh_uploaded_catalog(uploaded_file, exclude_tabs, previous):
+    """
+    이전 카탈로그 기준으로 바뀐 탭만 다시 파싱/인덱싱
+
+    Args:
+        uploaded_file: 새로 올린 Streamlit 업로드 파일
+        exclude_tabs: 제외할 탭 리스트
+        previous: 이전 (excel_data, catalog_index)
+
+    Returns:
+        tuple: (excel_data dict, CatalogIndex) 또는 None (증분 갱신 불가)
+    """
+    previous_data, previous_index = previous
+    if previous_index is None or previous_index.fingerprints is None:
+        return None
+
+    uploaded_file.seek(0)
+    excel_data, fingerprints, report = refresh_excel_products_streaming(
+        uploaded_file, previous_data, previous_index.fingerprints, exclude_tabs=exclude_tabs
+    )
+
+    # 공유 중인 이전 인덱스는 그대로 두고 복사본에서 바뀐 탭만 갱신
+    catalog_index = previous_index.copy()
+    catalog_index.refresh_tabs(excel_data, report['added'] + report['updated'])
+    catalog_index.fingerprints = fingerprints
+
+    changed = report['added'] + report['updated'] + report['removed']
+    if changed:
+        st.info(f"🔄 변경된 탭만 갱신: {', '.join(changed)} (유지 {len(report['unchanged'])}개 탭)")
+
+    return excel_data, catalog_index
+
+
+def parse_uploaded_catalog(uploaded_file, exclude_tabs, cache_key, previous=None):
+    """
+    업로드 파일 → (excel_data, catalog_index)
+    디스크 스냅샷이 있으면 사용하고, 없으면 파싱 후 스냅샷 저장
+    (이전 카탈로그가 있으면 바뀐 탭만 다시 파싱)
+
+    Args:
+        uploaded_file: Streamlit 업로드 파일
+        exclude_tabs: 제외할 탭 리스트
+        cache_key: catalog_cache_key() 결과
+        previous: 같은 세션에서 이전에 올린 (excel_data, catalog_index) 또는 None
+
+    Returns:
+        tuple: (excel_data dict, CatalogIndex)
+    """
+    catalog_cache = init_catalog_cache()
+    snapshot = catalog_cache.get(cache_key)
+    if snapshot is not None:
+        return snapshot
+
+    is_xlsx = uploaded_file.name.lower().endswith(('.xlsx', '.xlsm'))
+
+    if previous is not None and is_xlsx:
+        try:
+            refreshed = refresh_uploaded_catalog(uploaded_file, exclude_tabs, previous)
+            if refreshed is not None:
+                catalog_cache.put(cache_key, *refreshed)
+                return refreshed
+        except Exception as refresh_err:
+            st.warning(f"⚠️ 증분 갱신 실패. 전체 다시 로드: {str(refresh_err)}")
+
+    excel_data = None
+    fingerprints = None
+
+    # xlsx/xlsm: 원본 zip 에서 시트 XML 만 스트리밍 (이미지 제거/임시 파일 불필요)
+    if is_xlsx:
+        try:
+            # 시트별 병렬 파싱 (컨테이너 CPU 할당량만큼, 1개면 순차)
+            uploaded_file.seek(0)
+            excel_data = load_excel_products_streaming(
+                uploaded_file, exclude_tabs=exclude_tabs, workers=None
+            )
+        except Exception as stream_err:
+            st.warning(f"⚠️ 스트리밍 로드 실패. 기존 방식으로 다시 시도: {str(stream_err)}")
+            uploaded_file.seek(0)
+
+        if excel_data is not None:
+            # 다음 업로드 때 바뀐 탭만 갱신할 수 있도록 시트 지문 기록 (실패해도 로드는 유지)
+            try:
+                uploaded_file.seek(0)
+                fingerprints = load_excel_fingerprints(uploaded_file, exclude_tabs=exclude_tabs)
+            except Exception as fp_err:
+                print(f"시트 지문 계산 실패: {str(fp_err)}")
 
-def show_spreadsheet_viewer(client):
-    """스프레드시트 실시간 보기 페이지"""
+    if excel_data is None:
+        source = uploaded_file
+
+        # 이미지 제거 (엑셀 파일인 경우에만, 메모리에서 재압축 없이 처리)
+        if is_xlsx:
+            try:
+                source = BytesIO()
+                strip_images_from_xlsx_stream(uploaded_file, source, remove_drawings=True)
+                source.seek(0)
+            except Exception as img_err:
+                # 이미지 제거 실패 시 원본 사용
+                st.warning(f"⚠️ 이미지 제거 실패. 원본 파일 사용: {str(img_err)}")
+                uploaded_file.seek(0)
+                source = uploaded_file
+
+        # 엑셀 데이터 로드
+        excel_data = load_excel_products(source, exclude_tabs=exclude_tabs)
+
+    # 매칭용 인덱스는 업로드당 한 번만 생성
+    catalog_index = build_catalog_index(excel_data)
+    catalog_index.fingerprints = fingerprints
+    catalog_cache.put(cache_key, excel_data, catalog_index)
+    return excel_data, catalog_index
+
+
+def get_shared_catalog(uploaded_file):
+    """
+    세션의 카탈로그 키로 공유 카탈로그 조회
+    (레지스트리에서 해제됐으면 디스크 스냅샷 → 업로드 파일 순으로 다시 로드)
+
+    Args:
+        uploaded_file: Streamlit 업로드 파일 (없으면 None)
+
+    Returns:
+        tuple: (excel_data dict, CatalogIndex) 또는 (None, None)
+    """
+    cache_key = st.session_state['catalog_key']
+    if cache_key is None:
+        return None, None
+
+    registry = init_catalog_registry()
+    catalog = registry.get(cache_key)
+    if catalog is not None:
+        return catalog
+
+    snapshot = init_catalog_cache().get(cache_key)
+    if snapshot is not None:
+        return registry.put(cache_key, *snapshot)
+
+    if uploaded_file is not None:
+        return registry.get_or_load(
+            cache_key,
+            lambda: parse_uploaded_catalog(uploaded_file, ['월말재고현황'], cache_key)
+        )
+
+    st.session_state['catalog_key'] = None
+    return None, None
+
+
+def fill_thumbnails(thumbnail_slots, width=100):
+    """
+    화면에 미리 만들어 둔 이미지 자리에 썸네일을 다운로드 완료 순서대로 채우기
+
+    Args:
+        thumbnail_slots: {이미지 URL: [st.empty() 자리, ...]}
+        width: 표시 크기
+    """
+    if not thumbnail_slots:
+        return
+
+    # 현재 화면의 썸네일 전체를 공용 연결 풀로 동시에 다운로드
+    for image_url, image_bytes in iter_thumbnails(list(thumbnail_slots), size=(width, width)):
+        for slot in thumbnail_slots[image_url]:
+            try:
+                if image_bytes:
+                    slot.image(Image.open(BytesIO(image_bytes)), width=width)
+                else:
+                    slot.write("이미지 로드 실패")
+            except Exception as e:
+                slot.write(f"오류: {str(e)}")
+
+    # 썸네일 캐시 통계 (대부분 네트워크 없이 표시되는지 확인용)
+    stats = get_thumbnail_cache().stats()
+    st.sidebar.caption(
+        f"🖼️ 썸네일 캐시 적중률 {stats['hit_rate']:.0%} "
+        f"(메모리 {stats['memory_hits']} / 디스크 {stats['disk_hits']} / "
+        f"재검증 {stats['revalidated']} / 다운로드 {stats['misses']} / 실패 {stats['failures']})"
+    )
+
+
+def show_spreadsheet_viewer(sheets):
+    """스프레드시트 실시간 보기 페이지 (sheets: SheetSession)"""
     st.title("📊 스프레드시트 실시간 보기")
     st.markdown("---")
 
-    if not client:
+    if not sheets:
         st.error("구글 시트에 연결할 수 없습니다.")
         return
 
@@ -137,7 +365,7 @@ def show_spreadsheet_viewer(client):
     with sheet_tabs[0]:
         st.subheader("📋 주문 데이터 (시트1)")
         try:
-            orders_df = load_matching_sheet_orders(client, sheet_name="상품매칭용시트")
+            orders_df = load_matching_sheet_orders(sheets, sheet_name="상품매칭용시트")
             if not orders_df.empty:
                 st.dataframe(orders_df, use_container_width=True, height=600)
                 st.info(f"총 {len(orders_df)}개의 주문")
@@ -153,10 +381,14 @@ def show_spreadsheet_viewer(client):
     with sheet_tabs[1]:
         st.subheader("✅ 매칭된 상품")
         try:
-            spreadsheet = client.open("상품매칭용시트")
+            # 스프레드시트 자체를 열 수 없으면 바깥에서 오류 표시
+            sheets.spreadsheet
             try:
-                worksheet = spreadsheet.worksheet("매칭상품")
-                data = worksheet.get_all_values()
+                worksheet = sheets.worksheet("매칭상품")
+                # 스프레드시트가 바뀌지 않았으면 지난번에 읽은 값 사용
+                data = sheets.cached_values(
+                    "매칭상품", lambda: sheets.call('read', 'get_all_values', worksheet.get_all_values)
+                )
 
                 if data and len(data) > 1:
                     headers = data[0]
@@ -179,13 +411,18 @@ def main():
     # 세션 상태 초기화
     if 'matched_orders' not in st.session_state:
         st.session_state['matched_orders'] = set()
-    if 'excel_data' not in st.session_state:
-        st.session_state['excel_data'] = None
+    if 'catalog_key' not in st.session_state:
+        # 세션에는 공유 카탈로그 키만 저장 (DataFrame 은 레지스트리에서 공유)
+        st.session_state['catalog_key'] = None
+    if 'catalog_file_id' not in st.session_state:
+        st.session_state['catalog_file_id'] = None
     if 'current_page' not in st.session_state:
         st.session_state['current_page'] = "매칭"
 
     # 구글 시트 초기화 (먼저 실행)
     client, error = init_gspread_client()
+    sheets = init_sheet_session(client) if client and not error else None
+    write_queue = init_write_queue(sheets) if sheets else None
 
     # 페이지 선택
     page = st.sidebar.radio(
@@ -196,7 +433,7 @@ def main():
 
     if page == "📊 스프레드시트 보기":
         st.session_state['current_page'] = "보기"
-        show_spreadsheet_viewer(client)
+        show_spreadsheet_viewer(sheets)
         return
 
     st.session_state['current_page'] = "매칭"
@@ -213,7 +450,7 @@ def main():
         # 스프레드시트 바로가기
         st.subheader("🔗 스프레드시트")
         if client and not error:
-            spreadsheet_url = get_spreadsheet_url(client, "상품매칭용시트")
+            spreadsheet_url = get_spreadsheet_url(sheets, "상품매칭용시트")
             if spreadsheet_url:
                 st.markdown(f"[📊 스프레드시트 바로가기]({spreadsheet_url})")
             else:
@@ -221,6 +458,41 @@ def main():
         else:
             st.info("구글 시트 연결 필요")
 
+        # 수동 매칭 반영 상태
+        if write_queue is not None:
+            queue_stats = write_queue.stats()
+            waiting = queue_stats['pending'] + queue_stats['in_flight']
+            st.caption(f"📝 시트 반영 대기 {waiting}건 · 반영 완료 {queue_stats['flushed']}건")
+            if queue_stats['last_error']:
+                st.warning(f"⚠️ 시트 반영 재시도 중: {queue_stats['last_error']}")
+
+            # 다시 보내도 실패하는 결과 (시트 범위 초과, 시트 없음, 주문 행 변경 등)
+            failed_rows = write_queue.failed_rows()
+            if failed_rows:
+                st.error(f"❌ 시트 반영 보류 {len(failed_rows)}건")
+                for entry in failed_rows[:10]:
+                    st.caption(f"{entry['row_index']}행 {entry.get('order_name') or ''}: {entry['error']}")
+                retry_col, discard_col = st.columns(2)
+                with retry_col:
+                    if st.button("다시 시도", key="retry_failed_rows", use_container_width=True):
+                        write_queue.retry_failed()
+                        st.rerun()
+                with discard_col:
+                    if st.button("보류 삭제", key="discard_failed_rows", use_container_width=True):
+                        # 반영되지 않은 주문은 다시 매칭할 수 있도록
+                        for entry in failed_rows:
+                            st.session_state['matched_orders'].discard(entry['row_index'] - 2)
+                        write_queue.discard_failed()
+                        st.rerun()
+
+            # 시트 API 호출 통계 (할당량 대기/재시도 확인용)
+            api_totals = sheets.scheduler.totals()
+            st.caption(
+                f"📡 시트 API {api_totals['calls']}회 · 재시도 {api_totals['retries']}회 · "
+                f"할당량 대기 {api_totals['throttled']}회 ({api_totals['wait_seconds']:.1f}초) · "
+                f"변경 없음 재사용 {sheets.cache_hits}회"
+            )
+
         st.markdown("---")
 
         # 엑셀 파일 업로드
@@ -231,64 +503,48 @@ def main():
             help="전체 상품 정보가 담긴 엑셀 파일을 업로드하세요"
         )
 
+        excel_data, catalog_index = None, None
         if uploaded_file:
-            if st.session_state['excel_data'] is None:
+            is_new_upload = (
+                st.session_state['catalog_key'] is None
+                or st.session_state['catalog_file_id'] != uploaded_file.file_id
+            )
+            if is_new_upload:
                 with st.spinner("엑셀 파일 처리 중..."):
                     try:
-                        # temp 폴더 생성 (없으면)
-                        temp_dir = "temp"
-                        if not os.path.exists(temp_dir):
-                            os.makedirs(temp_dir)
-
-                        # 원본 파일 임시 저장
-                        original_temp_path = os.path.join(temp_dir, f"original_{uploaded_file.name}")
-                        with open(original_temp_path, "wb") as f:
-                            f.write(uploaded_file.getbuffer())
-
-                        # 이미지 제거된 파일 경로
-                        clean_temp_path = os.path.join(temp_dir, f"clean_{uploaded_file.name}")
-
-                        # 이미지 제거 (엑셀 파일인 경우에만)
-                        if uploaded_file.name.lower().endswith(('.xlsx', '.xlsm')):
-                            try:
-                                remove_images_from_xlsx(original_temp_path, clean_temp_path, remove_drawings=True)
-                                final_path = clean_temp_path
-                            except Exception as img_err:
-                                # 이미지 제거 실패 시 원본 사용
-                                st.warning(f"⚠️ 이미지 제거 실패. 원본 파일 사용: {str(img_err)}")
-                                final_path = original_temp_path
-                        else:
-                            final_path = original_temp_path
-
-                        # 엑셀 데이터 로드
-                        excel_data = load_excel_products(final_path, exclude_tabs=['월말재고현황'])
-                        st.session_state['excel_data'] = excel_data
-
-                        # 임시 파일 삭제 (안전하게 처리)
-                        import time
-                        time.sleep(0.1)  # 파일이 완전히 닫힐 때까지 대기
-
-                        for path_to_delete in [original_temp_path, clean_temp_path]:
-                            try:
-                                if os.path.exists(path_to_delete):
-                                    os.remove(path_to_delete)
-                            except PermissionError:
-                                # 파일 삭제 실패해도 계속 진행
-                                pass
-
-                        st.success(f"✅ {len(excel_data)}개 탭 로드 완료!")
+                        # 이전에 올린 카탈로그가 있으면 바뀐 탭만 갱신하는 기준으로 사용
+                        previous = None
+                        if st.session_state['catalog_key'] is not None:
+                            previous = init_catalog_registry().get(st.session_state['catalog_key'])
+
+                        # 같은 파일(내용 기준)은 프로세스에서 한 번만 파싱하고 모든 세션이 공유
+                        exclude_tabs = ['월말재고현황']
+                        cache_key = catalog_cache_key(uploaded_file.getbuffer(), exclude_tabs)
+                        registry = init_catalog_registry()
+                        shared = registry.get(cache_key) is not None
+
+                        excel_data, catalog_index = registry.get_or_load(
+                            cache_key,
+                            lambda: parse_uploaded_catalog(uploaded_file, exclude_tabs, cache_key, previous)
+                        )
+                        st.session_state['catalog_key'] = cache_key
+                        st.session_state['catalog_file_id'] = uploaded_file.file_id
+
+                        suffix = " (공유)" if shared else ""
+                        st.success(f"✅ {len(excel_data)}개 탭 로드 완료!{suffix}")
 
                     except Exception as e:
                         st.error(f"❌ 엑셀 로드 오류: {str(e)}")
-                        # 오류 발생 시에도 임시 파일 삭제 시도
-                        for path_to_delete in [original_temp_path, clean_temp_path]:
-                            try:
-                                if 'path_to_delete' in locals() and os.path.exists(path_to_delete):
-                                    os.remove(path_to_delete)
-                            except:
-                                pass
             else:
-                st.success(f"✅ {len(st.session_state['excel_data'])}개 탭 로드됨")
+                try:
+                    excel_data, catalog_index = get_shared_catalog(uploaded_file)
+                except Exception as e:
+                    st.error(f"❌ 엑셀 로드 오류: {str(e)}")
+                if excel_data is not None:
+                    st.success(f"✅ {len(excel_data)}개 탭 로드됨")
+        else:
+            # 업로드 위젯을 비워도 다른 세션과 공유 중인 카탈로그는 계속 사용
+            excel_data, catalog_index = get_shared_catalog(None)
 
         st.markdown("---")
         st.subheader("🔧 매칭 설정")
@@ -307,11 +563,24 @@ def main():
             value=5,
             help="각 주문당 표시할 추천 상품 개수"
         )
+        use_embedded_images = st.checkbox(
+            "엑셀 내장 이미지 우선 사용",
+            value=True,
+            help="엑셀에 들어있는 이미지가 있으면 '대표 1' URL 대신 표시합니다"
+        )
+
+        # 내장 이미지는 URL 다운로드 대신 쓸 수 있도록 로컬 썸네일로 저장
+        # (옵션을 켰을 때만, 카탈로그 키당 한 번)
+        if (use_embedded_images and uploaded_file is not None and excel_data
+                and st.session_state['catalog_key'] is not None
+                and st.session_state['catalog_file_id'] == uploaded_file.file_id):
+            harvest_uploaded_images(uploaded_file, st.session_state['catalog_key'], list(excel_data))
 
         st.markdown("---")
         if st.button("🔄 새로고침", use_container_width=True):
             st.cache_resource.clear()
-            st.session_state['excel_data'] = None
+            st.session_state['catalog_key'] = None
+            st.session_state['catalog_file_id'] = None
             st.session_state['matched_orders'] = set()
             st.rerun()
 
@@ -327,7 +596,7 @@ def main():
     st.success("✅ 구글 시트 연결 완료")
 
     # 엑셀 데이터 체크
-    if not st.session_state['excel_data']:
+    if not excel_data:
         st.warning("⚠️ 먼저 사이드바에서 엑셀 파일을 업로드하세요.")
         st.stop()
 
@@ -336,7 +605,7 @@ def main():
     # 스프레드시트에서 주문 데이터 로드
     with st.spinner("📋 주문 데이터 로딩 중..."):
         try:
-            orders_df = load_matching_sheet_orders(client, sheet_name="상품매칭용시트")
+            orders_df = load_matching_sheet_orders(sheets, sheet_name="상품매칭용시트")
 
             if orders_df.empty:
                 st.info("ℹ️ 주문 데이터가 없습니다.")
@@ -346,12 +615,17 @@ def main():
             st.error(f"❌ 스프레드시트 로드 오류: {str(e)}")
             st.stop()
 
+    # 쓰기 큐에서 아직 시트에 반영되지 않은 수동 매칭 (행 번호 = idx + 2)
+    queued_orders = set()
+    if write_queue is not None:
+        queued_orders = {row - 2 for row in write_queue.pending_rows()}
+
     # 자동 매칭 시도 (일괄 처리로 API 호출 최소화)
     auto_match_results = []
     with st.spinner("🤖 자동 매칭 중..."):
         for idx, order_row in orders_df.iterrows():
-            # 이미 매칭된 주문은 건너뛰기
-            if idx in st.session_state['matched_orders']:
+            # 이미 매칭된 주문은 건너뛰기 (반영 대기 중인 수동 매칭 포함)
+            if idx in st.session_state['matched_orders'] or idx in queued_orders:
                 continue
 
             order_product_name = order_row.get('상품명', '')
@@ -361,7 +635,7 @@ def main():
             # 자동 매칭 시도
             matched_info, match_type = auto_match_products(
                 order_product_name,
-                st.session_state['excel_data']
+                catalog_index
             )
 
             if matched_info and match_type:
@@ -379,6 +653,7 @@ def main():
                     'row_index': idx + 2,  # 헤더 제외
                     'data': matched_data,
                     'match_type': match_type,
+                    'order_name': order_product_name,  # 행이 밀렸으면 반영하지 않도록 확인용
                     'matching_log': matched_info.get('매칭로그', {}),
                     'idx': idx
                 })
@@ -386,18 +661,44 @@ def main():
     # 일괄 업데이트 실행
     if auto_match_results:
         with st.spinner(f"📝 {len(auto_match_results)}개 상품 업데이트 중..."):
+            write_report = {}
             success_count = batch_update_matching_results(
-                client,
+                sheets,
                 "상품매칭용시트",
-                auto_match_results
+                auto_match_results,
+                report=write_report
             )
 
+            # 재시도 후에도 실패하면 버리지 않고 쓰기 큐로 넘겨 백그라운드에서 다시 반영
+            if write_report.get('error'):
+                if write_queue is not None:
+                    for result in auto_match_results:
+                        write_queue.submit(result['row_index'], result['data'], match_type=result['match_type'],
+                                           order_name=result['order_name'])
+                    st.warning(
+                        f"⚠️ 시트 반영 실패, {len(auto_match_results)}개는 백그라운드에서 다시 반영합니다: "
+                        f"{write_report['error']}"
+                    )
+                else:
+                    st.error(f"❌ 자동 매칭 결과 반영 실패: {write_report['error']}")
+                    auto_match_results = []
+
+            # 주문 목록을 읽은 뒤 행이 밀리거나 삭제된 주문은 반영되지 않음 (다음 실행에서 다시 매칭)
+            if write_report.get('mismatched'):
+                mismatched = set(write_report['mismatched'])
+                auto_match_results = [r for r in auto_match_results if r['row_index'] not in mismatched]
+                st.warning(f"⚠️ 시트의 주문이 바뀌어 {len(mismatched)}개는 반영하지 않았습니다")
+
             # 세션 상태 업데이트
             for result in auto_match_results:
                 st.session_state['matched_orders'].add(result['idx'])
 
             if success_count > 0:
                 st.success(f"✅ 자동 매칭 완료: {success_count}개 상품")
+                st.caption(
+                    f"📡 API 호출 {write_report['api_calls']}회 · "
+                    f"전송 {write_report['payload_bytes'] / 1024:.1f} KB"
+                )
 
                 # 매칭 상세 로그 표시
                 with st.expander("🔍 자동 매칭 상세 로그"):
@@ -412,7 +713,10 @@ def main():
                 st.rerun()
 
     # 매칭 안 된 주문만 필터링
-    unmatched_orders = orders_df[~orders_df.index.isin(st.session_state['matched_orders'])]
+    unmatched_orders = orders_df[
+        ~orders_df.index.isin(st.session_state['matched_orders'])
+        & ~orders_df.index.isin(queued_orders)
+    ]
 
     if unmatched_orders.empty:
         st.success("🎉 모든 주문이 매칭되었습니다!")
@@ -421,9 +725,21 @@ def main():
     st.info(f"📦 매칭 대기 중인 주문: **{len(unmatched_orders)}개**")
     st.markdown("---")
 
+    # 유사 상품 일괄 검색 (주문 전체 × 상품 전체를 한 번에 계산)
+    with st.spinner("🔍 유사 상품 검색 중..."):
+        all_matches = batch_match_products(
+            unmatched_orders,
+            catalog_index,
+            top_n=top_n,
+            threshold=similarity_threshold
+        )
+
     # =================================================================
     # 각 주문별 매칭 UI
     # =================================================================
+    # 이미지는 자리만 먼저 만들고, 화면을 다 그린 뒤 한꺼번에 다운로드해서 채움
+    thumbnail_slots = {}
+
     for idx, order_row in unmatched_orders.iterrows():
         order_product_name = order_row.get('상품명', '')
 
@@ -437,14 +753,7 @@ def main():
             </div>
         """, unsafe_allow_html=True)
 
-        # 유사 상품 검색
-        with st.spinner(f"'{order_product_name}' 매칭 중..."):
-            matches = find_matching_products(
-                order_product_name,
-                st.session_state['excel_data'],
-                top_n=top_n,
-                threshold=similarity_threshold
-            )
+        matches = all_matches.get(idx, [])
 
         if not matches:
             st.warning(f"⚠️ '{order_product_name}'와 유사한 상품을 찾지 못했습니다.")
@@ -458,10 +767,20 @@ def main():
             col1, col2, col3 = st.columns([1, 5, 2])
 
             with col1:
-                # 이미지 표시
+                # 이미지 표시 (엑셀 내장 이미지 → '대표 1' URL 순)
+                embedded_image = None
+                if use_embedded_images:
+                    embedded_image = init_embedded_store().get(
+                        st.session_state['catalog_key'], match['탭'], match.get('행번호')
+                    )
+
                 image_url = match.get('대표 1', '')
-                if image_url and validate_image_url(image_url):
-                    display_image_from_url(image_url, width=100)
+                if embedded_image:
+                    st.image(Image.open(BytesIO(embedded_image)), width=100)
+                elif image_url and validate_image_url(image_url):
+                    slot = st.empty()
+                    slot.caption("⏳")
+                    thumbnail_slots.setdefault(image_url, []).append(slot)
                 else:
                     st.write("🖼️")
 
@@ -487,37 +806,42 @@ def main():
                     key=f"match_{idx}_{match_idx}",
                     use_container_width=True
                 ):
-                    with st.spinner("매칭 중..."):
-                        # 매칭 데이터 준비
-                        matched_data = {
-                            '상품명': match['상품명'],
-                            '매입': match['입고가계'],
-                            '매출': match['공급가(V+) 배송비 포함'],
-                            '매입(업체)': match['운영사'],
-                            '탭': match['탭'],
-                            '옵션': match.get('옵션', '')
-                        }
-
-                        # 스프레드시트 업데이트 (idx + 2: 헤더 제외)
-                        success = update_matching_result(
-                            client,
-                            "상품매칭용시트",
-                            idx + 2,
-                            matched_data,
-                            match_type="수동매칭"
-                        )
-
-                        if success:
-                            st.success(f"✅ '{order_product_name}' 매칭 완료!")
-                            st.session_state['matched_orders'].add(idx)
-                            st.rerun()
-                        else:
-                            st.error("❌ 매칭 실패. 다시 시도해주세요.")
+                    # 매칭 데이터 준비
+                    matched_data = {
+                        '상품명': match['상품명'],
+                        '매입': match['입고가계'],
+                        '매출': match['공급가(V+) 배송비 포함'],
+                        '매입(업체)': match['운영사'],
+                        '탭': match['탭'],
+                        '옵션': match.get('옵션', '')
+                    }
+
+                    # 쓰기 큐에 넣고 바로 다음 주문으로 (idx + 2: 헤더 제외)
+                    # 시트 반영은 백그라운드에서 모아서 처리, 실패하면 자동 재시도
+                    if write_queue is not None:
+                        write_queue.submit(idx + 2, matched_data, match_type="수동매칭",
+                                           order_name=order_product_name)
+                        st.session_state['matched_orders'].add(idx)
+                        st.rerun()
+                    elif update_matching_result(
+                        sheets,
+                        "상품매칭용시트",
+                        idx + 2,
+                        matched_data,
+                        match_type="수동매칭"
+                    ):
+                        st.success(f"✅ '{order_product_name}' 매칭 완료!")
+                        st.session_state['matched_orders'].add(idx)
+                        st.rerun()
+                    else:
+                        st.error("❌ 매칭 실패. 다시 시도해주세요.")
 
             st.markdown("<br>", unsafe_allow_html=True)
 
         st.markdown("---")
 
+    fill_thumbnails(thumbnail_slots, width=100)
+
     # 푸터
     st.markdown("""
         <div style="text-align: center; color: #718096; padding: 2rem 0; margin-top: 3rem;">
@@ -0,0 +1,105 @@
+"""
+엑셀 로더 벤치마크
+- 기존 방식 (이미지 제거 + load_excel_products) vs load_excel_products_streaming
+  vs 시트별 병렬 파싱 (workers)
+- 로더마다 별도 프로세스에서 실행해 소요 시간과 최대 메모리(RSS) 비교
+  (병렬 파싱 RSS 는 부모 프로세스 기준)
+
+실행: python scripts/bench_excel_loader.py [행 수] [탭 수] [추가 컬럼 수] [병렬 프로세스 수]
+      병렬 프로세스 수를 생략하면 컨테이너 CPU 할당량 기준으로 자동 결정
+"""
+import multiprocessing
+import os
+import random
+import resource
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def make_workbook(path, n_rows, n_tabs, extra_cols):
+    """매칭용 컬럼 + 매칭에 쓰지 않는 컬럼이 섞인 가상 워크북 생성"""
+    from openpyxl import Workbook
+
+    rng = random.Random(0)
+    wb = Workbook(write_only=True)
+    headers = ['상품명', '모델명', '입고가계', '공급가(V+) 배송비 포함', '운영사', '대표 1', '옵션']
+    headers += [f'기타{i}' for i in range(extra_cols)]
+
+    for t in range(n_tabs):
+        ws = wb.create_sheet(f'카테고리{t}')
+        ws.append(headers)
+        for r in range(n_rows // n_tabs):
+            row = [f'상품 {t}-{r} 프리미엄', f'MD-{r}', rng.randint(1000, 90000), rng.randint(1000, 90000),
+                   '업체', f'http://img/{r}.jpg', '']
+            row += [f'메모 {rng.random():.6f}' for _ in range(extra_cols)]
+            ws.append(row)
+    wb.save(path)
+
+
+def _legacy(path, out_dir):
+    from src.excel_processor import remove_images_from_xlsx
+    from src.utils import load_excel_products
+
+    clean_path = os.path.join(out_dir, 'clean.xlsx')
+    remove_images_from_xlsx(path, clean_path, remove_drawings=True)
+    return load_excel_products(clean_path)
+
+
+def _streaming(path, out_dir):
+    from src.utils import load_excel_products_streaming
+
+    with open(path, 'rb') as f:
+        return load_excel_products_streaming(f)
+
+
+def _parallel(path, out_dir):
+    from src.utils import available_cpu_count, load_excel_products_streaming
+
+    workers = int(os.environ.get('BENCH_WORKERS', 0)) or available_cpu_count()
+    with open(path, 'rb') as f:
+        return load_excel_products_streaming(f, workers=workers)
+
+
+def _measure(name, path, out_dir, queue):
+    start = time.perf_counter()
+    data = globals()[name](path, out_dir)
+    elapsed = time.perf_counter() - start
+    rows = sum(len(df) for df in data.values())
+    cols = sum(len(df.columns) for df in data.values())
+    # Linux ru_maxrss 단위는 KB
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    queue.put((elapsed, peak_mb, rows, cols))
+
+
+def main():
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    n_tabs = int(sys.argv[2]) if len(sys.argv) > 2 else 12
+    extra_cols = int(sys.argv[3]) if len(sys.argv) > 3 else 15
+    if len(sys.argv) > 4:
+        os.environ['BENCH_WORKERS'] = sys.argv[4]
+
+    from src.utils import available_cpu_count
+    workers = int(os.environ.get('BENCH_WORKERS', 0)) or available_cpu_count()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'catalog.xlsx')
+        make_workbook(path, n_rows, n_tabs, extra_cols)
+        print(f"워크북: {n_rows}행 / {n_tabs}탭 / {7 + extra_cols}컬럼, "
+              f"{os.path.getsize(path) / 1024 / 1024:.1f} MB, 병렬 프로세스 {workers}개")
+
+        ctx = multiprocessing.get_context('spawn')
+        for name in ('_legacy', '_streaming', '_parallel'):
+            queue = ctx.Queue()
+            proc = ctx.Process(target=_measure, args=(name, path, tmp, queue))
+            proc.start()
+            elapsed, peak_mb, rows, cols = queue.get()
+            proc.join()
+            print(f"{name.strip('_'):<10}: {elapsed:.2f}초, 최대 RSS {peak_mb:.0f} MB, "
+                  f"{rows}행 / 총 {cols}컬럼")
+
+
+if __name__ == "__main__":
+    main()
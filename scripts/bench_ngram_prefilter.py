@@ -0,0 +1,124 @@
+"""
+n-gram 후보 필터 벤치마크
+- 가상 상품 카탈로그에서 필터 없음 / exact / approximate 모드 비교
+- 주문 1건당 평균 시간, 평균 후보 수, approximate 모드 재현율(recall) 출력
+- 무작위 문자열(여러 종류의 공백 문자 포함)로 exact 모드가 필터 없음과 같은 결과인지 확인
+  (다르면 종료 코드 1)
+
+실행: python scripts/bench_ngram_prefilter.py [상품 수] [주문 수]
+"""
+import os
+import random
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.matcher import CatalogIndex, find_matching_products
+
+
+BRANDS = ['삼성', 'LG', '쿠쿠', '필립스', '테팔', 'SK매직', '위닉스', '신일', '한일', '보국']
+ITEMS = ['냉장고', '세탁기', '전기밥솥', '에어프라이어', '선풍기', '가습기', '제습기',
+         '공기청정기', '청소기', '전자레인지', '커피머신', '믹서기', '드라이기', '다리미']
+SPECS = ['화이트', '블랙', '실버', '대용량', '미니', '프리미엄', '2024년형', '스탠드형', '벽걸이']
+
+
+def make_name(rng):
+    model = f"{rng.choice('ABCDEFGHJK')}{rng.choice('XYZ')}-{rng.randint(100, 9999)}"
+    words = [rng.choice(BRANDS), rng.choice(ITEMS), rng.choice(SPECS), model]
+    if rng.random() < 0.5:
+        words.append(rng.choice(SPECS))
+    return ' '.join(words)
+
+
+def make_order(rng, name):
+    """카탈로그 상품명을 주문서처럼 변형 (순서 변경, 단어 누락, 오타)"""
+    words = name.split()
+    if rng.random() < 0.5:
+        rng.shuffle(words)
+    if len(words) > 2 and rng.random() < 0.5:
+        words.pop(rng.randrange(len(words)))
+    text = ' '.join(words)
+    if rng.random() < 0.3:
+        pos = rng.randrange(len(text))
+        text = text[:pos] + text[pos + 1:]
+    return text
+
+
+# exact 모드 확인용 문자 (rapidfuzz 가 구분 문자로 보는 것/보지 않는 것 섞어서)
+CHECK_ALPHABET = 'abB1_가 \t\n\xa0\x85\u3000\u2003'
+
+
+def check_exact_equivalence(rng, trials=300, catalog_size=40):
+    """
+    무작위 카탈로그/주문으로 exact 모드와 필터 없음 결과 비교
+
+    Returns:
+        int: 결과가 다른 주문 수
+    """
+    def random_text():
+        return ''.join(rng.choice(CHECK_ALPHABET) for _ in range(rng.randint(1, 12)))
+
+    mismatches = 0
+    for _ in range(trials):
+        names = [random_text() for _ in range(catalog_size)]
+        catalog = CatalogIndex({'확인': pd.DataFrame({'상품명': names})})
+        query = random_text()
+        threshold = rng.randint(1, 100)
+
+        expected = find_matching_products(query, catalog, top_n=catalog_size, threshold=threshold, prefilter=None)
+        actual = find_matching_products(query, catalog, top_n=catalog_size, threshold=threshold, prefilter='exact')
+        if actual != expected:
+            mismatches += 1
+            if mismatches <= 3:
+                print(f"  불일치: {query!r} threshold={threshold}")
+    return mismatches
+
+
+def run(catalog, orders, threshold, prefilter):
+    start = time.perf_counter()
+    results = [find_matching_products(o, catalog, top_n=5, threshold=threshold, prefilter=prefilter)
+               for o in orders]
+    return results, (time.perf_counter() - start) / len(orders)
+
+
+def main():
+    n_products = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    n_orders = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    rng = random.Random(42)
+
+    mismatches = check_exact_equivalence(random.Random(7))
+    print(f"exact 모드 무작위 확인: {'일치' if not mismatches else f'불일치 {mismatches}건'}")
+
+    names = [make_name(rng) for _ in range(n_products)]
+    products = {'전체': pd.DataFrame({'상품명': names})}
+    orders = [make_order(rng, rng.choice(names)) for _ in range(n_orders)]
+
+    catalog = CatalogIndex(products)
+    start = time.perf_counter()
+    index = catalog.ngram_index
+    print(f"상품 {n_products}개 / 주문 {n_orders}개, 역색인 생성 {time.perf_counter() - start:.2f}초")
+
+    for threshold in (60, 70, 80):
+        baseline, base_time = run(catalog, orders, threshold, None)
+        print(f"\n[threshold={threshold}] 필터 없음: {base_time * 1000:.1f} ms/주문")
+
+        for mode in ('exact', 'approximate'):
+            results, elapsed = run(catalog, orders, threshold, mode)
+            counts = [len(index.candidates(o, o, threshold, mode=mode)) for o in orders]
+
+            expected = sum(len(r) for r in baseline)
+            found = sum(len([m for m in r if m in b]) for r, b in zip(results, baseline))
+            recall = found / expected if expected else 1.0
+            print(f"  {mode:<11}: {elapsed * 1000:.1f} ms/주문, "
+                  f"평균 후보 {sum(counts) / len(counts):.0f}개, "
+                  f"recall {recall:.4f}, 속도 {base_time / elapsed:.1f}배")
+
+    if mismatches:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
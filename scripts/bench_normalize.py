@@ -0,0 +1,73 @@
+"""
+문자열 정규화 벤치마크
+- normalize_string (값마다 호출) vs normalize_strings (일괄 처리)
+- 한글/영문이 섞인 가상 상품명 + 빈 값/숫자/NaN 으로 결과 동일 여부와 소요 시간 비교
+
+실행: python scripts/bench_normalize.py [값 개수] [반복 횟수]
+"""
+import os
+import random
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.matcher import normalize_string, normalize_strings
+
+
+BRANDS = ['삼성', 'LG', 'SAMSUNG', 'Philips', '쿠쿠', 'Tefal', 'SK매직', '위닉스', 'Dyson', '한일']
+ITEMS = ['냉장고', 'Refrigerator', '세탁기', '전기밥솥', 'Air Fryer', '선풍기', '공기청정기',
+         '청소기', 'Vacuum', '커피머신', '드라이기', '다리미']
+SPECS = ['화이트', 'BLACK', '(특가)', '2024년형', '[무료배송]', '대용량/미니', 'Ultra-HD', '55"', '1+1']
+
+
+def make_values(rng, count):
+    values = []
+    for _ in range(count):
+        r = rng.random()
+        if r < 0.02:
+            values.append(rng.choice([np.nan, None, '', '  ', 0, 12345, 1.5]))
+            continue
+        model = f"{rng.choice('ABCDEFGHJK')}{rng.choice('XYZ')}-{rng.randint(100, 9999)}"
+        words = [rng.choice(BRANDS), rng.choice(ITEMS), rng.choice(SPECS), model]
+        if rng.random() < 0.2:
+            words.append('\n' + rng.choice(SPECS))
+        values.append(' '.join(words))
+    return values
+
+
+def best_of(func, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return result, best
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+    values = make_values(random.Random(0), count)
+    series = pd.Series(values, dtype=object)
+
+    expected, scalar_time = best_of(lambda: [normalize_string(v) for v in values], repeat)
+    batch, batch_time = best_of(lambda: normalize_strings(values), repeat)
+    batch_series, series_time = best_of(lambda: normalize_strings(series), repeat)
+
+    assert batch == expected, "normalize_strings(list) 결과가 normalize_string 과 다릅니다"
+    assert batch_series.tolist() == expected, "normalize_strings(Series) 결과가 normalize_string 과 다릅니다"
+
+    print(f"값 {count}개, {repeat}회 중 최소 시간")
+    print(f"  normalize_string (값마다): {scalar_time * 1000:.1f} ms")
+    print(f"  normalize_strings(list)  : {batch_time * 1000:.1f} ms ({scalar_time / batch_time:.1f}배)")
+    print(f"  normalize_strings(Series): {series_time * 1000:.1f} ms ({scalar_time / series_time:.1f}배)")
+
+
+if __name__ == "__main__":
+    main()
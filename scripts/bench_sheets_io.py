@@ -0,0 +1,287 @@
+"""
+구글 시트 API 입출력 벤치마크 (메모리 내 가짜 gspread 사용, 네트워크 없음)
+- 실제 앱 흐름을 재현: 스크립트 실행(rerun)마다 URL 조회 + 주문 로드,
+  자동 매칭 일괄 반영 → 수동 매칭 클릭(쓰기 큐) → 중간에 다른 사용자가 주문 추가
+- 서식만 따로 보내는 _apply_soldout_formatting / _apply_option_formatting 도 측정
+- 할당량(분당 60회)과 429 오류를 주입한 상태에서도 같은 결과가 반영되는지 확인
+- 쓰기 큐에 넣은 뒤 행이 밀리거나(다른 사용자가 행 삭제) 시트 범위를 벗어난 결과는
+  보류되고 나머지만 반영되는지 확인
+- 단계별 API 호출 수(읽기/쓰기/Drive), 전송 bytes, 가상 소요 시간 출력
+- 기본 크기에서는 예산(BUDGETS)을 넘거나 결과가 틀리면 종료 코드 1 (입출력 회귀 확인용)
+
+실행: python scripts/bench_sheets_io.py [주문 수] [수동 매칭 수]
+"""
+import contextlib
+import io
+import os
+import random
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fake_gspread import FakeClient, FakeSheetsBackend, SimulatedClock
+from src.sheet_session import SheetSession
+from src.sheets_scheduler import SheetsScheduler
+from src.utils import (
+    _apply_option_formatting,
+    _apply_soldout_formatting,
+    batch_update_matching_results,
+    get_spreadsheet_url,
+    load_matching_sheet_orders,
+)
+from src.write_queue import MatchWriteQueue
+
+
+SHEET_NAME = "상품매칭용시트"
+ORDER_HEADERS = ['주문번호', '주문일', '상품명', '수량', '수취인', '주소']
+
+DEFAULT_ORDERS = 400
+DEFAULT_MANUAL = 30
+FLUSH_EVERY = 5          # 쓰기 큐가 한 번에 모아 반영하는 클릭 수 (반영 주기 동안 쌓이는 양)
+AUTO_MATCH_RATE = 0.6
+EXTERNAL_ORDERS = 5      # 수동 매칭 도중 다른 사용자가 추가하는 주문 수
+
+# 기본 크기(주문 400, 수동 매칭 30)에서의 상한 (호출 수는 측정값 그대로, 크기/시간은 약 10~20% 여유)
+# 429 로 거절된 일괄 쓰기도 본문을 다시 보내므로 전송 bytes 에 포함됨
+# 첫 자동 매칭은 매칭 컬럼이 없어도 주문 상품명 확인을 위해 한 번 더 읽음
+BUDGETS = {
+    '자동 매칭': {'reads': 6, 'writes': 1, 'drive': 2, 'bytes_sent': 165_000, 'simulated_seconds': 2.6},
+    '수동 매칭': {'reads': 13, 'writes': 6, 'drive': 32, 'bytes_sent': 32_000, 'simulated_seconds': 12.5},
+    '서식만 전송': {'reads': 0, 'writes': 2, 'drive': 0, 'bytes_sent': 145_000, 'simulated_seconds': 1.1},
+    '할당량/429': {'reads': 19, 'writes': 9, 'drive': 34, 'bytes_sent': 525_000, 'simulated_seconds': 18.0},
+}
+
+BRANDS = ['삼성', 'LG', '쿠쿠', '필립스', '테팔', 'SK매직', '위닉스', '신일']
+ITEMS = ['냉장고', '세탁기', '전기밥솥', '에어프라이어', '선풍기', '가습기', '제습기', '청소기']
+
+
+def make_orders(rng, count, start=1):
+    return [
+        [f"ORD{start + i:06d}", '2024-05-01', f"{rng.choice(BRANDS)} {rng.choice(ITEMS)} {rng.randint(100, 9999)}",
+         str(rng.randint(1, 3)), f"고객{rng.randint(1, 999)}", f"서울시 {rng.randint(1, 25)}구"]
+        for i in range(count)
+    ]
+
+
+def make_match(rng, name):
+    """카탈로그에서 찾은 상품 (10%는 품절 탭, 30%는 옵션 있음)"""
+    return {
+        '상품명': f"{name} 정품",
+        '매입': f"{rng.randint(5, 300) * 1000}.0",
+        '매출': f"{rng.randint(6, 400) * 1000}.0",
+        '매입(업체)': rng.choice(['A상사', 'B유통', 'C물산']),
+        '탭': '품절상품' if rng.random() < 0.1 else rng.choice(['가전', '주방', '생활']),
+        '옵션': rng.choice(['화이트', '블랙', '대용량']) if rng.random() < 0.3 else '',
+    }
+
+
+class Replay:
+    """가짜 시트 하나에 대한 앱 세션 재현"""
+
+    def __init__(self, n_orders, seed=0, **backend_options):
+        self.rng = random.Random(seed)
+        self.clock = SimulatedClock()
+        self.backend = FakeSheetsBackend(self.clock, **backend_options)
+        self.client = FakeClient(self.backend)
+        self.client.create_spreadsheet(SHEET_NAME, {
+            '시트1': [ORDER_HEADERS] + make_orders(self.rng, n_orders),
+            '매칭상품': [['상품명']],
+        })
+        self.n_orders = n_orders
+
+        # 클라이언트 쪽 속도 제한은 풀고 (서버 할당량은 가짜 서버가 적용) 대기/재시도는 가상 시계로
+        self.scheduler = SheetsScheduler(
+            read_per_minute=1e9, write_per_minute=1e9, drive_per_minute=1e9,
+            sleep=self.clock.sleep, clock=self.clock.now, jitter=lambda: 0.5
+        )
+        # 변경 확인은 매번 (가장 보수적인 설정), 변경이 없으면 계속 재사용
+        self.session = SheetSession(self.client, SHEET_NAME, scheduler=self.scheduler,
+                                    probe_ttl=0, cache_max_age=float('inf'))
+        self.expected = {}  # 시트 행 번호 → 매칭상품_상품명
+
+    def rerun(self):
+        """Streamlit 스크립트 실행 한 번 (사이드바 URL + 주문 로드)"""
+        get_spreadsheet_url(self.session, SHEET_NAME)
+        return load_matching_sheet_orders(self.session, SHEET_NAME)
+
+    def measure(self, name, func):
+        self.backend.reset_stats()
+        self.scheduler.reset_stats()
+        with contextlib.redirect_stdout(io.StringIO()):
+            func()
+        stats = self.backend.stats()
+        stats['retries'] = self.scheduler.totals()['retries']
+        return name, stats
+
+    def auto_match(self):
+        orders = self.rerun()
+        results = []
+        for idx, row in orders.iterrows():
+            if self.rng.random() < AUTO_MATCH_RATE:
+                data = make_match(self.rng, row['상품명'])
+                results.append({'row_index': idx + 2, 'data': data, 'match_type': '100%일치',
+                                'order_name': row['상품명']})
+                self.expected[idx + 2] = data['상품명']
+
+        report = {}
+        batch_update_matching_results(self.session, SHEET_NAME, results, report=report)
+        if report.get('error'):
+            raise RuntimeError(report['error'])
+        self.rerun()
+
+    def manual_match(self, clicks, queue_dir):
+        queue = MatchWriteQueue(self.session, SHEET_NAME, queue_dir=queue_dir, start=False)
+        orders = self.rerun()
+
+        for click in range(clicks):
+            if click == clicks // 2:
+                # 다른 사용자가 주문 추가 (증분 로드 경로)
+                new_rows = make_orders(self.rng, EXTERNAL_ORDERS, start=self.n_orders + 1)
+                self.client.external_edit(SHEET_NAME, '시트1', lambda grid: grid.values.extend(new_rows))
+                self.n_orders += EXTERNAL_ORDERS
+
+            pending = {row - 2 for row in queue.pending_rows()}
+            candidates = [idx for idx in orders.index if idx not in pending]
+            if not candidates:
+                break
+            idx = self.rng.choice(candidates)
+            data = make_match(self.rng, orders.loc[idx, '상품명'])
+            if queue.submit(idx + 2, data, order_name=orders.loc[idx, '상품명']):
+                self.expected[idx + 2] = data['상품명']
+
+            if (click + 1) % FLUSH_EVERY == 0 and not queue.flush_once():
+                raise RuntimeError(queue.stats()['last_error'])
+            orders = self.rerun()
+
+        while queue.stats()['pending']:
+            if not queue.flush_once():
+                raise RuntimeError(queue.stats()['last_error'])
+        self.rerun()
+
+    def shifted_rows(self, queue_dir, picks=8):
+        """
+        쓰기 큐에 넣은 뒤 다른 사용자가 중간 행을 삭제 + 시트 범위 밖 행 하나
+        → 밀린 행과 범위 밖 행은 보류, 나머지만 반영
+
+        Returns:
+            bool: 보류/반영 결과가 기대와 같은지
+        """
+        queue = MatchWriteQueue(self.session, SHEET_NAME, queue_dir=queue_dir, start=False)
+        orders = self.rerun()
+        rows = sorted(self.rng.sample([idx + 2 for idx in orders.index], picks + 1))
+        deleted = rows.pop(picks // 2)
+
+        matches = {}
+        for row in rows:
+            matches[row] = make_match(self.rng, orders.loc[row - 2, '상품명'])
+            queue.submit(row, matches[row], order_name=orders.loc[row - 2, '상품명'])
+        outside = self.client.grid(SHEET_NAME, '시트1').row_count + 5
+        queue.submit(outside, make_match(self.rng, '범위 밖'))
+
+        self.client.external_edit(SHEET_NAME, '시트1', lambda grid: grid.values.pop(deleted - 1))
+        while queue.stats()['pending']:
+            if not queue.flush_once():
+                return False
+
+        self.expected = {row: matches[row]['상품명'] for row in rows if row < deleted}
+        expected_failed = {row for row in rows if row > deleted} | {outside}
+        failed = {entry['row_index'] for entry in queue.failed_rows()}
+        return failed == expected_failed and self.verify()
+
+    def formatting_only(self):
+        worksheet = self.session.worksheet("시트1")
+        headers = self.session.headers("시트1")
+        tab_col = headers.index('매칭_탭') + 1
+        option_col = headers.index('매칭_옵션') + 1
+        soldout_rows = [{'row_idx': row, 'tab_col_idx': tab_col} for row in self.expected]
+        option_rows = [{'row_idx': row, 'option_col_idx': option_col, 'has_value': row % 2 == 0}
+                       for row in self.expected]
+        _apply_soldout_formatting(worksheet, soldout_rows, len(headers))
+        _apply_option_formatting(worksheet, option_rows)
+
+    def verify(self):
+        """시트에 기대한 매칭 결과가 그대로 있고, 다른 행은 비어 있는지"""
+        grid = self.client.grid(SHEET_NAME, '시트1')
+        headers = grid.values[0]
+        if '매칭상품_상품명' not in headers:
+            return not self.expected
+        col = headers.index('매칭상품_상품명')
+        actual = {
+            row_idx + 1: row[col]
+            for row_idx, row in enumerate(grid.values)
+            if row_idx > 0 and col < len(row) and row[col]
+        }
+        return actual == self.expected
+
+
+def run_all(n_orders, clicks):
+    results = []
+    checks = []
+
+    with tempfile.TemporaryDirectory() as tmp:
+        replay = Replay(n_orders)
+        results.append(replay.measure('자동 매칭', replay.auto_match))
+        results.append(replay.measure('수동 매칭', lambda: replay.manual_match(clicks, os.path.join(tmp, 'q1'))))
+        checks.append(('기본', replay.verify()))
+        results.append(replay.measure('서식만 전송', replay.formatting_only))
+
+        # 서버 할당량 분당 60회 + 첫 두 번의 일괄 쓰기는 429
+        limited = Replay(n_orders, read_per_minute=60, write_per_minute=60)
+        limited.backend.inject_errors('spreadsheets.batchUpdate', 429, 429)
+
+        def quota_session():
+            limited.auto_match()
+            limited.manual_match(clicks, os.path.join(tmp, 'q2'))
+
+        results.append(limited.measure('할당량/429', quota_session))
+        checks.append(('할당량/429', limited.verify()))
+
+        shifted = Replay(n_orders, seed=1)
+        with contextlib.redirect_stdout(io.StringIO()):
+            checks.append(('행 삭제/범위 밖 보류', shifted.shifted_rows(os.path.join(tmp, 'q3'))))
+
+    return results, checks
+
+
+def main():
+    n_orders = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_ORDERS
+    clicks = int(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_MANUAL
+    check_budget = (n_orders, clicks) == (DEFAULT_ORDERS, DEFAULT_MANUAL)
+
+    print(f"주문 {n_orders}개, 자동 매칭 약 {AUTO_MATCH_RATE:.0%}, 수동 매칭 {clicks}회 ({FLUSH_EVERY}회마다 반영)")
+    results, checks = run_all(n_orders, clicks)
+
+    failed = False
+    for name, stats in results:
+        errors = ', '.join(f"{status}×{count}" for status, count in sorted(stats['errors'].items())) or '없음'
+        print(f"\n[{name}] 읽기 {stats['reads']}회 · 쓰기 {stats['writes']}회 · Drive {stats['drive']}회 · "
+              f"오류 {errors} · 재시도 {stats['retries']}회")
+        print(f"  전송 {stats['bytes_sent']:,} bytes · 수신 {stats['bytes_received']:,} bytes · "
+              f"가상 소요 {stats['simulated_seconds']:.2f}초")
+        print("  " + ", ".join(f"{api} {count}" for api, count in sorted(stats['calls'].items())))
+
+        if check_budget:
+            over = [
+                f"{key} {stats[key]:,.2f} > {limit:,}" if isinstance(stats[key], float) else f"{key} {stats[key]:,} > {limit:,}"
+                for key, limit in BUDGETS[name].items()
+                if stats[key] > limit
+            ]
+            if over:
+                failed = True
+                print(f"  ❌ 예산 초과: {'; '.join(over)}")
+
+    print()
+    for name, ok in checks:
+        print(f"결과 확인 ({name}): {'일치' if ok else '불일치'}")
+        failed = failed or not ok
+
+    if not check_budget:
+        print("기본 크기가 아니므로 예산 확인 생략")
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""
+썸네일 다운로드/디코딩 벤치마크
+- 기존 방식 (response.content 전체 읽기 → 원본 디코딩 → 축소) vs
+  download_and_resize_image (바이트 상한 스트리밍 + 축소 디코딩)
+- 로컬 HTTP 서버에서 큰 JPEG / PNG(RGBA) / 상한 초과 JPEG 을 내려받아
+  이미지마다 별도 프로세스에서 CPU 시간과 최대 메모리(RSS) 비교
+
+실행: python scripts/bench_thumbnail_decode.py [가로 픽셀] [반복 횟수]
+"""
+import io
+import multiprocessing
+import os
+import resource
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def _pixels(rng, width, height, channels, noise):
+    """그라데이션 + 노이즈 (상품 사진과 비슷한 압축률)"""
+    import numpy as np
+
+    y, x = np.mgrid[0:height, 0:width]
+    base = ((x * 255 // max(width - 1, 1) + y * 255 // max(height - 1, 1)) // 2).astype(np.int16)
+    layers = [base + rng.randint(-noise, noise + 1, size=(height, width), dtype=np.int16) for _ in range(channels)]
+    return np.clip(np.stack(layers, axis=2), 0, 255).astype(np.uint8)
+
+
+def make_images(width):
+    """가로 width 픽셀 4:3 테스트 이미지 (JPEG / RGBA PNG / 상한 초과 JPEG)"""
+    import numpy as np
+    from PIL import Image
+
+    height = width * 3 // 4
+    rng = np.random.RandomState(0)
+    images = {}
+
+    buffer = io.BytesIO()
+    Image.fromarray(_pixels(rng, width, height, 3, 12)).save(buffer, format='JPEG', quality=90)
+    images['photo.jpg'] = buffer.getvalue()
+
+    buffer = io.BytesIO()
+    Image.fromarray(_pixels(rng, width // 2, height // 2, 4, 2), 'RGBA').save(buffer, format='PNG')
+    images['alpha.png'] = buffer.getvalue()
+
+    # 다운로드 상한(8MB) 초과 JPEG
+    buffer = io.BytesIO()
+    Image.fromarray(_pixels(rng, width, height, 3, 120)).save(buffer, format='JPEG', quality=98)
+    images['huge.jpg'] = buffer.getvalue()
+
+    return images
+
+
+def _peak_rss_mb():
+    """현재 프로세스 최대 RSS (MB, /proc 기준 - exec 이전 부모 값이 섞이지 않음)"""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    # Linux ru_maxrss 단위는 KB
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def serve(images):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            body = images.get(self.path.lstrip('/'))
+            if body is None:
+                self.send_response(404)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header('Content-Type', 'image/jpeg')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    class Server(ThreadingHTTPServer):
+        def handle_error(self, request, client_address):
+            # 상한 초과로 클라이언트가 먼저 연결을 끊는 경우
+            pass
+
+    server = Server(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def _legacy(url):
+    """변경 전 download_and_resize_image 와 같은 처리"""
+    import requests
+    from PIL import Image
+
+    response = requests.get(url, timeout=30, stream=True)
+    response.raise_for_status()
+    image = Image.open(io.BytesIO(response.content))
+    if image.mode in ('RGBA', 'P'):
+        image = image.convert('RGB')
+    image.thumbnail((100, 100), Image.Resampling.LANCZOS)
+    output = io.BytesIO()
+    image.save(output, format='JPEG', quality=85)
+    return output.getvalue()
+
+
+def _bounded(url):
+    from src.image_handler import download_and_resize_image
+
+    return download_and_resize_image(url, size=(100, 100), timeout=30, use_cache=False)
+
+
+def _measure(name, url, repeat, queue):
+    func = globals()[name]
+
+    # 모듈 import 는 측정에서 제외
+    import requests  # noqa: F401
+    from PIL import Image  # noqa: F401
+    import src.image_handler  # noqa: F401
+    base_rss = _peak_rss_mb()
+
+    result = None
+    cpu_times = []
+    for _ in range(repeat):
+        start = time.process_time()
+        result = func(url)
+        cpu_times.append(time.process_time() - start)
+
+    peak_mb = _peak_rss_mb() - base_rss
+    queue.put((min(cpu_times), peak_mb, len(result) if result else 0))
+
+
+def main():
+    width = int(sys.argv[1]) if len(sys.argv) > 1 else 4000
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+
+    images = make_images(width)
+    server = serve(images)
+    base = f"http://127.0.0.1:{server.server_port}"
+
+    ctx = multiprocessing.get_context('spawn')
+    for filename, body in images.items():
+        print(f"{filename}: {len(body) / 1024 / 1024:.1f} MB")
+        for name in ('_legacy', '_bounded'):
+            queue = ctx.Queue()
+            proc = ctx.Process(target=_measure, args=(name, f"{base}/{filename}", repeat, queue))
+            proc.start()
+            cpu, peak_mb, out_size = queue.get()
+            proc.join()
+            status = f"썸네일 {out_size} bytes" if out_size else "상한 초과로 건너뜀"
+            print(f"  {name.strip('_'):<8}: CPU {cpu * 1000:.0f} ms, RSS 증가 {peak_mb:.0f} MB, {status}")
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
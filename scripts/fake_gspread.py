@@ -0,0 +1,460 @@
+"""
+메모리 내 가짜 gspread (시트 API 입출력 측정용)
+- src/utils.py / src/sheet_session.py 가 쓰는 gspread Client / Spreadsheet / Worksheet 일부만 구현
+- 호출마다 API 이름, 요청/응답 크기, 가상 지연 시간을 기록 (실제로 기다리지 않고 가상 시계만 진행)
+- 분당 읽기/쓰기 할당량(고정 1분 창)을 넘거나 오류를 주입하면 gspread.exceptions.APIError(429 등)
+- 워크시트 핸들은 gspread 처럼 가져온 시점의 속성(행/열 수)을 들고 있음 (열을 추가해도 핸들은 그대로)
+
+사용 예:
+    backend = FakeSheetsBackend(read_per_minute=60)
+    client = FakeClient(backend)
+    client.create_spreadsheet("상품매칭용시트", {"시트1": rows})
+    ...
+    print(backend.stats())
+"""
+import copy
+import datetime
+import json
+
+from gspread.exceptions import APIError, GSpreadException, SpreadsheetNotFound, WorksheetNotFound
+from gspread.utils import a1_range_to_grid_range
+
+
+# 호출 종류별 기본 지연 시간(초) (왕복 + 서버 처리)
+DEFAULT_LATENCY = {'read': 0.25, 'write': 0.4, 'drive': 0.15}
+# 전송 속도 (bytes/초, 요청 + 응답 크기에 비례하는 지연)
+DEFAULT_BANDWIDTH = 1_000_000
+
+DEFAULT_ROW_COUNT = 1000
+DEFAULT_COL_COUNT = 26
+
+_EPOCH = datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc)
+
+
+class SimulatedClock:
+    """가상 시계 (sleep 은 시간만 진행)"""
+
+    def __init__(self, start=0.0):
+        self.value = float(start)
+
+    def now(self):
+        return self.value
+
+    def sleep(self, seconds):
+        self.value += max(0.0, seconds)
+
+
+class FakeResponse:
+    """APIError 에 넘길 requests.Response 대용"""
+
+    def __init__(self, status_code, message, retry_after=None):
+        self.status_code = status_code
+        self.headers = {} if retry_after is None else {'Retry-After': str(retry_after)}
+        self._error = {'code': status_code, 'message': message, 'status': 'FAKE'}
+        self.text = json.dumps({'error': self._error}, ensure_ascii=False)
+
+    def json(self):
+        return {'error': self._error}
+
+
+def _size(payload):
+    """JSON 인코딩 크기 (bytes, 핸들 객체 응답은 메타데이터 크기를 따로 세지 않음)"""
+    if payload is None:
+        return 0
+    return len(json.dumps(payload, ensure_ascii=False, default=lambda obj: '').encode('utf-8'))
+
+
+def _trim(values):
+    """API 응답처럼 뒤쪽 빈 셀/빈 행 제거"""
+    rows = []
+    for row in values:
+        row = list(row)
+        while row and row[-1] == '':
+            row.pop()
+        rows.append(row)
+    while rows and not rows[-1]:
+        rows.pop()
+    return rows
+
+
+class FakeSheetsBackend:
+    """
+    가짜 시트 서버 (지연 시간, 할당량, 오류 주입, 호출 기록)
+
+    모든 API 호출은 request() 를 거치며, 호출 하나당
+    주입 오류 확인 → 할당량 확인 → 실행 → 지연 시간만큼 가상 시계 진행 순서로 처리한다.
+    """
+
+    def __init__(self, clock=None, latency=None, bandwidth=DEFAULT_BANDWIDTH,
+                 read_per_minute=None, write_per_minute=None, drive_per_minute=None):
+        """
+        Args:
+            clock: SimulatedClock (None이면 새로 생성)
+            latency: {'read'|'write'|'drive': 기본 지연 시간(초)} (없는 항목은 기본값)
+            bandwidth: 전송 속도 (bytes/초)
+            read_per_minute, write_per_minute, drive_per_minute: 분당 할당량 (None이면 제한 없음)
+        """
+        self.clock = clock or SimulatedClock()
+        self.latency = {**DEFAULT_LATENCY, **(latency or {})}
+        self.bandwidth = bandwidth
+        self.quotas = {'read': read_per_minute, 'write': write_per_minute, 'drive': drive_per_minute}
+
+        self._injected = {}   # API 이름 → [상태 코드, ...] (앞에서부터 소비)
+        self._windows = {}    # 종류 → (분 번호, 호출 수)
+        self.log = []
+        self.reset_stats()
+
+    def inject_errors(self, api, *statuses):
+        """
+        다음 api 호출들이 차례로 실패하도록 설정
+
+        Args:
+            api: API 이름 (예: 'spreadsheets.batchUpdate')
+            *statuses: HTTP 상태 코드 (예: 429, 503)
+        """
+        self._injected.setdefault(api, []).extend(statuses)
+
+    def reset_stats(self):
+        """호출 기록 초기화 (할당량 창과 주입 오류는 유지)"""
+        self.log = []
+        self._started_at = self.clock.now()
+
+    def request(self, kind, api, payload, handler):
+        """
+        API 호출 한 번 처리
+
+        Args:
+            kind: 'read', 'write' 또는 'drive'
+            api: API 이름
+            payload: 요청 본문 (크기 계산용)
+            handler: 실제 처리 함수 (인자 없음, 응답 반환)
+
+        Returns:
+            handler 반환값
+
+        Raises:
+            APIError: 할당량 초과(429) 또는 주입된 오류
+        """
+        sent = _size(payload)
+        status, received, response = 200, 0, None
+        try:
+            injected = self._injected.get(api)
+            if injected:
+                status = injected.pop(0)
+                raise APIError(FakeResponse(status, f"주입된 오류 ({api})"))
+
+            if not self._take_quota(kind):
+                status = 429
+                raise APIError(FakeResponse(429, f"Quota exceeded for quota metric '{kind} requests'"))
+
+            try:
+                response = handler()
+            except APIError as e:
+                status = e.code
+                raise
+            except GSpreadException:
+                status = 404
+                raise
+            received = _size(response)
+            return response
+        finally:
+            elapsed = self.latency[kind] + (sent + received) / self.bandwidth
+            self.clock.sleep(elapsed)
+            self.log.append({
+                'kind': kind, 'api': api, 'status': status,
+                'sent': sent, 'received': received, 'seconds': elapsed,
+            })
+
+    def _take_quota(self, kind):
+        limit = self.quotas.get(kind)
+        if limit is None:
+            return True
+        minute = int(self.clock.now() // 60)
+        window, count = self._windows.get(kind, (minute, 0))
+        if window != minute:
+            count = 0
+        if count >= limit:
+            self._windows[kind] = (minute, count)
+            return False
+        self._windows[kind] = (minute, count + 1)
+        return True
+
+    def stats(self):
+        """
+        reset_stats() 이후 호출 통계
+
+        Returns:
+            dict: {'calls': {API 이름: 횟수}, 'reads', 'writes', 'drive', 'errors': {상태 코드: 횟수},
+                   'bytes_sent', 'bytes_received', 'simulated_seconds'}
+        """
+        stats = {
+            'calls': {}, 'reads': 0, 'writes': 0, 'drive': 0, 'errors': {},
+            'bytes_sent': 0, 'bytes_received': 0,
+            'simulated_seconds': self.clock.now() - self._started_at,
+        }
+        plural = {'read': 'reads', 'write': 'writes', 'drive': 'drive'}
+        for entry in self.log:
+            stats['calls'][entry['api']] = stats['calls'].get(entry['api'], 0) + 1
+            stats[plural[entry['kind']]] += 1
+            stats['bytes_sent'] += entry['sent']
+            stats['bytes_received'] += entry['received']
+            if entry['status'] != 200:
+                stats['errors'][entry['status']] = stats['errors'].get(entry['status'], 0) + 1
+        return stats
+
+
+class _Grid:
+    """워크시트 하나의 서버 쪽 상태 (값, 서식, 크기)"""
+
+    def __init__(self, sheet_id, title, rows, row_count=None, col_count=None):
+        self.sheet_id = sheet_id
+        self.title = title
+        self.values = [['' if v is None else str(v) for v in row] for row in rows]
+        width = max([len(row) for row in self.values] + [0])
+        self.row_count = max(row_count or DEFAULT_ROW_COUNT, len(self.values))
+        self.col_count = max(col_count or DEFAULT_COL_COUNT, width)
+        self.formats = {}  # (행, 열) (0-based) → userEnteredFormat
+
+    def set(self, row, col, value):
+        while len(self.values) <= row:
+            self.values.append([])
+        cells = self.values[row]
+        while len(cells) <= col:
+            cells.append('')
+        cells[col] = value
+
+    def check_bounds(self, row_start, row_end, col_start, col_end, label):
+        if row_end > self.row_count or col_end > self.col_count or row_start < 0 or col_start < 0:
+            raise APIError(FakeResponse(
+                400,
+                f"Range ({self.title}!{label}) exceeds grid limits. "
+                f"Max rows: {self.row_count}, max columns: {self.col_count}"
+            ))
+
+    def read(self, a1):
+        grid = a1_range_to_grid_range(a1)
+        row_start = grid.get('startRowIndex', 0)
+        row_end = grid.get('endRowIndex', self.row_count)
+        col_start = grid.get('startColumnIndex', 0)
+        col_end = grid.get('endColumnIndex', self.col_count)
+        self.check_bounds(row_start, max(row_end, row_start + 1), col_start, col_end, a1)
+        return _trim(row[col_start:col_end] for row in self.values[row_start:row_end])
+
+
+class FakeWorksheet:
+    """gspread.Worksheet 대용 (속성은 핸들을 가져온 시점 값)"""
+
+    def __init__(self, spreadsheet, grid):
+        self.spreadsheet = spreadsheet
+        self._grid = grid
+        self.id = grid.sheet_id
+        self.title = grid.title
+        self.row_count = grid.row_count
+        self.col_count = grid.col_count
+
+    @property
+    def _backend(self):
+        return self.spreadsheet.client.backend
+
+    def get_all_values(self):
+        """전체 값 (가장 긴 행 길이로 채움, 빈 시트는 [[]])"""
+        def handler():
+            rows = _trim(self._grid.values)
+            width = max([len(row) for row in rows] + [0])
+            return [row + [''] * (width - len(row)) for row in rows] or [[]]
+        return self._backend.request('read', 'values.get', {'range': self.title}, handler)
+
+    def row_values(self, row):
+        """row 번째 행 값 (뒤쪽 빈 셀 제외)"""
+        def handler():
+            rows = self._grid.read(f"{row}:{row}")
+            return rows[0] if rows else []
+        return self._backend.request('read', 'values.get', {'range': f"{self.title}!{row}:{row}"}, handler)
+
+    def batch_get(self, ranges):
+        """범위별 값 (응답은 범위 왼쪽 위 기준, 뒤쪽 빈 행/열 제외)"""
+        ranges = list(ranges)
+        return self._backend.request(
+            'read', 'values.batchGet', {'ranges': ranges},
+            lambda: [self._grid.read(a1) for a1 in ranges]
+        )
+
+
+class FakeSpreadsheet:
+    """gspread.Spreadsheet 대용"""
+
+    def __init__(self, client, key, title, grids):
+        self.client = client
+        self.id = key
+        self.title = title
+        self.url = f"https://docs.google.com/spreadsheets/d/{key}"
+        self._grids = grids  # 탭 이름 → _Grid (서버 쪽 상태, 핸들끼리 공유)
+        self._modified = 0.0
+
+    def touch(self):
+        """수정 시각 갱신 (서버 쪽 변경마다)"""
+        self._modified = self.client.backend.clock.now()
+
+    def get_lastUpdateTime(self):
+        """Drive modifiedTime (RFC 3339)"""
+        def handler():
+            modified = _EPOCH + datetime.timedelta(seconds=self._modified)
+            return modified.isoformat(timespec='microseconds').replace('+00:00', 'Z')
+        return self.client.backend.request('drive', 'drive.files.get', {'fileId': self.id}, handler)
+
+    def worksheet(self, title):
+        """탭 이름 → 워크시트 핸들 (메타데이터 조회 1회)"""
+        def handler():
+            grid = self._grids.get(title)
+            if grid is None:
+                raise WorksheetNotFound(title)
+            return FakeWorksheet(self, grid)
+        return self.client.backend.request('read', 'spreadsheets.get', {'spreadsheetId': self.id}, handler)
+
+    def batch_update(self, body):
+        """
+        spreadsheets.batchUpdate (updateCells / repeatCell / appendDimension 만 지원)
+        요청 하나라도 실패하면 전체가 반영되지 않음 (실제 API 와 같이 원자적)
+        """
+        def handler():
+            grids = {title: copy.deepcopy(grid) for title, grid in self._grids.items()}
+            by_id = {grid.sheet_id: grid for grid in grids.values()}
+            for request in body.get('requests', []):
+                _apply_request(by_id, request)
+            for title, grid in grids.items():
+                self._grids[title].__dict__.update(grid.__dict__)
+            self.touch()
+            return {'spreadsheetId': self.id, 'replies': [{} for _ in body.get('requests', [])]}
+        return self.client.backend.request('write', 'spreadsheets.batchUpdate', body, handler)
+
+
+def _cell_value(cell):
+    value = cell.get('userEnteredValue', {})
+    if 'stringValue' in value:
+        return value['stringValue']
+    if 'numberValue' in value:
+        number = value['numberValue']
+        return str(int(number)) if float(number).is_integer() else str(number)
+    if 'boolValue' in value:
+        return 'TRUE' if value['boolValue'] else 'FALSE'
+    if 'formulaValue' in value:
+        return value['formulaValue']
+    return ''
+
+
+def _grid_for(by_id, sheet_id):
+    grid = by_id.get(sheet_id)
+    if grid is None:
+        raise APIError(FakeResponse(400, f"No grid with id: {sheet_id}"))
+    return grid
+
+
+def _apply_request(by_id, request):
+    if 'updateCells' in request:
+        update = request['updateCells']
+        start = update['start']
+        grid = _grid_for(by_id, start.get('sheetId', 0))
+        row0, col0 = start.get('rowIndex', 0), start.get('columnIndex', 0)
+        rows = update.get('rows', [])
+        width = max([len(row.get('values', [])) for row in rows] + [0])
+        grid.check_bounds(row0, row0 + len(rows), col0, col0 + width, 'updateCells')
+        for dr, row in enumerate(rows):
+            for dc, cell in enumerate(row.get('values', [])):
+                grid.set(row0 + dr, col0 + dc, _cell_value(cell))
+
+    elif 'repeatCell' in request:
+        repeat = request['repeatCell']
+        rng = repeat['range']
+        grid = _grid_for(by_id, rng.get('sheetId', 0))
+        rows = (rng.get('startRowIndex', 0), rng.get('endRowIndex', grid.row_count))
+        cols = (rng.get('startColumnIndex', 0), rng.get('endColumnIndex', grid.col_count))
+        grid.check_bounds(rows[0], rows[1], cols[0], cols[1], 'repeatCell')
+        cell_format = repeat.get('cell', {}).get('userEnteredFormat', {})
+        fields = repeat.get('fields', '')
+        for row in range(*rows):
+            for col in range(*cols):
+                current = grid.formats.setdefault((row, col), {})
+                for key, value in cell_format.items():
+                    if key in fields:
+                        current[key] = copy.deepcopy(value)
+
+    elif 'appendDimension' in request:
+        append = request['appendDimension']
+        grid = _grid_for(by_id, append.get('sheetId', 0))
+        if append.get('dimension') == 'COLUMNS':
+            grid.col_count += append['length']
+        else:
+            grid.row_count += append['length']
+
+    else:
+        raise APIError(FakeResponse(400, f"지원하지 않는 요청: {sorted(request)}"))
+
+
+class FakeClient:
+    """gspread.Client 대용"""
+
+    def __init__(self, backend=None):
+        """
+        Args:
+            backend: FakeSheetsBackend (None이면 제한 없는 기본 서버)
+        """
+        self.backend = backend or FakeSheetsBackend()
+        self._spreadsheets = {}  # 키 → FakeSpreadsheet
+
+    def create_spreadsheet(self, title, worksheets):
+        """
+        준비용 스프레드시트 생성 (호출 기록에 남지 않음)
+
+        Args:
+            title: 스프레드시트 이름
+            worksheets: {탭 이름: 값 2차원 리스트}
+
+        Returns:
+            FakeSpreadsheet
+        """
+        key = f"fake-{len(self._spreadsheets) + 1}"
+        grids = {name: _Grid(i, name, rows) for i, (name, rows) in enumerate(worksheets.items())}
+        spreadsheet = FakeSpreadsheet(self, key, title, grids)
+        self._spreadsheets[key] = spreadsheet
+        return spreadsheet
+
+    def grid(self, title, worksheet):
+        """서버 쪽 상태 직접 조회/수정용 (_Grid, 호출 기록에 남지 않음)"""
+        for spreadsheet in self._spreadsheets.values():
+            if spreadsheet.title == title:
+                return spreadsheet._grids[worksheet]
+        raise SpreadsheetNotFound(title)
+
+    def external_edit(self, title, worksheet, edit):
+        """
+        다른 사용자의 수정 흉내 (호출 기록에 남지 않고 수정 시각만 갱신)
+
+        Args:
+            edit: _Grid 를 받아 수정하는 함수
+        """
+        for spreadsheet in self._spreadsheets.values():
+            if spreadsheet.title == title:
+                edit(spreadsheet._grids[worksheet])
+                spreadsheet.touch()
+                return
+        raise SpreadsheetNotFound(title)
+
+    def open(self, title):
+        """제목으로 열기 (Drive 검색 + 메타데이터 조회)"""
+        def search():
+            for spreadsheet in self._spreadsheets.values():
+                if spreadsheet.title == title:
+                    return spreadsheet.id
+            raise SpreadsheetNotFound(title)
+
+        key = self.backend.request('drive', 'drive.files.list', {'q': title}, search)
+        return self.open_by_key(key)
+
+    def open_by_key(self, key):
+        """키로 열기 (메타데이터 조회)"""
+        def handler():
+            spreadsheet = self._spreadsheets.get(key)
+            if spreadsheet is None:
+                raise SpreadsheetNotFound(key)
+            return spreadsheet
+        return self.backend.request('read', 'spreadsheets.get', {'spreadsheetId': key}, handler)
@@ -0,0 +1,165 @@
+"""
+Aho-Corasick 다중 패턴 검색 모듈
+- 모델명 수만 개를 한 번에 자동자(automaton)로 구성
+- 주문 상품명을 한 번만 훑어서 포함된 모델명을 모두 찾음
+"""
+import sys
+from collections import deque
+from itertools import chain
+
+
+class AhoCorasick:
+    """
+    문자열 포함 검색용 Aho-Corasick 자동자
+
+    패턴마다 값(예: 워크북 행 번호)을 붙여두고,
+    검색 시 텍스트에 포함된 패턴의 값을 돌려준다.
+    같은 패턴이 여러 번 추가되면 가장 작은 값만 유지한다.
+    """
+
+    def __init__(self, patterns=None):
+        """
+        Args:
+            patterns: (패턴 str, 값) 쌍의 iterable
+        """
+        # 노드 0 = 루트, 전이는 (노드, 문자) → 자식 노드 평면 딕셔너리로 보관
+        self._goto = {}
+        self._fail = [0]
+        self._value = [None]    # 노드에서 끝나는 패턴의 값
+        self._best = [None]     # 실패 링크를 따라 도달 가능한 값 중 최솟값
+        self._built = False
+
+        if patterns:
+            for pattern, value in patterns:
+                self.add(pattern, value)
+            self.build()
+
+    def __len__(self):
+        return sum(1 for v in self._value if v is not None)
+
+    def add(self, pattern, value):
+        """
+        패턴 추가 (build() 전에만 가능)
+
+        Args:
+            pattern: 찾을 문자열 (빈 문자열은 무시)
+            value: 패턴에 연결할 값 (비교 가능해야 함)
+        """
+        if self._built:
+            raise RuntimeError("build() 이후에는 패턴을 추가할 수 없습니다.")
+        if not pattern:
+            return
+
+        node = 0
+        for ch in pattern:
+            child = self._goto.get((node, ch))
+            if child is None:
+                child = len(self._fail)
+                self._goto[(node, ch)] = child
+                self._fail.append(0)
+                self._value.append(None)
+                self._best.append(None)
+            node = child
+
+        current = self._value[node]
+        if current is None or value < current:
+            self._value[node] = value
+
+    def memory_bytes(self):
+        """전이표/실패 링크/값 배열의 추정 바이트 수"""
+        goto = self._goto
+        size = sys.getsizeof(goto) + sum(map(sys.getsizeof, goto))
+        # 전이 키 (노드, 문자) 의 원소와 자식 노드 번호
+        size += sum(map(sys.getsizeof, chain.from_iterable(goto)))
+        size += sum(map(sys.getsizeof, goto.values()))
+        # 링크/값 배열의 원소는 노드/행 번호라 리스트 크기만
+        size += sum(sys.getsizeof(values) for values in (self._fail, self._value, self._best))
+        return size
+
+    def build(self):
+        """실패 링크 계산 (BFS)"""
+        children = {}
+        for (node, ch), child in self._goto.items():
+            children.setdefault(node, []).append((ch, child))
+
+        queue = deque()
+        for _, child in children.get(0, []):
+            self._fail[child] = 0
+            self._best[child] = self._value[child]
+            queue.append(child)
+
+        while queue:
+            node = queue.popleft()
+            for ch, child in children.get(node, []):
+                # 부모의 실패 링크를 따라가며 같은 문자로 갈 수 있는 노드 찾기
+                fail = self._fail[node]
+                while fail and (fail, ch) not in self._goto:
+                    fail = self._fail[fail]
+                fail = self._goto.get((fail, ch), 0)
+                self._fail[child] = fail
+
+                own = self._value[child]
+                inherited = self._best[fail]
+                if own is None:
+                    self._best[child] = inherited
+                elif inherited is None:
+                    self._best[child] = own
+                else:
+                    self._best[child] = min(own, inherited)
+                queue.append(child)
+
+        self._built = True
+
+    def _walk(self, text):
+        """텍스트를 한 번 훑으며 각 위치의 노드를 반환"""
+        goto = self._goto
+        fail = self._fail
+        node = 0
+        for ch in text:
+            while node and (node, ch) not in goto:
+                node = fail[node]
+            node = goto.get((node, ch), 0)
+            yield node
+
+    def find_first(self, text):
+        """
+        텍스트에 포함된 패턴 중 가장 작은 값 반환
+
+        Args:
+            text: 검색할 문자열
+
+        Returns:
+            포함된 패턴 값의 최솟값 또는 None
+        """
+        if not self._built:
+            self.build()
+
+        best = self._best
+        found = None
+        for node in self._walk(text):
+            value = best[node]
+            if value is not None and (found is None or value < found):
+                found = value
+        return found
+
+    def find_all(self, text):
+        """
+        텍스트에 포함된 모든 패턴 값 반환
+
+        Args:
+            text: 검색할 문자열
+
+        Returns:
+            set: 포함된 패턴 값 집합
+        """
+        if not self._built:
+            self.build()
+
+        found = set()
+        for node in self._walk(text):
+            # 출력 링크 대신 실패 링크를 따라가며 끝나는 패턴 수집
+            while node:
+                if self._value[node] is not None:
+                    found.add(self._value[node])
+                node = self._fail[node]
+        return found
@@ -0,0 +1,158 @@
+"""
+엑셀 카탈로그 스냅샷 디스크 캐시 모듈
+- 업로드 파일 내용(SHA-256) + 제외 탭 목록으로 키 생성
+- 파싱된 {탭명: DataFrame} 과 CatalogIndex 를 버전 붙은 pickle 로 저장
+- 전체 용량 상한을 넘으면 오래 사용하지 않은 항목부터 삭제 (LRU)
+"""
+import hashlib
+import json
+import os
+import pickle
+from pathlib import Path
+
+from src.disk_store import atomic_open, evict_lru, remove_file, touch
+
+
+# 저장 형식/CatalogIndex 구조가 바뀌면 올려서 기존 스냅샷 무효화
+CACHE_SCHEMA_VERSION = 5
+
+DEFAULT_CACHE_DIR = os.path.join("temp", "catalog_cache")
+DEFAULT_MAX_CACHE_MB = 256
+
+
+def catalog_cache_key(file_bytes, exclude_tabs=None):
+    """
+    스냅샷 캐시 키 생성
+
+    Args:
+        file_bytes: 업로드된 엑셀 파일 바이트 (bytes 또는 memoryview)
+        exclude_tabs: 제외할 탭 리스트
+
+    Returns:
+        str: SHA-256 hex 문자열
+    """
+    digest = hashlib.sha256()
+    digest.update(file_bytes)
+    digest.update(json.dumps(sorted(exclude_tabs or []), ensure_ascii=False).encode('utf-8'))
+    return digest.hexdigest()
+
+
+class CatalogSnapshotCache:
+    """
+    파싱된 카탈로그 스냅샷 디스크 캐시
+
+    파일명은 "{키}.v{버전}.pkl" 이며, 다른 버전 파일은 조회되지 않고
+    정리(evict) 시 먼저 삭제된다. 최근 사용 시각은 파일 mtime 으로 관리한다.
+    """
+
+    def __init__(self, cache_dir=None, max_bytes=None):
+        """
+        Args:
+            cache_dir: 캐시 디렉토리 (None이면 환경변수 CATALOG_CACHE_DIR 또는 temp/catalog_cache)
+            max_bytes: 전체 캐시 용량 상한 (None이면 환경변수 CATALOG_CACHE_MAX_MB 또는 256MB)
+        """
+        if cache_dir is None:
+            cache_dir = os.environ.get('CATALOG_CACHE_DIR', DEFAULT_CACHE_DIR)
+        if max_bytes is None:
+            max_bytes = int(float(os.environ.get('CATALOG_CACHE_MAX_MB', DEFAULT_MAX_CACHE_MB)) * 1024 * 1024)
+
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, key):
+        return self.cache_dir / f"{key}.v{CACHE_SCHEMA_VERSION}.pkl"
+
+    def get(self, key):
+        """
+        스냅샷 조회
+
+        Args:
+            key: catalog_cache_key() 결과
+
+        Returns:
+            tuple: (excel_data dict, CatalogIndex) 또는 None
+        """
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                payload = pickle.load(f)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except Exception as e:
+            # 손상된 스냅샷은 삭제 후 미스 처리
+            print(f"스냅샷 캐시 읽기 오류 ({path.name}): {str(e)}")
+            remove_file(path)
+            self.misses += 1
+            return None
+
+        if payload.get('version') != CACHE_SCHEMA_VERSION:
+            remove_file(path)
+            self.misses += 1
+            return None
+
+        # LRU: 최근 사용 시각 갱신
+        touch(path)
+
+        self.hits += 1
+        return payload['excel_data'], payload['catalog_index']
+
+    def put(self, key, excel_data, catalog_index):
+        """
+        스냅샷 저장 후 용량 상한에 맞춰 정리
+
+        Args:
+            key: catalog_cache_key() 결과
+            excel_data: {탭명: DataFrame}
+            catalog_index: CatalogIndex
+
+        Returns:
+            bool: 저장 성공 여부
+        """
+        payload = {
+            'version': CACHE_SCHEMA_VERSION,
+            'excel_data': excel_data,
+            'catalog_index': catalog_index,
+        }
+
+        try:
+            # 임시 파일에 쓴 뒤 교체 (동시 업로드 시 반쯤 쓰인 파일 방지)
+            with atomic_open(self._path(key)) as f:
+                pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception as e:
+            print(f"스냅샷 캐시 저장 오류: {str(e)}")
+            return False
+
+        self.evict()
+        return True
+
+    def evict(self):
+        """
+        다른 버전 스냅샷 삭제 + 용량 상한 초과 시 오래된 항목부터 삭제
+
+        Returns:
+            int: 삭제한 파일 수
+        """
+        if not self.cache_dir.exists():
+            return 0
+
+        removed = 0
+        current = []
+        suffix = f".v{CACHE_SCHEMA_VERSION}.pkl"
+
+        for path in self.cache_dir.glob("*.pkl"):
+            if path.name.endswith(suffix):
+                current.append(path)
+            else:
+                removed += remove_file(path)
+
+        return removed + evict_lru(current, self.max_bytes)
+
+    def clear(self):
+        """캐시 전체 삭제"""
+        if not self.cache_dir.exists():
+            return
+        for path in self.cache_dir.glob("*.pkl"):
+            remove_file(path)
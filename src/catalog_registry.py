@@ -0,0 +1,182 @@
+"""
+프로세스 공용 카탈로그 레지스트리 모듈
+- 같은 엑셀 파일(내용 해시 기준)을 여러 세션이 올려도 파싱/인덱스 생성은 한 번만
+- 세션에는 키만 저장하고, 실제 {탭명: DataFrame} 과 CatalogIndex 는 프로세스에서 공유
+- 메모리 상한을 넘으면 오래 사용하지 않은 카탈로그부터 해제 (LRU)
+"""
+import os
+import threading
+from collections import OrderedDict
+
+
+DEFAULT_MAX_REGISTRY_MB = 384
+
+
+def estimate_catalog_bytes(excel_data, catalog_index=None):
+    """
+    카탈로그 메모리 사용량 추정
+
+    Args:
+        excel_data: {탭명: DataFrame}
+        catalog_index: CatalogIndex (None이면 DataFrame 만 계산, 지연 생성 구조는 만들어진 것만 포함)
+
+    Returns:
+        int: 추정 바이트 수
+    """
+    total = 0
+    for df in excel_data.values():
+        total += int(df.memory_usage(index=True, deep=True).sum())
+
+    if catalog_index is not None:
+        # 탭별 행 데이터, 행별 필드, n-gram 역색인, 모델명 자동자까지 (CatalogIndex.memory_bytes)
+        total += catalog_index.memory_bytes()
+
+    return total
+
+
+class CatalogRegistry:
+    """
+    내용 해시 키 → (excel_data, CatalogIndex) 공유 저장소 (스레드 안전)
+
+    Streamlit 세션은 스크립트 실행마다 다른 스레드에서 돌기 때문에
+    조회/등록은 전역 락으로, 파싱은 키별 락으로 보호한다.
+    같은 키를 동시에 요청하면 한 세션만 파싱하고 나머지는 결과를 기다린다.
+
+    공유 카탈로그는 읽기 전용으로 사용해야 한다 (세션에서 수정 금지).
+    """
+
+    def __init__(self, max_bytes=None):
+        """
+        Args:
+            max_bytes: 전체 메모리 상한 (None이면 환경변수 CATALOG_REGISTRY_MAX_MB 또는 384MB)
+        """
+        if max_bytes is None:
+            max_bytes = int(float(os.environ.get('CATALOG_REGISTRY_MAX_MB', DEFAULT_MAX_REGISTRY_MB)) * 1024 * 1024)
+
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.loads = 0
+
+        self._entries = OrderedDict()  # 키 → (excel_data, catalog_index, 바이트 수)
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        self._load_locks = {}
+
+    def get(self, key):
+        """
+        공유 카탈로그 조회
+
+        Args:
+            key: catalog_cache_key() 결과
+
+        Returns:
+            tuple: (excel_data dict, CatalogIndex) 또는 None
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0], entry[1]
+
+    def put(self, key, excel_data, catalog_index):
+        """
+        카탈로그 등록 후 메모리 상한에 맞춰 정리
+
+        Args:
+            key: catalog_cache_key() 결과
+            excel_data: {탭명: DataFrame}
+            catalog_index: CatalogIndex
+
+        Returns:
+            tuple: (excel_data dict, CatalogIndex)
+        """
+        # 첫 매칭 때 생기는 역색인/자동자까지 크기에 포함되도록 미리 생성
+        if catalog_index is not None:
+            catalog_index.build_lazy_indexes()
+        size = estimate_catalog_bytes(excel_data, catalog_index)
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._total_bytes -= previous[2]
+
+            self._entries[key] = (excel_data, catalog_index, size)
+            self._total_bytes += size
+            self._evict_locked()
+
+        return excel_data, catalog_index
+
+    def get_or_load(self, key, loader):
+        """
+        공유 카탈로그 조회, 없으면 loader 로 한 번만 생성
+
+        Args:
+            key: catalog_cache_key() 결과
+            loader: 인자 없이 (excel_data, catalog_index) 를 반환하는 함수
+
+        Returns:
+            tuple: (excel_data dict, CatalogIndex)
+        """
+        catalog = self.get(key)
+        if catalog is not None:
+            return catalog
+
+        with self._lock:
+            load_lock = self._load_locks.setdefault(key, threading.Lock())
+
+        with load_lock:
+            # 기다리는 동안 다른 세션이 이미 등록했을 수 있음
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    self._entries.move_to_end(key)
+                    return entry[0], entry[1]
+
+            try:
+                excel_data, catalog_index = loader()
+                self.loads += 1
+                return self.put(key, excel_data, catalog_index)
+            finally:
+                with self._lock:
+                    self._load_locks.pop(key, None)
+
+    def discard(self, key):
+        """카탈로그 하나 해제"""
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self._total_bytes -= entry[2]
+
+    def clear(self):
+        """전체 해제"""
+        with self._lock:
+            self._entries.clear()
+            self._total_bytes = 0
+
+    def stats(self):
+        """
+        현재 상태
+
+        Returns:
+            dict: {'entries', 'bytes', 'max_bytes', 'hits', 'misses', 'loads'}
+        """
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self._total_bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'loads': self.loads,
+            }
+
+    def _evict_locked(self):
+        # 가장 최근 항목은 상한을 넘더라도 유지 (방금 올린 카탈로그를 바로 버리지 않도록)
+        while self._total_bytes > self.max_bytes and len(self._entries) > 1:
+            _, (_, _, size) = self._entries.popitem(last=False)
+            self._total_bytes -= size
@@ -0,0 +1,98 @@
+"""
+디스크 캐시 공용 파일 처리 모듈
+- 임시 파일에 쓴 뒤 교체하는 원자적 저장 (동시 저장 시 반쯤 쓰인 파일 방지)
+- 파일 mtime 을 최근 사용 시각으로 쓰는 LRU 정리
+- 스냅샷 캐시, 썸네일 캐시, 내장 이미지 저장소가 함께 사용
+"""
+import os
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+
+
+@contextmanager
+def atomic_open(path):
+    """
+    임시 파일을 열어 넘겨주고, 블록이 끝나면 path 로 교체 (예외 시 임시 파일 삭제)
+
+    Args:
+        path: 최종 파일 경로 (Path)
+
+    Yields:
+        바이너리 쓰기 모드 파일 객체
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            yield f
+        os.replace(tmp_path, path)
+    except BaseException:
+        remove_file(Path(tmp_path))
+        raise
+
+
+def atomic_write(path, payload):
+    """
+    바이트를 원자적으로 저장
+
+    Args:
+        path: 파일 경로 (Path)
+        payload: 저장할 bytes
+    """
+    with atomic_open(path) as f:
+        f.write(payload)
+
+
+def remove_file(path):
+    """
+    파일 삭제 (없거나 실패해도 예외 없음)
+
+    Returns:
+        int: 삭제했으면 1, 아니면 0
+    """
+    try:
+        path.unlink()
+        return 1
+    except OSError:
+        return 0
+
+
+def touch(path):
+    """LRU: 최근 사용 시각(mtime) 갱신 (실패는 무시)"""
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+
+
+def evict_lru(paths, max_bytes, keep=()):
+    """
+    파일 전체 용량이 max_bytes 를 넘으면 mtime 이 오래된 파일부터 삭제
+
+    Args:
+        paths: 정리 대상 파일 경로 목록
+        max_bytes: 용량 상한
+        keep: 삭제하지 않을 파일 경로 집합 (용량 계산에는 포함)
+
+    Returns:
+        int: 삭제한 파일 수
+    """
+    entries = []
+    for path in paths:
+        try:
+            stat = path.stat()
+        except OSError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, path))
+
+    removed = 0
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        if path in keep:
+            continue
+        removed += remove_file(path)
+        total -= size
+    return removed
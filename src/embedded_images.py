@@ -0,0 +1,341 @@
+"""
+엑셀 내장 이미지 수집 모듈
+- 시트 → drawing → 이미지 관계(.rels)와 drawing 앵커를 읽어 내장 이미지가 놓인 (탭, 행) 확인
+- 이미지마다 썸네일을 한 번만 만들어 로컬 저장소에 보관 (같은 이미지는 한 번만 처리)
+- 원본 이미지는 하나씩 읽어 썸네일로 만든 뒤 바로 버림 (메모리에는 작업 중인 원본만)
+- 저장소는 디스크 용량 상한을 넘으면 오래 사용하지 않은 썸네일부터 삭제 (LRU)
+- UI 에서는 '대표 1' URL 다운로드보다 로컬 썸네일을 먼저 사용
+"""
+import hashlib
+import json
+import os
+import posixpath
+import threading
+import zipfile
+import xml.etree.ElementTree as ET
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+
+from src.disk_store import atomic_write, evict_lru, remove_file, touch
+
+
+DEFAULT_EMBEDDED_DIR = os.path.join("temp", "embedded_thumbnails")
+DEFAULT_EMBEDDED_DISK_MB = 256
+
+_NS = {
+    'main': 'http://schemas.openxmlformats.org/spreadsheetml/2006/main',
+    'rel': 'http://schemas.openxmlformats.org/package/2006/relationships',
+    'xdr': 'http://schemas.openxmlformats.org/drawingml/2006/spreadsheetDrawing',
+    'a': 'http://schemas.openxmlformats.org/drawingml/2006/main',
+}
+_R_NS = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+_REL_DRAWING = _R_NS + '/drawing'
+_REL_IMAGE = _R_NS + '/image'
+_REL_OFFICE_DOCUMENT = _R_NS + '/officeDocument'
+
+
+def _rels_path(part_path):
+    """파트 경로 → 관계 파일 경로 (xl/worksheets/sheet1.xml → xl/worksheets/_rels/sheet1.xml.rels)"""
+    folder, name = posixpath.split(part_path)
+    return posixpath.join(folder, '_rels', name + '.rels')
+
+
+def _resolve_target(part_path, target):
+    """관계 Target(상대/절대) → zip 내부 경로"""
+    if target.startswith('/'):
+        return target.lstrip('/')
+    return posixpath.normpath(posixpath.join(posixpath.dirname(part_path), target))
+
+
+def _read_rels(archive, part_path):
+    """{관계 ID: (Type, zip 내부 경로)} (관계 파일이 없으면 빈 딕셔너리)"""
+    try:
+        root = ET.fromstring(archive.read(_rels_path(part_path)))
+    except KeyError:
+        return {}
+
+    rels = {}
+    for rel in root.findall('rel:Relationship', _NS):
+        if rel.get('TargetMode') == 'External':
+            continue
+        rels[rel.get('Id')] = (rel.get('Type'), _resolve_target(part_path, rel.get('Target')))
+    return rels
+
+
+def _workbook_path(archive):
+    for rel_type, target in _read_rels(archive, '').values():
+        if rel_type == _REL_OFFICE_DOCUMENT:
+            return target
+    return 'xl/workbook.xml'
+
+
+def find_embedded_images(source, sheet_names=None):
+    """
+    시트별 내장 이미지 위치 찾기 (이미지 파일은 읽지 않음)
+
+    셀에 고정된 앵커(twoCellAnchor/oneCellAnchor)의 시작 행 기준이며,
+    한 행에 이미지가 여러 개면 문서 순서상 첫 번째 이미지를 사용한다.
+
+    Args:
+        source: 엑셀(.xlsx, .xlsm) 파일 경로 또는 파일 객체
+        sheet_names: 대상 탭 이름 목록 (None이면 전체)
+
+    Returns:
+        dict: {(탭명, 엑셀 행 번호(1부터)): 이미지 zip 경로}
+    """
+    images = {}
+
+    with zipfile.ZipFile(source) as archive:
+        workbook_path = _workbook_path(archive)
+        workbook_rels = _read_rels(archive, workbook_path)
+        workbook = ET.fromstring(archive.read(workbook_path))
+
+        for sheet in workbook.iterfind('main:sheets/main:sheet', _NS):
+            name = sheet.get('name')
+            if sheet_names is not None and name not in sheet_names:
+                continue
+
+            rel = workbook_rels.get(sheet.get(f'{{{_R_NS}}}id'))
+            if rel is None:
+                continue
+            sheet_path = rel[1]
+
+            for rel_type, drawing_path in _read_rels(archive, sheet_path).values():
+                if rel_type != _REL_DRAWING:
+                    continue
+
+                drawing_rels = _read_rels(archive, drawing_path)
+                try:
+                    drawing = ET.fromstring(archive.read(drawing_path))
+                except KeyError:
+                    continue
+
+                for anchor_tag in ('xdr:twoCellAnchor', 'xdr:oneCellAnchor'):
+                    for anchor in drawing.iterfind(anchor_tag, _NS):
+                        row = anchor.find('xdr:from/xdr:row', _NS)
+                        blip = anchor.find('.//a:blip', _NS)
+                        if row is None or blip is None:
+                            continue
+
+                        image_rel = drawing_rels.get(blip.get(f'{{{_R_NS}}}embed'))
+                        if image_rel is None or image_rel[0] != _REL_IMAGE:
+                            continue
+
+                        # 앵커 행은 0부터 시작
+                        images.setdefault((name, int(row.text) + 1), image_rel[1])
+
+    return images
+
+
+def harvest_embedded_thumbnails(source, sheet_names=None, size=(100, 100), workers=None):
+    """
+    내장 이미지 썸네일 일괄 생성 (같은 이미지 파일은 한 번만 처리)
+
+    zip 에서 원본 이미지를 하나씩 읽어 스레드 풀에 넘기고, 작업 중인 원본이
+    workers 개를 넘지 않도록 썸네일이 끝나야 다음 이미지를 읽는다.
+
+    Args:
+        source: 엑셀(.xlsx, .xlsm) 파일 경로 또는 파일 객체
+        sheet_names: 대상 탭 이름 목록 (None이면 전체)
+        size: 썸네일 크기 (width, height)
+        workers: 썸네일 생성 스레드 수 (None이면 컨테이너 CPU 할당량 기준)
+
+    Returns:
+        dict: {(탭명, 엑셀 행 번호): 썸네일 JPEG 바이트}
+    """
+    from src.image_handler import _make_thumbnail
+    from src.utils import available_cpu_count
+
+    if workers is None:
+        workers = available_cpu_count()
+    workers = max(1, workers)
+
+    def make(path, data):
+        try:
+            return _make_thumbnail(data, size)
+        except Exception as e:
+            print(f"내장 이미지 처리 오류 ({path}): {str(e)}")
+            return None
+
+    thumbnails = {}
+    try:
+        positions = find_embedded_images(source, sheet_names)
+        if not positions:
+            return {}
+
+        if hasattr(source, 'seek'):
+            source.seek(0)
+
+        # zip 읽기는 순차로, 디코딩/축소는 병렬로 (Pillow 는 디코딩 중 GIL 을 놓음)
+        with zipfile.ZipFile(source) as archive, ThreadPoolExecutor(max_workers=workers) as executor:
+            running = {}
+            for path in sorted(set(positions.values())):
+                if len(running) >= workers:
+                    done, _ = wait(running, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        thumbnails[running.pop(future)] = future.result()
+                running[executor.submit(make, path, archive.read(path))] = path
+
+            for future, path in running.items():
+                thumbnails[path] = future.result()
+    except Exception as e:
+        raise Exception(f"내장 이미지 읽기 오류: {str(e)}")
+
+    return {
+        position: thumbnails[path]
+        for position, path in positions.items()
+        if thumbnails.get(path)
+    }
+
+
+class EmbeddedThumbnailStore:
+    """
+    카탈로그별 내장 이미지 썸네일 로컬 저장소
+
+    디스크 구조:
+        {카탈로그 키}.json  - {"탭명\\x00행 번호": 썸네일 해시}
+        blobs/{해시}.jpg   - 썸네일 바이트 (카탈로그 사이에서도 공유)
+
+    썸네일 파일 전체가 disk_bytes 를 넘으면 오래 사용하지 않은 것부터 삭제하고,
+    썸네일이 빠진 카탈로그 기록도 지워 다음 업로드 때 다시 수집한다.
+    """
+
+    def __init__(self, cache_dir=None, disk_bytes=None):
+        """
+        Args:
+            cache_dir: 저장 디렉토리 (None이면 환경변수 EMBEDDED_THUMBNAIL_DIR 또는 temp/embedded_thumbnails)
+            disk_bytes: 디스크 용량 상한 (None이면 환경변수 EMBEDDED_THUMBNAIL_DISK_MB 또는 256MB)
+        """
+        if cache_dir is None:
+            cache_dir = os.environ.get('EMBEDDED_THUMBNAIL_DIR', DEFAULT_EMBEDDED_DIR)
+        if disk_bytes is None:
+            disk_bytes = int(float(os.environ.get('EMBEDDED_THUMBNAIL_DISK_MB', DEFAULT_EMBEDDED_DISK_MB)) * 1024 * 1024)
+
+        self.cache_dir = Path(cache_dir)
+        self.disk_bytes = disk_bytes
+        self._indexes = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _position_key(tab_name, row):
+        return f"{tab_name}\x00{int(row)}"
+
+    def _index_path(self, catalog_key):
+        return self.cache_dir / f"{catalog_key}.json"
+
+    def _blob_path(self, blob):
+        return self.cache_dir / 'blobs' / f"{blob}.jpg"
+
+    def _load_index(self, catalog_key):
+        with self._lock:
+            index = self._indexes.get(catalog_key)
+        if index is not None:
+            return index
+
+        try:
+            with open(self._index_path(catalog_key), 'r', encoding='utf-8') as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        with self._lock:
+            self._indexes[catalog_key] = index
+        return index
+
+    def has(self, catalog_key):
+        """해당 카탈로그의 수집 결과가 있는지 (내장 이미지가 없는 카탈로그도 빈 결과로 기록됨)"""
+        return self._load_index(catalog_key) is not None
+
+    def put_all(self, catalog_key, thumbnails):
+        """
+        카탈로그의 썸네일 전체 저장
+
+        Args:
+            catalog_key: catalog_cache_key() 결과
+            thumbnails: harvest_embedded_thumbnails() 결과
+        """
+        index = {}
+        try:
+            for (tab_name, row), data in thumbnails.items():
+                blob = hashlib.sha256(data).hexdigest()
+                blob_path = self._blob_path(blob)
+                if blob_path.exists():
+                    touch(blob_path)
+                else:
+                    atomic_write(blob_path, data)
+                index[self._position_key(tab_name, row)] = blob
+
+            atomic_write(self._index_path(catalog_key), json.dumps(index, ensure_ascii=False).encode('utf-8'))
+        except Exception as e:
+            print(f"내장 이미지 썸네일 저장 오류: {str(e)}")
+
+        with self._lock:
+            self._indexes[catalog_key] = index
+
+        # 저장은 업로드당 한 번이므로 매번 용량 확인 (방금 저장한 카탈로그는 상한을 넘더라도 유지)
+        self.evict(keep=set(index.values()))
+
+    def get(self, catalog_key, tab_name, row):
+        """
+        (탭, 엑셀 행 번호) 의 썸네일
+
+        Returns:
+            bytes: 썸네일 바이트 또는 None
+        """
+        if catalog_key is None or row is None:
+            return None
+
+        index = self._load_index(catalog_key)
+        if not index:
+            return None
+
+        blob = index.get(self._position_key(tab_name, row))
+        if blob is None:
+            return None
+
+        blob_path = self._blob_path(blob)
+        try:
+            data = blob_path.read_bytes()
+        except OSError:
+            return None
+
+        # LRU: 최근 사용 시각 갱신
+        touch(blob_path)
+        return data
+
+    def evict(self, keep=()):
+        """
+        디스크 용량 상한 초과 시 오래 사용하지 않은 썸네일부터 삭제
+        (삭제한 썸네일을 가리키는 카탈로그 기록도 함께 삭제)
+
+        Args:
+            keep: 삭제하지 않을 썸네일 해시 집합
+
+        Returns:
+            int: 삭제한 파일 수 (카탈로그 기록 포함)
+        """
+        blob_dir = self.cache_dir / 'blobs'
+        if not blob_dir.exists():
+            return 0
+
+        # 카탈로그 기록은 작으므로 썸네일 파일 용량만 계산
+        keep_paths = {self._blob_path(blob) for blob in keep}
+        removed = evict_lru(blob_dir.iterdir(), self.disk_bytes, keep=keep_paths)
+        if removed:
+            removed += self._remove_incomplete_indexes()
+        return removed
+
+    def _remove_incomplete_indexes(self):
+        """썸네일 파일이 빠진 카탈로그 기록 삭제 (has() 가 False 가 되어 다음 업로드 때 다시 수집)"""
+        removed = 0
+        for path in self.cache_dir.glob('*.json'):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    blobs = set(json.load(f).values())
+            except (OSError, ValueError, AttributeError):
+                blobs = None
+            if blobs is None or any(not self._blob_path(blob).exists() for blob in blobs):
+                removed += remove_file(path)
+                with self._lock:
+                    self._indexes.pop(path.stem, None)
+        return removed
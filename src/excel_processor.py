@@ -3,10 +3,123 @@
 - 이미지 제거
 - 파일 최적화
 """
+import copy
+import struct
 import zipfile
 from pathlib import Path
 
 
+# zip 로컬 파일 헤더 고정 길이 / 데이터 디스크립터 플래그
+_LOCAL_HEADER_SIZE = 30
+_DATA_DESCRIPTOR_FLAG = 0x08
+_ZIP64_EXTRA_ID = 0x0001
+
+
+def _is_image_member(name, remove_drawings=True):
+    """제거 대상 zip 항목인지 확인"""
+    # 1) 실제 이미지 파일들
+    if name.startswith("xl/media/"):
+        return True
+
+    # 2) drawing (이미지/도형/차트 연결부)
+    if remove_drawings and name.startswith("xl/drawings/"):
+        return True
+
+    return False
+
+
+def _strip_zip64_extra(extra):
+    """extra 필드에서 ZIP64 항목 제거 (헤더 재작성 시 zipfile 이 다시 붙임)"""
+    result = b''
+    pos = 0
+    while pos + 4 <= len(extra):
+        header_id, size = struct.unpack('<HH', extra[pos:pos + 4])
+        if header_id != _ZIP64_EXTRA_ID:
+            result += extra[pos:pos + 4 + size]
+        pos += 4 + size
+    return result
+
+
+def _copy_member_raw(zin, zout, info):
+    """
+    zip 항목을 압축 해제/재압축 없이 원본 압축 바이트 그대로 복사
+
+    Args:
+        zin: 읽기용 ZipFile
+        zout: 쓰기용 ZipFile
+        info: 복사할 ZipInfo
+
+    Returns:
+        int: 복사한 압축 바이트 수
+    """
+    # 원본 로컬 헤더 길이(파일명/extra 가변 길이) 확인 후 압축 데이터 위치로 이동
+    zin.fp.seek(info.header_offset)
+    local_header = zin.fp.read(_LOCAL_HEADER_SIZE)
+    name_length, extra_length = struct.unpack('<HH', local_header[26:30])
+    zin.fp.seek(info.header_offset + _LOCAL_HEADER_SIZE + name_length + extra_length)
+
+    new_info = copy.copy(info)
+    # 크기/CRC 를 로컬 헤더에 바로 기록하므로 데이터 디스크립터는 사용하지 않음
+    new_info.flag_bits &= ~_DATA_DESCRIPTOR_FLAG
+    new_info.extra = _strip_zip64_extra(info.extra)
+    new_info.header_offset = zout.fp.tell()
+
+    zout.fp.write(new_info.FileHeader(zip64=None))
+
+    remaining = info.compress_size
+    while remaining > 0:
+        chunk = zin.fp.read(min(remaining, 1024 * 1024))
+        if not chunk:
+            raise zipfile.BadZipFile(f"압축 데이터가 잘렸습니다: {info.filename}")
+        zout.fp.write(chunk)
+        remaining -= len(chunk)
+
+    zout.filelist.append(new_info)
+    zout.NameToInfo[new_info.filename] = new_info
+    zout.start_dir = zout.fp.tell()
+    zout._didModify = True
+
+    return info.compress_size
+
+
+def strip_images_from_xlsx_stream(src, dst, remove_drawings=True):
+    """
+    엑셀(.xlsx, .xlsm) 이미지 제거 - 파일 객체 간 스트리밍, 재압축 없음
+    - 남기는 항목은 원본 압축 바이트를 그대로 복사 (CPU 비용 ≈ 복사 비용)
+    - 디스크 임시 파일 없이 BytesIO / Streamlit 업로드 버퍼끼리 처리 가능
+
+    Args:
+        src: 원본 엑셀 파일 객체 (읽기 + seek 가능) 또는 경로
+        dst: 결과를 쓸 파일 객체 (쓰기 가능) 또는 경로
+        remove_drawings: True면 drawing(도형/차트 이미지 연결부)도 같이 제거
+
+    Returns:
+        dict: 처리 결과
+            {
+                'removed_count': 제거한 항목 수,
+                'kept_count': 남긴 항목 수,
+                'bytes_saved': 제거된 압축 바이트 수,
+                'bytes_copied': 복사한 압축 바이트 수
+            }
+    """
+    stats = {'removed_count': 0, 'kept_count': 0, 'bytes_saved': 0, 'bytes_copied': 0}
+
+    try:
+        with zipfile.ZipFile(src, "r") as zin, zipfile.ZipFile(dst, "w", zipfile.ZIP_DEFLATED) as zout:
+            for item in zin.infolist():
+                if _is_image_member(item.filename, remove_drawings):
+                    stats['removed_count'] += 1
+                    stats['bytes_saved'] += item.compress_size
+                    continue
+
+                stats['bytes_copied'] += _copy_member_raw(zin, zout, item)
+                stats['kept_count'] += 1
+
+        return stats
+    except Exception as e:
+        raise Exception(f"이미지 제거 중 오류: {str(e)}")
+
+
 def remove_images_from_xlsx(src_path, dst_path, remove_drawings=True):
     """
     엑셀(.xlsx, .xlsm) 내부 이미지 파일 제거 후 새 파일로 저장.
@@ -28,22 +141,5 @@ def remove_images_from_xlsx(src_path, dst_path, remove_drawings=True):
     if src.suffix.lower() not in [".xlsx", ".xlsm"]:
         raise ValueError("이 스크립트는 .xlsx / .xlsm 형식만 지원합니다.")
 
-    try:
-        with zipfile.ZipFile(src, "r") as zin, zipfile.ZipFile(dst, "w", zipfile.ZIP_DEFLATED) as zout:
-            for item in zin.infolist():
-                name = item.filename
-
-                # 1) 실제 이미지 파일들
-                if name.startswith("xl/media/"):
-                    continue
-
-                # 2) drawing (이미지/도형/차트 연결부)
-                if remove_drawings and name.startswith("xl/drawings/"):
-                    continue
-
-                data = zin.read(name)
-                zout.writestr(item, data)
-
-        return True
-    except Exception as e:
-        raise Exception(f"이미지 제거 중 오류: {str(e)}")
+    strip_images_from_xlsx_stream(src, dst, remove_drawings=remove_drawings)
+    return True
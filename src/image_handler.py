@@ -2,19 +2,148 @@
 이미지 다운로드 및 처리 모듈
 """
 import io
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from urllib.parse import urlsplit
+
 import requests
+from requests.adapters import HTTPAdapter
 from PIL import Image
 import base64
 
+from src.thumbnail_cache import ThumbnailCache
+
+
+# 썸네일 일괄 다운로드 기본값
+DEFAULT_MAX_WORKERS = 8
+DEFAULT_PER_HOST_LIMIT = 4
+DEFAULT_DEADLINE = 15
+
+# 썸네일 원본 상한 (바이트 수 / 픽셀 수) - 넘으면 다운로드/디코딩하지 않음
+DEFAULT_MAX_IMAGE_BYTES = 8 * 1024 * 1024
+DEFAULT_MAX_IMAGE_PIXELS = 40_000_000
+_READ_CHUNK_SIZE = 64 * 1024
+
+_session = None
+_session_lock = threading.Lock()
+_host_semaphores = {}
+_thumbnail_cache = None
+
+
+def get_http_session(pool_size=DEFAULT_MAX_WORKERS):
+    """
+    프로세스 공용 requests.Session (호스트별 연결 재사용으로 TCP/TLS 핸드셰이크 절약)
+
+    Args:
+        pool_size: 호스트별 유지할 최대 연결 수 (최초 생성 시에만 적용)
+
+    Returns:
+        requests.Session
+    """
+    global _session
+
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            _session = session
+        return _session
+
+
+def get_thumbnail_cache():
+    """
+    프로세스 공용 썸네일 캐시 (메모리 LRU + 디스크)
+
+    Returns:
+        ThumbnailCache
+    """
+    global _thumbnail_cache
+
+    with _session_lock:
+        if _thumbnail_cache is None:
+            _thumbnail_cache = ThumbnailCache()
+        return _thumbnail_cache
+
+
+def _host_semaphore(image_url, per_host_limit):
+    """호스트별 동시 요청 수 제한용 세마포어"""
+    key = (urlsplit(image_url).netloc.lower(), per_host_limit)
+    with _session_lock:
+        semaphore = _host_semaphores.get(key)
+        if semaphore is None:
+            semaphore = threading.BoundedSemaphore(per_host_limit)
+            _host_semaphores[key] = semaphore
+        return semaphore
+
+
+class ImageTooLargeError(ValueError):
+    """이미지 원본이 바이트/픽셀 상한을 넘음"""
+
+
+def _read_limited(response, max_bytes):
+    """
+    응답 본문을 상한까지만 스트리밍으로 읽기
+    (Content-Length 가 상한을 넘으면 본문을 받기 전에 중단)
+    """
+    content_length = response.headers.get('Content-Length')
+    if content_length and content_length.isdigit() and int(content_length) > max_bytes:
+        raise ImageTooLargeError(f"이미지가 너무 큽니다: {int(content_length)} bytes")
+
+    buffer = bytearray()
+    for chunk in response.iter_content(chunk_size=_READ_CHUNK_SIZE):
+        buffer.extend(chunk)
+        if len(buffer) > max_bytes:
+            raise ImageTooLargeError(f"이미지가 너무 큽니다: {max_bytes} bytes 초과")
+    return bytes(buffer)
+
+
+def _make_thumbnail(content, size, max_pixels=DEFAULT_MAX_IMAGE_PIXELS):
+    """이미지 바이트 → 비율 유지 JPEG 썸네일 바이트"""
+    # PIL Image로 변환 (헤더만 읽은 상태, 아직 디코딩 전)
+    image = Image.open(io.BytesIO(content))
 
-def download_and_resize_image(image_url, size=(100, 100), timeout=10):
+    width, height = image.size
+    if width * height > max_pixels:
+        raise ImageTooLargeError(f"이미지 해상도가 너무 큽니다: {width}x{height}")
+
+    # JPEG: DCT 축소 디코딩으로 목표 크기 이상인 가장 작은 배율(1/2, 1/4, 1/8)로만 디코딩
+    image.draft(None, size)
+
+    # RGBA 모드면 RGB로 변환 (JPEG 저장을 위해)
+    if image.mode in ('RGBA', 'P'):
+        image = image.convert('RGB')
+
+    # 비율 유지하며 리사이즈
+    image.thumbnail(size, Image.Resampling.LANCZOS)
+
+    # 바이트로 변환
+    output = io.BytesIO()
+    image.save(output, format='JPEG', quality=85)
+    output.seek(0)
+
+    return output.getvalue()
+
+
+def download_and_resize_image(image_url, size=(100, 100), timeout=10, session=None, cache=None, use_cache=True,
+                              max_bytes=DEFAULT_MAX_IMAGE_BYTES):
     """
     URL에서 이미지 다운로드 후 리사이즈
+    - (URL, 크기) 기준 캐시 사용: TTL 이내면 네트워크 없이 반환,
+      TTL 이 지났으면 ETag/Last-Modified 조건부 요청 (304면 저장된 썸네일 재사용)
+    - 실패한 URL 은 잠시 동안 다시 요청하지 않음
+    - 본문은 max_bytes 까지만 스트리밍으로 읽고, JPEG 은 목표 크기에 가까운 배율로 축소 디코딩
 
     Args:
         image_url: 이미지 URL
         size: 리사이즈할 크기 (width, height)
         timeout: 다운로드 타임아웃 (초)
+        session: 사용할 requests.Session (None이면 프로세스 공용 세션)
+        cache: 사용할 ThumbnailCache (None이면 프로세스 공용 캐시)
+        use_cache: False면 캐시 없이 항상 다운로드
+        max_bytes: 원본 이미지 최대 바이트 수 (넘으면 None)
 
     Returns:
         bytes: 리사이즈된 이미지 바이트 또는 None
@@ -22,35 +151,158 @@ def download_and_resize_image(image_url, size=(100, 100), timeout=10):
     if not image_url or not str(image_url).startswith('http'):
         return None
 
-    try:
-        # 이미지 다운로드
-        response = requests.get(image_url, timeout=timeout, stream=True)
-        response.raise_for_status()
-
-        # PIL Image로 변환
-        image = Image.open(io.BytesIO(response.content))
-
-        # RGBA 모드면 RGB로 변환 (JPEG 저장을 위해)
-        if image.mode in ('RGBA', 'P'):
-            image = image.convert('RGB')
-
-        # 비율 유지하며 리사이즈
-        image.thumbnail(size, Image.Resampling.LANCZOS)
-
-        # 바이트로 변환
-        output = io.BytesIO()
-        image.save(output, format='JPEG', quality=85)
-        output.seek(0)
+    if session is None:
+        session = get_http_session()
+
+    cached = None
+    headers = {}
+    if use_cache:
+        if cache is None:
+            cache = get_thumbnail_cache()
+        cached = cache.get(image_url, size)
+        if cached is not None:
+            if cached.fresh:
+                return cached.data
+            if cached.etag:
+                headers['If-None-Match'] = cached.etag
+            if cached.last_modified:
+                headers['If-Modified-Since'] = cached.last_modified
+    else:
+        cache = None
 
-        return output.getvalue()
+    try:
+        # 이미지 다운로드 (공용 세션의 연결 재사용)
+        response = session.get(image_url, timeout=timeout, stream=True, headers=headers)
+
+        if response.status_code == 304 and cached is not None:
+            # 변경 없음 - 저장된 썸네일 재사용
+            response.close()
+            return cache.mark_revalidated(image_url, size)
+
+        try:
+            response.raise_for_status()
+            content = _read_limited(response, max_bytes)
+        finally:
+            response.close()
+
+        thumbnail = _make_thumbnail(content, size)
+        if cache is not None:
+            cache.put(
+                image_url, size, thumbnail,
+                etag=response.headers.get('ETag'),
+                last_modified=response.headers.get('Last-Modified')
+            )
+        return thumbnail
 
     except requests.exceptions.RequestException as e:
         print(f"이미지 다운로드 오류 ({image_url}): {str(e)}")
+        if cache is not None:
+            cache.mark_failed(image_url, size)
         return None
     except Exception as e:
         print(f"이미지 처리 오류 ({image_url}): {str(e)}")
+        if cache is not None:
+            cache.mark_failed(image_url, size)
+        return None
+
+
+def _fetch_thumbnail(image_url, size, timeout, per_host_limit, deadline_at):
+    """작업 스레드: 호스트별 제한 안에서 썸네일 1개 다운로드 (마감 시각이 지나면 None)"""
+    semaphore = _host_semaphore(image_url, per_host_limit)
+
+    remaining = deadline_at - time.monotonic()
+    if remaining <= 0 or not semaphore.acquire(timeout=remaining):
         return None
 
+    try:
+        remaining = deadline_at - time.monotonic()
+        if remaining <= 0:
+            return None
+        return download_and_resize_image(image_url, size=size, timeout=min(timeout, remaining))
+    finally:
+        semaphore.release()
+
+
+def iter_thumbnails(image_urls, size=(100, 100), timeout=10, max_workers=DEFAULT_MAX_WORKERS,
+                    per_host_limit=DEFAULT_PER_HOST_LIMIT, deadline=DEFAULT_DEADLINE):
+    """
+    여러 이미지 썸네일을 동시에 다운로드하며 끝나는 순서대로 반환
+    - 스레드 풀 크기만큼 동시에, 같은 호스트는 per_host_limit 개까지만 요청
+    - 전체 마감(deadline)이 지나면 남은 URL 은 None 으로 반환하고 종료
+
+    Args:
+        image_urls: 이미지 URL 목록 (중복은 한 번만 다운로드)
+        size: 리사이즈할 크기 (width, height)
+        timeout: 요청 1건 타임아웃 (초)
+        max_workers: 동시 다운로드 스레드 수
+        per_host_limit: 호스트별 동시 요청 수
+        deadline: 전체 마감 시간 (초)
+
+    Yields:
+        tuple: (URL, 이미지 바이트 또는 None)
+    """
+    urls = [url for url in dict.fromkeys(image_urls) if url and str(url).startswith('http')]
+    if not urls:
+        return
+
+    # 캐시에 있는 썸네일은 스레드 풀 없이 바로 반환
+    cache = get_thumbnail_cache()
+    remaining_urls = []
+    for url in urls:
+        cached = cache.get(url, size)
+        if cached is not None and cached.fresh:
+            yield url, cached.data
+        else:
+            remaining_urls.append(url)
+    urls = remaining_urls
+    if not urls:
+        return
+
+    deadline_at = time.monotonic() + deadline
+    get_http_session(max_workers)
+
+    executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='thumbnail')
+    try:
+        pending = {
+            executor.submit(_fetch_thumbnail, url, size, timeout, per_host_limit, deadline_at): url
+            for url in urls
+        }
+
+        while pending:
+            remaining = deadline_at - time.monotonic()
+            if remaining <= 0:
+                break
+
+            done, _ = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            for future in done:
+                url = pending.pop(future)
+                try:
+                    yield url, future.result()
+                except Exception as e:
+                    print(f"이미지 다운로드 오류 ({url}): {str(e)}")
+                    yield url, None
+
+        # 마감까지 끝나지 않은 URL
+        for url in pending.values():
+            yield url, None
+    finally:
+        # 아직 시작하지 않은 작업은 취소 (진행 중인 요청은 남은 타임아웃 안에 정리됨)
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def fetch_thumbnails(image_urls, size=(100, 100), timeout=10, max_workers=DEFAULT_MAX_WORKERS,
+                     per_host_limit=DEFAULT_PER_HOST_LIMIT, deadline=DEFAULT_DEADLINE):
+    """
+    여러 이미지 썸네일 일괄 다운로드 (iter_thumbnails 결과를 딕셔너리로)
+
+    Returns:
+        dict: {URL: 이미지 바이트 또는 None}
+    """
+    return dict(iter_thumbnails(
+        image_urls, size=size, timeout=timeout, max_workers=max_workers,
+        per_host_limit=per_host_limit, deadline=deadline
+    ))
+
 
 def get_image_base64(image_bytes):
     """
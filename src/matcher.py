@@ -1,10 +1,28 @@
 """
 상품명 유사도 매칭 모듈
 """
+from bisect import bisect_right
+from functools import lru_cache
+import sys
+
 from rapidfuzz import fuzz, process
+import numpy as np
 import pandas as pd
 import re
 
+from src.aho_corasick import AhoCorasick
+from src.ngram_index import NgramIndex, TabbedNgramIndex
+
+# batch_match_products 점수 행렬 청크 크기 기본값 (MB)
+DEFAULT_MEMORY_BUDGET_MB = 64
+
+# normalize_string 에서 남기는 문자 (한글, 영문 소문자, 숫자)
+_NORMALIZE_PATTERN = re.compile(r'[^a-z0-9가-힣]')
+_NORMALIZE_KEEP_RANGES = ((ord('a'), ord('z')), (ord('0'), ord('9')), (ord('가'), ord('힣')))
+
+# normalize_strings 에서 값들을 한 문자열로 이어 붙일 때 쓰는 구분자 (정규화 결과에 나올 수 없는 문자)
+_BATCH_SEPARATOR = '\x00'
+
 
 def normalize_string(text):
     """
@@ -32,11 +50,198 @@ def normalize_string(text):
     text = text.lower()
 
     # 특수문자 제거 (한글, 영문, 숫자만 유지)
-    text = re.sub(r'[^a-z0-9가-힣]', '', text)
+    text = _NORMALIZE_PATTERN.sub('', text)
 
     return text
 
 
+def _prepare_normalize_text(value):
+    """normalize_string 의 빈 값 처리 + 문자열 변환 (NaN/None/빈 값 → "")"""
+    if isinstance(value, str):
+        return value
+    if pd.isna(value) or not value:
+        return ""
+    return str(value)
+
+
+def normalize_strings(values):
+    """
+    여러 문자열 일괄 정규화 (값마다 normalize_string 을 호출한 것과 같은 결과)
+    - 전체 값을 구분자로 이어 붙여 소문자 변환을 한 번에 처리
+    - 코드 포인트 배열(numpy)에서 한글/영문 소문자/숫자/구분자만 남긴 뒤 다시 분리
+
+    Args:
+        values: pandas Series 또는 리스트
+
+    Returns:
+        Series 를 넘기면 같은 인덱스의 Series, 그 외에는 list
+    """
+    index = None
+    if isinstance(values, pd.Series):
+        index = values.index
+        values = values.tolist()
+    else:
+        values = list(values)
+
+    texts = [_prepare_normalize_text(value) for value in values]
+
+    joined = _BATCH_SEPARATOR.join(texts)
+    if not texts:
+        result = []
+    elif joined.count(_BATCH_SEPARATOR) != len(texts) - 1:
+        # 값 안에 구분자가 들어있으면 값별로 처리
+        result = [normalize_string(value) for value in values]
+    else:
+        # strip/줄바꿈 제거는 아래 문자 필터에 포함되므로 소문자 변환만 먼저 수행
+        code_points = np.frombuffer(joined.lower().encode('utf-32-le'), dtype=np.uint32)
+        keep = code_points == ord(_BATCH_SEPARATOR)
+        for low, high in _NORMALIZE_KEEP_RANGES:
+            keep |= (code_points >= low) & (code_points <= high)
+        result = code_points[keep].tobytes().decode('utf-32-le').split(_BATCH_SEPARATOR)
+
+    if index is not None:
+        return pd.Series(result, index=index, dtype=object)
+    return result
+
+
+def _find_product_column(columns):
+    """상품명 컬럼 찾기 (다양한 가능성 고려)"""
+    for col in columns:
+        if '상품명' in str(col) or '제품명' in str(col) or 'product' in str(col).lower():
+            return col
+    return None
+
+
+def _find_model_column(columns):
+    """모델명 컬럼 찾기"""
+    for col in columns:
+        if '모델명' in str(col) or 'model' in str(col).lower():
+            return col
+    return None
+
+
+@lru_cache(maxsize=1024)
+def _resolve_column(columns, target_names, use_similarity=False):
+    """
+    컬럼명 후보로 실제 컬럼 찾기 (헤더 조합별로 캐싱)
+    1단계: 정확한 매칭
+    2단계: 정규화 매칭
+    3단계: 95% 이상 유사도 매칭 (use_similarity=True일 때만)
+
+    Args:
+        columns: 컬럼명 tuple
+        target_names: 찾을 컬럼명 tuple
+        use_similarity: True면 3단계 매칭까지 사용
+
+    Returns:
+        tuple: (컬럼 또는 None, 매칭방식 str 또는 None)
+    """
+    # 1단계: 정확한 매칭
+    for col in columns:
+        if str(col) in target_names:
+            return col, "1단계:정확"
+
+    # 2단계: 정규화 완전 매칭
+    normalized_targets = [normalize_string(t) for t in target_names]
+    for col in columns:
+        normalized_col = normalize_string(str(col))
+        if normalized_col in normalized_targets:
+            return col, "2단계:정규화"
+
+    # 3단계: 95% 이상 유사도 매칭
+    if use_similarity:
+        for col in columns:
+            normalized_col = normalize_string(str(col))
+            for norm_target in normalized_targets:
+                if norm_target and normalized_col:
+                    similarity = fuzz.ratio(normalized_col, norm_target)
+                    if similarity >= 95:
+                        return col, f"3단계:유사도{int(similarity)}%"
+
+    return None, None
+
+
+class TabSchema:
+    """
+    탭 헤더 → 논리 필드별 실제 컬럼 매핑
+
+    헤더는 탭 안에서 바뀌지 않으므로 탭당 한 번만 계산한다.
+    (resolve_tab_schema 로 같은 헤더 조합은 재사용)
+
+    Attributes:
+        columns: {필드명: 컬럼} (자동 매칭 기준, 못 찾으면 None)
+        stages: {필드명: 매칭방식} ("1단계:정확", "2단계:정규화", "3단계:유사도NN%", "키워드", None)
+        exact_columns: {필드명: 컬럼} (find_matching_products 기준, 정확한 컬럼명만 사용)
+    """
+
+    # 필드명: 컬럼명 후보 (앞쪽 컬럼부터 확인)
+    FIELD_TARGETS = {
+        '공급가': ('공급가(V+) 배송비 포함', '공급가', '매출'),
+        '입고가계': ('입고가계', '매입'),
+        '운영사': ('운영사', '공급사', '업체'),
+        '대표 1': ('대표 1', '이미지', 'Image'),
+        '옵션': ('옵션', 'Option', '규격'),
+    }
+    # 3단계 유사도 매칭까지 사용하는 필드
+    SIMILARITY_FIELDS = ('공급가',)
+
+    def __init__(self, columns):
+        """
+        Args:
+            columns: 탭의 컬럼명 목록
+        """
+        columns = tuple(columns)
+        self.columns = {}
+        self.stages = {}
+
+        product_col = _find_product_column(columns)
+        self.columns['상품명'] = product_col
+        self.stages['상품명'] = "키워드" if product_col is not None else None
+
+        model_col = _find_model_column(columns)
+        self.columns['모델명'] = model_col
+        self.stages['모델명'] = "키워드" if model_col is not None else None
+
+        for field, targets in self.FIELD_TARGETS.items():
+            col, stage = _resolve_column(columns, targets, field in self.SIMILARITY_FIELDS)
+            self.columns[field] = col
+            self.stages[field] = stage
+
+        # find_matching_products 는 정확한 컬럼명만 사용 (옵션은 후보 순서대로)
+        self.exact_columns = {
+            '공급가': self.columns['공급가'],
+            '입고가계': '입고가계' if '입고가계' in columns else None,
+            '운영사': '운영사' if '운영사' in columns else None,
+            '대표 1': '대표 1' if '대표 1' in columns else None,
+            '옵션': next((c for c in self.FIELD_TARGETS['옵션'] if c in columns), None),
+        }
+
+    @property
+    def matching_log(self):
+        """auto_match_products 매칭로그 (공급가에 대해서만)"""
+        if self.stages['공급가']:
+            return {'매출(공급가)': self.stages['공급가']}
+        return {}
+
+
+@lru_cache(maxsize=256)
+def _cached_tab_schema(columns):
+    return TabSchema(columns)
+
+
+def resolve_tab_schema(columns):
+    """
+    헤더 조합별로 캐싱된 TabSchema 반환
+
+    Args:
+        columns: 탭의 컬럼명 목록 (df.columns)
+
+    Returns:
+        TabSchema
+    """
+    return _cached_tab_schema(tuple(columns))
+
+
 def find_column_value_with_similarity(df, row, target_names):
     """
     3단계 매칭으로 컬럼 값 찾기 (공급가 전용 헬퍼)
@@ -55,39 +260,436 @@ def find_column_value_with_similarity(df, row, target_names):
     if isinstance(target_names, str):
         target_names = [target_names]
 
-    # 1단계: 정확한 매칭
-    for col in df.columns:
-        if str(col) in target_names:
-            return str(row.get(col, ''))
+    col, _ = _resolve_column(tuple(df.columns), tuple(target_names), True)
+    if col is None:
+        return ''
+    return str(row.get(col, ''))
 
-    # 2단계: 정규화 완전 매칭
-    normalized_targets = [normalize_string(t) for t in target_names]
-    for col in df.columns:
-        normalized_col = normalize_string(str(col))
-        if normalized_col in normalized_targets:
-            return str(row.get(col, ''))
 
-    # 3단계: 95% 이상 유사도 매칭
-    for col in df.columns:
-        normalized_col = normalize_string(str(col))
-        for norm_target in normalized_targets:
-            if norm_target and normalized_col:
-                similarity = fuzz.ratio(normalized_col, norm_target)
-                if similarity >= 95:
-                    return str(row.get(col, ''))
+def _list_bytes(values):
+    """리스트와 원소(문자열/숫자)의 바이트 수"""
+    return sys.getsizeof(values) + sum(map(sys.getsizeof, values))
 
-    return ''
 
+class _TabRows:
+    """
+    탭 하나를 매칭용으로 펼쳐둔 행 데이터 (CatalogIndex 가 탭 단위로 재사용)
+
+    행 번호는 탭 안에서의 위치이며, CatalogIndex 가 탭 순서대로 이어 붙인다.
+    """
+
+    def __init__(self, tab_name, schema):
+        self.tab_name = tab_name
+        self.schema = schema
+        self.product_names = []
+        self.normalized_names = []
+        self.model_names = []
+        self.normalized_models = []
+        self.supply_prices = []
+        self.source_rows = []      # 원본 시트의 엑셀 행 번호 (헤더가 1행)
+        self.auto_fields = {field: [] for field in CatalogIndex.ROW_FIELDS}
+        self.fuzzy_fields = {field: [] for field in CatalogIndex.ROW_FIELDS}
+
+        # 상품명(strip) → 탭 안에서 첫 번째 행
+        self.exact_index = {}
+        self._model_automaton = None
+        self._ngram_index = None
+
+    def __len__(self):
+        return len(self.product_names)
+
+    @property
+    def model_automaton(self):
+        """정규화 모델명 → 탭 안의 첫 행 번호 Aho-Corasick 자동자 (최초 사용 시 생성)"""
+        if self._model_automaton is None:
+            self._model_automaton = AhoCorasick(
+                (model, row_id) for row_id, model in enumerate(self.normalized_models) if model
+            )
+        return self._model_automaton
+
+    @property
+    def ngram_index(self):
+        """탭 안의 행 번호 기준 n-gram 역색인 (최초 사용 시 생성)"""
+        if self._ngram_index is None:
+            self._ngram_index = NgramIndex(self.product_names, self.normalized_names)
+        return self._ngram_index
+
+    def memory_bytes(self):
+        """
+        탭 행 데이터가 보관하는 리스트/문자열/자동자의 추정 바이트 수
+        (필드끼리 같은 문자열 객체를 공유하면 중복으로 세므로 넉넉한 쪽으로 추정)
+        """
+        lists = [
+            self.product_names, self.normalized_names, self.model_names,
+            self.normalized_models, self.supply_prices, self.source_rows,
+            *self.auto_fields.values(), *self.fuzzy_fields.values(),
+        ]
+        size = sum(_list_bytes(values) for values in lists)
+        size += sys.getsizeof(self.auto_fields) + sys.getsizeof(self.fuzzy_fields)
+        # exact_index 키는 product_names 와 같은 문자열
+        size += sys.getsizeof(self.exact_index) + sum(map(sys.getsizeof, self.exact_index.values()))
+        if self._model_automaton is not None:
+            size += self._model_automaton.memory_bytes()
+        if self._ngram_index is not None:
+            size += self._ngram_index.memory_bytes()
+        return size
+
+
+def _build_tab_rows(tab_name, df):
+    """
+    탭 DataFrame → _TabRows (상품명 컬럼이 없거나 상품명이 모두 비어있으면 None)
+    """
+    columns = list(df.columns)
+    schema = resolve_tab_schema(columns)
+    product_col = schema.columns['상품명']
+    if product_col is None:
+        return None
+
+    # 컬럼별 object 변환 (문자 컬럼이 있는 탭에서는 iterrows() 와 같은 값 표현,
+    # 컬럼 일부만 읽은 탭에서도 같은 결과)
+    positions = {col: i for i, col in enumerate(columns)}
+    row_count = len(df)
+
+    def column_values(col):
+        return df.iloc[:, positions[col]].astype(object).tolist()
+
+    def column_strings(col, missing):
+        if col is None:
+            return [missing] * row_count
+        return [str(v) for v in column_values(col)]
+
+    raw_names = column_values(product_col)
+    keep = [
+        i for i, name in enumerate(raw_names)
+        if not pd.isna(name) and str(name).strip()
+    ]
+    if not keep:
+        return None
+
+    tab = _TabRows(tab_name, schema)
+
+    # 상품명/모델명 정규화는 탭마다 한 번에 처리
+    names = [str(raw_names[i]).strip() for i in keep]
+    model_strings = column_strings(schema.columns['모델명'], '')
+    normalized_names = normalize_strings(names)
+    normalized_models = normalize_strings(model_strings[i] for i in keep)
+
+    supply_strings = column_strings(schema.columns['공급가'], '')
+    auto_strings = {field: column_strings(schema.columns[field], '') for field in CatalogIndex.ROW_FIELDS}
+    fuzzy_strings = {field: column_strings(schema.exact_columns[field], '') for field in CatalogIndex.ROW_FIELDS}
+
+    for row_id, i in enumerate(keep):
+        name = names[row_id]
+
+        tab.exact_index.setdefault(name, row_id)
+        tab.product_names.append(name)
+        tab.normalized_names.append(normalized_names[row_id])
+        tab.model_names.append(model_strings[i])
+        tab.normalized_models.append(normalized_models[row_id])
+        tab.supply_prices.append(supply_strings[i])
+        tab.source_rows.append(i + 2)
+        for field, strings in auto_strings.items():
+            tab.auto_fields[field].append(strings[i])
+        for field, strings in fuzzy_strings.items():
+            tab.fuzzy_fields[field].append(strings[i])
+
+    return tab
+
+
+class CatalogIndex:
+    """
+    엑셀 상품 데이터를 매칭용으로 한 번만 펼쳐둔 인덱스
+
+    업로드된 워크북({탭명: DataFrame})마다 한 번 생성해서
+    find_matching_products / auto_match_products 에 그대로 넘긴다.
+    상품명이 비어있는 행과 상품명 컬럼이 없는 탭은 미리 제외되며,
+    행 순서는 탭 순서 → 탭 내 행 순서(워크북 순서)를 그대로 따른다.
+
+    탭별 행 데이터(_TabRows)를 따로 보관하므로 refresh_tabs() 로
+    바뀐 탭만 다시 펼쳐서 갱신할 수 있다.
+    """
 
-def find_matching_products(order_product_name, excel_products, top_n=5, threshold=60):
+    # 행별로 값을 보관하는 필드 (공급가는 두 매처가 같은 컬럼 사용)
+    ROW_FIELDS = ['입고가계', '운영사', '대표 1', '옵션']
+
+    def __init__(self, excel_products):
+        """
+        Args:
+            excel_products: 엑셀 데이터 딕셔너리 {탭명: DataFrame}
+        """
+        # 입력 탭 순서대로 {탭명: _TabRows 또는 None(매칭할 행 없음)}
+        self._tabs = {tab_name: _build_tab_rows(tab_name, df) for tab_name, df in excel_products.items()}
+
+        # 원본 워크북 시트 지문 (증분 갱신용, 로더가 설정)
+        self.fingerprints = None
+
+        self._assemble()
+
+    def __len__(self):
+        return len(self.product_names)
+
+    @staticmethod
+    def _row_lists(rows):
+        """행 단위 리스트 목록 (CatalogIndex 평탄화 배열과 _TabRows 행 데이터가 같은 순서)"""
+        return [
+            rows.product_names, rows.normalized_names, rows.model_names,
+            rows.normalized_models, rows.supply_prices, rows.source_rows,
+            *(rows.auto_fields[field] for field in CatalogIndex.ROW_FIELDS),
+            *(rows.fuzzy_fields[field] for field in CatalogIndex.ROW_FIELDS),
+        ]
+
+    def _assemble(self, previous=None):
+        """
+        탭별 행 데이터를 탭 순서대로 이어 붙여 평탄화 배열 생성
+
+        previous (이전 탭 구간 목록)가 있으면 앞뒤로 그대로인 탭 구간은 두고
+        바뀐 구간만 평탄화 배열에 다시 끼워 넣는다 (바뀐 탭 행 수에 비례,
+        뒤쪽 구간은 리스트 슬라이스 대입으로 한 번에 밀림).
+
+        Args:
+            previous: 갱신 전 탭 구간(_TabRows) 목록 (None이면 처음부터 생성)
+        """
+        segments = [tab for tab in self._tabs.values() if tab is not None]
+
+        if previous is None:
+            previous = []
+            # 행 단위 평탄화 배열 (모두 같은 길이)
+            self.product_names = []
+            self.normalized_names = []
+            self.model_names = []
+            self.normalized_models = []
+            self.supply_prices = []
+            self.source_rows = []      # 원본 시트의 엑셀 행 번호 (내장 이미지 위치 조회용)
+            self.auto_fields = {field: [] for field in self.ROW_FIELDS}
+            self.fuzzy_fields = {field: [] for field in self.ROW_FIELDS}
+            self._offsets = []
+
+        # 앞뒤로 같은 탭 구간 수
+        limit = min(len(previous), len(segments))
+        prefix = 0
+        while prefix < limit and previous[prefix] is segments[prefix]:
+            prefix += 1
+        suffix = 0
+        while suffix < limit - prefix and previous[-1 - suffix] is segments[-1 - suffix]:
+            suffix += 1
+
+        # 바뀐 구간의 기존 행 범위 [start, end) 를 새 탭 행으로 교체
+        bounds = self._offsets + [len(self.product_names)]
+        start = bounds[prefix]
+        end = bounds[len(previous) - suffix]
+        changed = [self._row_lists(tab) for tab in segments[prefix:len(segments) - suffix]]
+        for i, values in enumerate(self._row_lists(self)):
+            values[start:end] = [value for rows in changed for value in rows[i]]
+
+        self._segments = segments
+        self.tab_names = [tab.tab_name for tab in segments]
+        self.schemas = [tab.schema for tab in segments]   # 탭별 TabSchema
+        self._offsets = []
+        offset = 0
+        for tab in segments:
+            self._offsets.append(offset)
+            offset += len(tab)
+
+        # 탭별 역색인을 이어 붙이는 전체 역색인은 다음 사용 시 다시 구성
+        # (탭별 역색인은 _TabRows 에 남아 있어 바뀐 탭만 새로 생성)
+        self._ngram_index = None
+
+    def copy(self):
+        """
+        탭별 행 데이터를 공유하는 복사본 (공유 중인 인덱스를 갱신할 때 원본 보호용)
+
+        Returns:
+            CatalogIndex
+        """
+        clone = CatalogIndex.__new__(CatalogIndex)
+        clone.__dict__.update(self.__dict__)
+        clone._tabs = dict(self._tabs)
+        clone._segments = list(self._segments)
+        clone._offsets = list(self._offsets)
+        clone.product_names = list(self.product_names)
+        clone.normalized_names = list(self.normalized_names)
+        clone.model_names = list(self.model_names)
+        clone.normalized_models = list(self.normalized_models)
+        clone.supply_prices = list(self.supply_prices)
+        clone.source_rows = list(self.source_rows)
+        clone.auto_fields = {field: list(values) for field, values in self.auto_fields.items()}
+        clone.fuzzy_fields = {field: list(values) for field, values in self.fuzzy_fields.items()}
+        return clone
+
+    def refresh_tabs(self, excel_products, changed_tabs):
+        """
+        바뀐 탭만 다시 펼쳐서 인덱스를 제자리 갱신
+        - changed_tabs 와 새로 생긴 탭만 다시 변환/정규화 (나머지 탭은 기존 행 데이터 재사용)
+        - 평탄화 배열은 바뀐 탭 구간만 다시 채움 (탭 시작 위치는 탭 수에 비례해 재계산)
+        - excel_products 에 없는 기존 탭은 삭제, 탭 순서는 excel_products 를 따름
+
+        Args:
+            excel_products: 갱신 후 전체 엑셀 데이터 딕셔너리 {탭명: DataFrame}
+            changed_tabs: 내용이 바뀐 탭 이름 목록
+
+        Returns:
+            dict: {'added': [탭명], 'updated': [탭명], 'removed': [탭명]}
+        """
+        changed = set(changed_tabs)
+        previous = self._tabs
+        report = {'added': [], 'updated': [], 'removed': []}
+
+        tabs = {}
+        for tab_name, df in excel_products.items():
+            if tab_name not in previous:
+                tabs[tab_name] = _build_tab_rows(tab_name, df)
+                report['added'].append(tab_name)
+            elif tab_name in changed:
+                tabs[tab_name] = _build_tab_rows(tab_name, df)
+                report['updated'].append(tab_name)
+            else:
+                tabs[tab_name] = previous[tab_name]
+
+        report['removed'] = [tab_name for tab_name in previous if tab_name not in tabs]
+
+        self._tabs = tabs
+        self._assemble(self._segments)
+        return report
+
+    def exact_row(self, name):
+        """
+        상품명(strip)이 같은 워크북 순서상 첫 행 번호 (100%일치 단계용)
+
+        탭 순서대로 탭별 해시를 확인하므로 처음 걸린 탭의 첫 행이 전체에서도 첫 행이다.
+
+        Args:
+            name: strip 된 상품명
+
+        Returns:
+            int or None: 행 번호
+        """
+        for offset, tab in zip(self._offsets, self._segments):
+            row_id = tab.exact_index.get(name)
+            if row_id is not None:
+                return offset + row_id
+        return None
+
+    def _tab_position(self, row_id):
+        """행이 속한 탭 위치 (tab_names 인덱스)"""
+        return bisect_right(self._offsets, row_id) - 1
+
+    def first_model_row(self, normalized_text):
+        """
+        정규화 문자열에 포함된 정규화 모델명 중 워크북 순서상 첫 행 번호
+
+        탭 순서대로 탭별 자동자를 확인하므로 처음 걸린 탭의 첫 행이 전체에서도 첫 행이다.
+
+        Args:
+            normalized_text: normalize_string() 결과
+
+        Returns:
+            int or None: 행 번호
+        """
+        for offset, tab in zip(self._offsets, self._segments):
+            row_id = tab.model_automaton.find_first(normalized_text)
+            if row_id is not None:
+                return offset + row_id
+        return None
+
+    def build_lazy_indexes(self):
+        """최초 사용 시 생성하는 n-gram 역색인과 탭별 모델명 자동자를 미리 생성"""
+        self.ngram_index
+        for tab in self._tabs.values():
+            if tab is not None:
+                tab.model_automaton
+
+    def memory_bytes(self):
+        """
+        인덱스가 보관하는 모든 구조의 추정 바이트 수
+        (탭별 행 데이터, 평탄화 배열, 행별 필드, n-gram 역색인, 탭별 모델명 자동자)
+
+        지연 생성 구조는 이미 만들어진 것만 포함된다.
+        """
+        # 평탄화 배열은 탭별 행 데이터의 문자열을 참조만 하므로 리스트 크기만
+        flat = [
+            self.tab_names, self.schemas, self._offsets, self._segments,
+            self.product_names, self.normalized_names, self.model_names,
+            self.normalized_models, self.supply_prices, self.source_rows,
+            self.auto_fields, self.fuzzy_fields,
+            *self.auto_fields.values(), *self.fuzzy_fields.values(),
+        ]
+        size = sum(sys.getsizeof(values) for values in flat)
+
+        # 탭별 n-gram 역색인/자동자는 _TabRows 쪽에서 계산
+        size += sum(tab.memory_bytes() for tab in self._tabs.values() if tab is not None)
+        return size
+
+    @property
+    def ngram_index(self):
+        """유사도 후보 사전 필터용 n-gram 역색인 (최초 사용 시 탭별 역색인을 이어 붙여 구성)"""
+        if self._ngram_index is None:
+            self._ngram_index = TabbedNgramIndex(
+                (offset, tab.ngram_index) for offset, tab in zip(self._offsets, self._segments)
+            )
+        return self._ngram_index
+
+    def fuzzy_match_info(self, row_id, similarity):
+        """find_matching_products 결과 형식의 매칭 정보"""
+        return {
+            '탭': self.tab_names[self._tab_position(row_id)],
+            '상품명': self.product_names[row_id],
+            '유사도': round(similarity, 1),
+            '입고가계': self.fuzzy_fields['입고가계'][row_id],
+            '공급가(V+) 배송비 포함': self.supply_prices[row_id],
+            '운영사': self.fuzzy_fields['운영사'][row_id],
+            '대표 1': self.fuzzy_fields['대표 1'][row_id],
+            '옵션': self.fuzzy_fields['옵션'][row_id],
+            '행번호': self.source_rows[row_id]
+        }
+
+    def auto_match_info(self, row_id):
+        """auto_match_products 결과 형식의 매칭 정보"""
+        # 매칭 로그 생성 (공급가에 대해서만)
+        matching_log = self.schemas[self._tab_position(row_id)].matching_log
+
+        return {
+            '탭': self.tab_names[self._tab_position(row_id)],
+            '상품명': self.product_names[row_id],
+            '유사도': 100.0,
+            '입고가계': self.auto_fields['입고가계'][row_id],
+            '공급가(V+) 배송비 포함': self.supply_prices[row_id],
+            '운영사': self.auto_fields['운영사'][row_id],
+            '대표 1': self.auto_fields['대표 1'][row_id],
+            '모델명': self.model_names[row_id],
+            '옵션': self.auto_fields['옵션'][row_id],
+            '매칭로그': matching_log,
+            '행번호': self.source_rows[row_id]
+        }
+
+
+def build_catalog_index(excel_products):
+    """
+    매칭용 CatalogIndex 생성 (이미 CatalogIndex면 그대로 반환)
+
+    Args:
+        excel_products: 엑셀 데이터 딕셔너리 {탭명: DataFrame} 또는 CatalogIndex
+
+    Returns:
+        CatalogIndex
+    """
+    if isinstance(excel_products, CatalogIndex):
+        return excel_products
+    return CatalogIndex(excel_products)
+
+
+def find_matching_products(order_product_name, excel_products, top_n=5, threshold=60, prefilter='exact'):
     """
     주문 상품명과 유사한 상품을 엑셀 데이터에서 찾기
 
     Args:
         order_product_name: 주문서의 상품명
-        excel_products: 엑셀 데이터 딕셔너리 {탭명: DataFrame}
+        excel_products: CatalogIndex 또는 엑셀 데이터 딕셔너리 {탭명: DataFrame}
         top_n: 반환할 상위 매칭 개수
         threshold: 최소 유사도 점수 (0-100)
+        prefilter: n-gram 후보 필터 모드
+            'exact': 손실 없음 (전체 계산과 결과 동일)
+            'approximate': bigram 개수 필터 (더 빠르지만 일부 누락 가능)
+            None: 필터 없이 전체 상품 계산
 
     Returns:
         list: 매칭된 상품 리스트
@@ -99,7 +701,8 @@ def find_matching_products(order_product_name, excel_products, top_n=5, threshol
                     '입고가계': '50000',
                     '공급가(V+) 배송비 포함': '75000',
                     '운영사': 'ABC상사',
-                    '대표 1': 'http://...'
+                    '대표 1': 'http://...',
+                    '행번호': 12   # 원본 시트의 엑셀 행 번호
                 },
                 ...
             ]
@@ -111,57 +714,27 @@ def find_matching_products(order_product_name, excel_products, top_n=5, threshol
     if not order_product_name:
         return []
 
+    catalog = build_catalog_index(excel_products)
     matches = []
 
-    # 각 탭별로 상품명 검색
-    for tab_name, df in excel_products.items():
-        # 상품명 컬럼 찾기 (다양한 가능성 고려)
-        product_col = None
-        for col in df.columns:
-            if '상품명' in str(col) or '제품명' in str(col) or 'product' in str(col).lower():
-                product_col = col
-                break
-
-        if product_col is None:
-            continue
-
-        # 각 상품과 유사도 비교
-        for idx, row in df.iterrows():
-            excel_product_name = row.get(product_col, '')
-
-            if pd.isna(excel_product_name) or not str(excel_product_name).strip():
-                continue
-
-            excel_product_name = str(excel_product_name).strip()
-
-            # 유사도 계산 (token_set_ratio: 단어 순서 무관)
-            similarity = fuzz.token_set_ratio(order_product_name, excel_product_name)
-
-            # threshold 이상만 추가
-            if similarity >= threshold:
-                # 공급가 3단계 매칭으로 찾기
-                supply_price = find_column_value_with_similarity(
-                    df, row, ['공급가(V+) 배송비 포함', '공급가', '매출']
-                )
-
-                # 옵션 값 찾기 (여러 가능한 컬럼명 시도)
-                option_value = ''
-                for opt_col in ['옵션', 'Option', '규격']:
-                    if opt_col in df.columns:
-                        option_value = str(row.get(opt_col, ''))
-                        break
-
-                match_info = {
-                    '탭': tab_name,
-                    '상품명': excel_product_name,
-                    '유사도': round(similarity, 1),
-                    '입고가계': str(row.get('입고가계', '')),
-                    '공급가(V+) 배송비 포함': supply_price,
-                    '운영사': str(row.get('운영사', '')),
-                    '대표 1': str(row.get('대표 1', '')),
-                    '옵션': option_value
-                }
-                matches.append(match_info)
+    # 후보 상품만 추리기 (워크북 순서 유지)
+    if prefilter:
+        candidates = catalog.ngram_index.candidates(
+            order_product_name, normalize_string(order_product_name), threshold, mode=prefilter
+        ).tolist()
+    else:
+        candidates = range(len(catalog))
+
+    # 각 후보와 유사도 비교
+    for row_id in candidates:
+        excel_product_name = catalog.product_names[row_id]
+
+        # 유사도 계산 (token_set_ratio: 단어 순서 무관)
+        similarity = fuzz.token_set_ratio(order_product_name, excel_product_name)
+
+        # threshold 이상만 추가
+        if similarity >= threshold:
+            matches.append(catalog.fuzzy_match_info(row_id, similarity))
 
     # 유사도 순으로 정렬
     matches.sort(key=lambda x: x['유사도'], reverse=True)
@@ -170,25 +743,85 @@ def find_matching_products(order_product_name, excel_products, top_n=5, threshol
     return matches[:top_n]
 
 
-def batch_match_products(orders_df, excel_products, top_n=5, threshold=60):
+def _order_name(value):
+    """주문 상품명 정리 (비어있으면 None)"""
+    if not value or pd.isna(value):
+        return None
+    value = str(value).strip()
+    return value or None
+
+
+def _top_matches(scores, row_offset, threshold, top_n):
+    """
+    한 주문의 점수 벡터에서 threshold 이상인 상위 후보 추출
+
+    find_matching_products 와 같은 순위(반올림 유사도 내림차순, 동점은 워크북 순서)를
+    유지하기 위해 반올림 경계를 고려해 약간 넉넉히 뽑은 뒤 정렬한다.
+
+    Returns:
+        list: [(유사도, 행 번호), ...]
+    """
+    cols = np.flatnonzero(scores >= threshold)
+    if len(cols) > top_n:
+        kth = np.partition(scores[cols], len(cols) - top_n)[len(cols) - top_n]
+        cols = cols[scores[cols] >= kth - 0.1]
+    return [(float(scores[c]), row_offset + int(c)) for c in cols]
+
+
+def batch_match_products(orders_df, excel_products, top_n=5, threshold=60,
+                         memory_budget_mb=DEFAULT_MEMORY_BUDGET_MB):
     """
     여러 주문을 일괄 매칭
+    - 주문 전체 × 상품 전체 유사도를 rapidfuzz.process.cdist 로 한 번에 계산
+    - 상품 수가 많으면 점수 행렬이 memory_budget_mb 를 넘지 않도록 상품을 나눠 계산
+    - 결과는 주문별 find_matching_products 호출과 동일
 
     Args:
         orders_df: 주문 데이터프레임 (상품명 컬럼 필수)
-        excel_products: 엑셀 데이터 딕셔너리
+        excel_products: CatalogIndex 또는 엑셀 데이터 딕셔너리
         top_n: 상품별 반환할 매칭 개수
         threshold: 최소 유사도 점수
+        memory_budget_mb: 점수 행렬 청크 하나의 최대 크기 (MB)
 
     Returns:
         dict: {주문_인덱스: [매칭_리스트]}
     """
-    results = {}
+    catalog = build_catalog_index(excel_products)
+
+    # 같은 상품명은 한 번만 계산
+    order_names = {idx: _order_name(row.get('상품명', '')) for idx, row in orders_df.iterrows()}
+    queries = list(dict.fromkeys(name for name in order_names.values() if name))
+
+    candidates = {name: [] for name in queries}
+    choices = catalog.product_names
+
+    if queries and choices:
+        # float64 점수 행렬 (스칼라 token_set_ratio 와 같은 값/반올림 유지)
+        chunk_size = max(1, int(memory_budget_mb * 1024 * 1024) // (8 * len(queries)))
+
+        for start in range(0, len(choices), chunk_size):
+            chunk = choices[start:start + chunk_size]
+            scores = process.cdist(
+                queries,
+                chunk,
+                scorer=fuzz.token_set_ratio,
+                score_cutoff=threshold,
+                dtype=np.float64,
+                workers=-1
+            )
+            for q, name in enumerate(queries):
+                candidates[name].extend(_top_matches(scores[q], start, threshold, top_n))
+
+    best = {}
+    for name, found in candidates.items():
+        # 유사도 순으로 정렬 (동점은 워크북 순서)
+        found = [(round(score, 1), row_id) for score, row_id in found]
+        found.sort(key=lambda x: (-x[0], x[1]))
+        best[name] = [catalog.fuzzy_match_info(row_id, score) for score, row_id in found[:top_n]]
 
-    for idx, row in orders_df.iterrows():
-        order_product_name = row.get('상품명', '')
-        matches = find_matching_products(order_product_name, excel_products, top_n, threshold)
-        results[idx] = matches
+    results = {}
+    for idx, name in order_names.items():
+        results[idx] = [dict(match) for match in best[name]] if name else []
 
     return results
 
@@ -199,7 +832,7 @@ def get_best_match(order_product_name, excel_products, threshold=80):
 
     Args:
         order_product_name: 주문 상품명
-        excel_products: 엑셀 데이터 딕셔너리
+        excel_products: CatalogIndex 또는 엑셀 데이터 딕셔너리
         threshold: 최소 유사도 점수 (높게 설정)
 
     Returns:
@@ -220,7 +853,7 @@ def auto_match_products(order_product_name, excel_products):
 
     Args:
         order_product_name: 주문 상품명
-        excel_products: 엑셀 데이터 딕셔너리
+        excel_products: CatalogIndex 또는 엑셀 데이터 딕셔너리
 
     Returns:
         tuple: (매칭된 상품 정보 dict or None, 매칭 방식 str)
@@ -233,119 +866,23 @@ def auto_match_products(order_product_name, excel_products):
     if not order_product_name:
         return None, None
 
+    catalog = build_catalog_index(excel_products)
+
     # 시트 상품명 정규화
     normalized_order = normalize_string(order_product_name)
 
-    # 각 탭별로 검색
-    for tab_name, df in excel_products.items():
-        # 상품명 컬럼 찾기
-        product_col = None
-        for col in df.columns:
-            if '상품명' in str(col) or '제품명' in str(col) or 'product' in str(col).lower():
-                product_col = col
-                break
-
-        if product_col is None:
-            continue
-
-        # 모델명 컬럼 찾기
-        model_col = None
-        for col in df.columns:
-            if '모델명' in str(col) or 'model' in str(col).lower():
-                model_col = col
-                break
-        
-        # 컬럼 값 가져오기 헬퍼 함수
-        def get_col_value(row, target_names, use_similarity=False):
-            """
-            컬럼 값 가져오기
-            Args:
-                row: DataFrame row
-                target_names: 찾을 컬럼명 리스트
-                use_similarity: True면 3단계 매칭 사용 (공급가 전용)
-            Returns:
-                use_similarity=True: (값, 매칭방식) 튜플
-                use_similarity=False: 값만 반환
-            """
-            if isinstance(target_names, str):
-                target_names = [target_names]
-
-            # 1단계: 정확한 매칭
-            for col in df.columns:
-                if str(col) in target_names:
-                    if use_similarity:
-                        return str(row.get(col, '')), "1단계:정확"
-                    return str(row.get(col, ''))
-
-            # 2단계: 정규화 완전 매칭
-            normalized_targets = [normalize_string(t) for t in target_names]
-            for col in df.columns:
-                normalized_col = normalize_string(str(col))
-                if normalized_col in normalized_targets:
-                    if use_similarity:
-                        return str(row.get(col, '')), "2단계:정규화"
-                    return str(row.get(col, ''))
-
-            # 3단계: 95% 이상 유사도 매칭 (use_similarity=True일 때만)
-            if use_similarity:
-                for col in df.columns:
-                    normalized_col = normalize_string(str(col))
-                    for norm_target in normalized_targets:
-                        if norm_target and normalized_col:
-                            similarity = fuzz.ratio(normalized_col, norm_target)
-                            if similarity >= 95:
-                                return str(row.get(col, '')), f"3단계:유사도{int(similarity)}%"
-                return '', None
-
-            return ''
-
-        # 각 상품 확인
-        for idx, row in df.iterrows():
-            excel_product_name = row.get(product_col, '')
-
-            if pd.isna(excel_product_name) or not str(excel_product_name).strip():
-                continue
-
-            excel_product_name = str(excel_product_name).strip()
-
-            # 데이터 추출
-            # 공급가만 3단계 매칭 사용, 나머지는 일반 매칭
-            supply_price, supply_log = get_col_value(row, ['공급가(V+) 배송비 포함', '공급가', '매출'], use_similarity=True)
-            purchase_price = get_col_value(row, ['입고가계', '매입'])
-            vendor = get_col_value(row, ['운영사', '공급사', '업체'])
-            image_url = get_col_value(row, ['대표 1', '이미지', 'Image'])
-            option = get_col_value(row, ['옵션', 'Option', '규격'])
-            model_name = str(row.get(model_col, '')) if model_col else ''
-
-            # 매칭 로그 생성 (공급가에 대해서만)
-            matching_log = {}
-            if supply_log:
-                matching_log['매출(공급가)'] = supply_log
-
-            match_info = {
-                '탭': tab_name,
-                '상품명': excel_product_name,
-                '유사도': 100.0,
-                '입고가계': purchase_price,
-                '공급가(V+) 배송비 포함': supply_price,
-                '운영사': vendor,
-                '대표 1': image_url,
-                '모델명': model_name,
-                '옵션': option,
-                '매칭로그': matching_log
-            }
-
-            # 1. 상품명 100% 일치 확인
-            if order_product_name == excel_product_name:
-                return match_info, "100%일치"
-
-            # 2. 모델명 100% 포함 확인
-            if model_col:
-                if not pd.isna(model_name) and str(model_name).strip():
-                    normalized_model = normalize_string(str(model_name).strip())
-
-                    # 정규화된 모델명이 정규화된 시트 상품명에 100% 포함되는지 확인
-                    if normalized_model and normalized_model in normalized_order:
-                        return match_info, "모델명100%일치"
+    # 1. 상품명 100% 일치 확인 (해시 조회)
+    exact_row = catalog.exact_row(order_product_name)
+
+    # 2. 모델명 100% 포함 확인
+    # 정규화된 시트 상품명에 포함된 정규화 모델명 중 워크북 순서상 첫 행
+    model_row = catalog.first_model_row(normalized_order)
+
+    # 같은 행이면 상품명 일치를 먼저 확인하므로 일치 행보다 앞설 때만 모델명 매칭
+    if model_row is not None and (exact_row is None or model_row < exact_row):
+        return catalog.auto_match_info(model_row), "모델명100%일치"
+
+    if exact_row is not None:
+        return catalog.auto_match_info(exact_row), "100%일치"
 
     return None, None
@@ -0,0 +1,232 @@
+"""
+문자 n-gram 역색인 모듈
+- 유사도(token_set_ratio) 계산 전에 후보 상품을 걸러내는 사전 필터
+- exact: 손실 없는 필터 (문자 단위 상한 계산)
+- approximate: 정규화 상품명 bigram 개수 필터 (더 빠르지만 일부 누락 가능)
+- TabbedNgramIndex: 탭별 역색인을 이어 붙여 바뀐 탭만 다시 생성
+"""
+import re
+import sys
+from collections import Counter
+from itertools import chain
+
+import numpy as np
+
+
+PREFILTER_MODES = ('exact', 'approximate')
+
+
+# rapidfuzz token_set_ratio 의 토큰 구분 문자는 문자열 저장 방식에 따라 다름
+# - 모든 문자가 U+00FF 이하 (1바이트 저장): \x85, \xa0 은 구분 문자가 아님
+# - 그보다 큰 문자가 있으면 (한글 등): str.split() 과 같음
+_LATIN1_SEPARATORS = re.compile('[\t\n\x0b\x0c\r\x1c-\x1f ]+')
+
+
+def _token_set(text):
+    """token_set_ratio 와 동일한 토큰 분리 (rapidfuzz 공백 문자 기준, 중복 제거)"""
+    if text and max(text) > '\xff':
+        return set(text.split())
+    return {token for token in _LATIN1_SEPARATORS.split(text) if token}
+
+
+def _ngrams(text, n):
+    """문자 n-gram 목록 (길이가 n 미만이면 빈 리스트)"""
+    return [text[i:i + n] for i in range(len(text) - n + 1)]
+
+
+def _build_postings(counters):
+    """{키: Counter} 목록 → {키: (행 번호 배열, 개수 배열)} 역색인"""
+    rows = {}
+    counts = {}
+    for row_id, counter in enumerate(counters):
+        for key, count in counter.items():
+            rows.setdefault(key, []).append(row_id)
+            counts.setdefault(key, []).append(count)
+    return {
+        key: (np.array(rows[key], dtype=np.int64), np.array(counts[key], dtype=np.int32))
+        for key in rows
+    }
+
+
+def _postings_bytes(postings):
+    """역색인 딕셔너리 추정 바이트 수 (키 문자열 + 값 배열, 배열은 데이터 버퍼 포함)"""
+    size = sys.getsizeof(postings) + sum(map(sys.getsizeof, postings))
+    values = postings.values()
+    if values and isinstance(next(iter(values)), tuple):
+        size += sum(map(sys.getsizeof, values))
+        values = chain.from_iterable(values)
+    return size + sum(map(sys.getsizeof, values))
+
+
+class NgramIndex:
+    """
+    상품명 역색인 기반 후보 필터
+
+    exact 모드 (손실 없음):
+        공유 토큰이 없는 두 문자열의 token_set_ratio 는
+        ratio(토큰 정렬 결합 a, 토큰 정렬 결합 b) = 200 * LCS / (La + Lb) 이고,
+        LCS 는 (공유 문자 수 + 공백 수 최솟값) 이하이다.
+        따라서 공유 토큰이 있는 행 + 문자 단위(1-gram) 상한이 threshold 이상인 행만
+        점수를 계산해도 결과가 전체 계산과 같다.
+
+    approximate 모드:
+        정규화 상품명의 bigram 을 q-gram 개수 필터로 사용한다.
+        threshold 로 최소 공유 bigram 수를 계산하며, 토큰 순서/부분집합 일치처럼
+        token_set_ratio 가 정규화 문자열 비교보다 높게 나오는 경우는 누락될 수 있다.
+    """
+
+    def __init__(self, product_names, normalized_names, n=2):
+        """
+        Args:
+            product_names: 상품명 리스트 (strip 된 원본, CatalogIndex.product_names)
+            normalized_names: 정규화 상품명 리스트 (CatalogIndex.normalized_names)
+            n: approximate 모드 n-gram 길이
+        """
+        self.n = n
+        self.size = len(product_names)
+
+        # exact 모드: 토큰 역색인 + 문자 역색인
+        token_rows = {}
+        char_counters = []
+        joined_lengths = []
+        token_counts = []
+        for row_id, name in enumerate(product_names):
+            tokens = _token_set(name)
+            for token in tokens:
+                token_rows.setdefault(token, []).append(row_id)
+            char_counters.append(Counter(''.join(tokens)))
+            joined_lengths.append(sum(len(t) for t in tokens) + max(len(tokens) - 1, 0))
+            token_counts.append(len(tokens))
+
+        self._token_postings = {t: np.array(r, dtype=np.int64) for t, r in token_rows.items()}
+        self._char_postings = _build_postings(char_counters)
+        self._joined_lengths = np.array(joined_lengths, dtype=np.int64)
+        self._token_counts = np.array(token_counts, dtype=np.int64)
+
+        # approximate 모드: 정규화 상품명 n-gram 역색인
+        self._gram_postings = _build_postings(Counter(_ngrams(name, n)) for name in normalized_names)
+        self._normalized_lengths = np.array([len(name) for name in normalized_names], dtype=np.int64)
+
+    def memory_bytes(self):
+        """역색인과 행별 길이 배열의 추정 바이트 수"""
+        size = _postings_bytes(self._token_postings)
+        size += _postings_bytes(self._char_postings)
+        size += _postings_bytes(self._gram_postings)
+        for values in (self._joined_lengths, self._token_counts, self._normalized_lengths):
+            size += sys.getsizeof(values)
+        return size
+
+    def candidates(self, query, normalized_query, threshold, mode='exact'):
+        """
+        threshold 이상 점수가 나올 수 있는 후보 행 번호 (워크북 순서)
+
+        Args:
+            query: strip 된 주문 상품명
+            normalized_query: normalize_string(query)
+            threshold: 최소 유사도 점수 (0-100)
+            mode: 'exact' 또는 'approximate'
+
+        Returns:
+            np.ndarray: 후보 행 번호 (오름차순)
+        """
+        if mode not in PREFILTER_MODES:
+            raise ValueError(f"지원하지 않는 필터 모드입니다: {mode}")
+
+        if threshold <= 0 or self.size == 0:
+            return np.arange(self.size)
+
+        if mode == 'exact':
+            return self._exact_candidates(query, threshold)
+        return self._approximate_candidates(normalized_query, threshold)
+
+    def _exact_candidates(self, query, threshold):
+        tokens = _token_set(query)
+        if not tokens:
+            return np.arange(0)
+
+        # 공유 문자 수 (중복 포함 교집합 크기)
+        shared = np.zeros(self.size, dtype=np.int64)
+        for ch, count in Counter(''.join(tokens)).items():
+            posting = self._char_postings.get(ch)
+            if posting is not None:
+                rows, counts = posting
+                shared[rows] += np.minimum(counts, count)
+
+        # LCS 상한 = 공유 문자 + 공백 매칭 최대 개수
+        query_length = sum(len(t) for t in tokens) + len(tokens) - 1
+        lcs_bound = shared + np.minimum(self._token_counts, len(tokens)) - 1
+        mask = 200 * lcs_bound >= (threshold - 1e-9) * (self._joined_lengths + query_length)
+
+        # 토큰을 하나라도 공유하면 100점까지 가능
+        for token in tokens:
+            rows = self._token_postings.get(token)
+            if rows is not None:
+                mask[rows] = True
+
+        return np.flatnonzero(mask)
+
+    def _approximate_candidates(self, normalized_query, threshold):
+        n = self.n
+        length = len(normalized_query)
+        if length < n:
+            return np.arange(self.size)
+
+        shared = np.zeros(self.size, dtype=np.int64)
+        for gram, count in Counter(_ngrams(normalized_query, n)).items():
+            posting = self._gram_postings.get(gram)
+            if posting is not None:
+                rows, counts = posting
+                shared[rows] += np.minimum(counts, count)
+
+        # ratio >= t 이면 LCS >= t/200 * (La + Lb) 이므로 쿼리 쪽 삭제 수 <= La - LCS,
+        # 삭제 1번에 최대 n 개 n-gram 이 깨지므로 행마다 최소 공유 개수를 계산
+        max_deletions = np.maximum(length - threshold / 200 * (length + self._normalized_lengths), 0)
+        min_shared = np.maximum(np.ceil((length - n + 1) - n * max_deletions - 1e-9), 1)
+
+        return np.flatnonzero(shared >= min_shared)
+
+
+class TabbedNgramIndex:
+    """
+    탭별 NgramIndex 를 탭 순서대로 이어 붙인 역색인
+
+    필터 조건은 행마다 독립적으로 계산되므로, 탭별 후보를 탭 시작 위치(offset)만큼
+    밀어서 이어 붙이면 전체 행으로 만든 NgramIndex 와 결과가 같다.
+    탭 내용이 바뀌면 그 탭의 NgramIndex 만 다시 만들면 된다.
+    """
+
+    def __init__(self, segments):
+        """
+        Args:
+            segments: (탭 시작 행 번호, NgramIndex) 목록 (탭 순서)
+        """
+        self._segments = list(segments)
+        self.size = sum(index.size for _, index in self._segments)
+
+    def candidates(self, query, normalized_query, threshold, mode='exact'):
+        """
+        threshold 이상 점수가 나올 수 있는 후보 행 번호 (전체 행 기준, 워크북 순서)
+
+        Args:
+            query: strip 된 주문 상품명
+            normalized_query: normalize_string(query)
+            threshold: 최소 유사도 점수 (0-100)
+            mode: 'exact' 또는 'approximate'
+
+        Returns:
+            np.ndarray: 후보 행 번호 (오름차순)
+        """
+        if mode not in PREFILTER_MODES:
+            raise ValueError(f"지원하지 않는 필터 모드입니다: {mode}")
+
+        parts = [
+            index.candidates(query, normalized_query, threshold, mode=mode) + offset
+            for offset, index in self._segments
+        ]
+        if not parts:
+            return np.arange(0)
+        return np.concatenate(parts)
+
+    def memory_bytes(self):
+        """탭별 역색인의 추정 바이트 수 합계"""
+        return sum(index.memory_bytes() for _, index in self._segments)
@@ -0,0 +1,329 @@
+"""
+구글 스프레드시트 핸들 캐시 모듈
+- client.open(이름) 은 Drive 제목 검색이라 호출마다 왕복이 생김
+- 스프레드시트를 한 번만 찾고(키가 설정돼 있으면 키로 열기)
+  Spreadsheet / Worksheet / 시트 ID / URL / 헤더→열 번호 를 TTL 동안 재사용
+- Drive modifiedTime 으로 변경 여부를 확인해 바뀐 게 없으면 읽어 둔 값/핸들을 그대로 사용
+  (확인 결과는 짧은 TTL 동안 재사용, Drive 조회는 시트 읽기 할당량을 쓰지 않음)
+"""
+import os
+import threading
+import time
+
+from src.sheets_scheduler import PRIORITY_INTERACTIVE, get_scheduler
+
+
+DEFAULT_SHEET_NAME = "상품매칭용시트"
+DEFAULT_WORKSHEET = "시트1"
+DEFAULT_SESSION_TTL = 300
+DEFAULT_PROBE_TTL = 5
+DEFAULT_CACHE_MAX_AGE = 60
+
+
+class SheetSession:
+    """
+    스프레드시트 하나에 대한 핸들 캐시 (스레드 안전)
+
+    src/utils.py 의 시트 함수들은 gspread.Client 대신 이 객체를 받을 수 있으며,
+    같은 세션을 넘기면 스크립트 실행마다 스프레드시트를 다시 찾지 않는다.
+    모든 API 호출은 call() 을 거쳐 할당량 스케줄러(SheetsScheduler)로 실행된다.
+    시트 구조(탭 추가/삭제, 헤더 변경)를 바꾼 뒤에는 invalidate() 로 비운다.
+
+    변경 확인 버전 = (Drive modifiedTime, 이 세션의 쓰기 횟수).
+    modifiedTime 반영이 늦을 수 있어 변경이 없어도 cache_max_age 마다 한 번은 다시 읽는다.
+    """
+
+    def __init__(self, client, sheet_name=DEFAULT_SHEET_NAME, spreadsheet_key=None,
+                 worksheet_name=DEFAULT_WORKSHEET, ttl=None, scheduler=None,
+                 probe_ttl=None, cache_max_age=None):
+        """
+        Args:
+            client: gspread.Client
+            sheet_name: 스프레드시트 이름 (키가 없을 때 제목 검색용)
+            spreadsheet_key: 스프레드시트 키 (None이면 환경변수 MATCHING_SHEET_KEY, 없으면 이름으로 검색)
+            worksheet_name: 기본 워크시트 이름
+            ttl: 핸들 재사용 시간(초) (None이면 환경변수 SHEET_SESSION_TTL 또는 300초)
+            scheduler: SheetsScheduler (None이면 프로세스 공용 스케줄러)
+            probe_ttl: 변경 확인 결과 재사용 시간(초) (None이면 환경변수 SHEET_PROBE_TTL 또는 5초)
+            cache_max_age: 변경이 없을 때 읽어 둔 값 재사용 최대 시간(초)
+                (None이면 환경변수 SHEET_CACHE_MAX_AGE 또는 60초)
+        """
+        if spreadsheet_key is None:
+            spreadsheet_key = os.environ.get('MATCHING_SHEET_KEY') or None
+        if ttl is None:
+            ttl = float(os.environ.get('SHEET_SESSION_TTL', DEFAULT_SESSION_TTL))
+        if probe_ttl is None:
+            probe_ttl = float(os.environ.get('SHEET_PROBE_TTL', DEFAULT_PROBE_TTL))
+        if cache_max_age is None:
+            cache_max_age = float(os.environ.get('SHEET_CACHE_MAX_AGE', DEFAULT_CACHE_MAX_AGE))
+
+        self.client = client
+        self.sheet_name = sheet_name
+        self.spreadsheet_key = spreadsheet_key
+        self.worksheet_name = worksheet_name
+        self.ttl = ttl
+        self.probe_ttl = probe_ttl
+        self.cache_max_age = cache_max_age
+        self.scheduler = scheduler if scheduler is not None else get_scheduler()
+
+        self.opens = 0       # 스프레드시트 열기 횟수 (캐시 효과 확인용)
+        self.probes = 0      # 변경 확인(Drive 조회) 횟수
+        self.cache_hits = 0  # 변경이 없어 읽지 않고 재사용한 횟수
+
+        self._spreadsheet = None
+        self._opened_at = 0.0
+        self._worksheets = {}   # 워크시트 이름 → Worksheet
+        self._headers = {}      # 워크시트 이름 → 헤더 리스트
+        self._opened_version = None
+
+        self._writes = 0             # 이 세션으로 보낸 쓰기 횟수 (버전에 포함)
+        self._probe_value = None     # 마지막으로 확인한 modifiedTime
+        self._probe_at = None
+
+        # 로더가 쓰는 값 스냅샷 (증분 읽기용, 핸들을 다시 열어도 유지)
+        self.snapshots = {}
+        self._lock = threading.RLock()
+
+    def call(self, kind, label, func, *args, priority=PRIORITY_INTERACTIVE, idempotent=True, **kwargs):
+        """
+        API 호출을 스케줄러로 실행 (할당량 대기, 429/5xx 재시도, 통계)
+
+        Args:
+            kind: 'read' 또는 'write'
+            label: 통계용 호출 이름
+            func: 실제 gspread 호출
+            priority: PRIORITY_INTERACTIVE 또는 PRIORITY_BULK
+            idempotent: False 면 429 만 재시도 (다시 보내면 중복 반영되는 쓰기)
+
+        Returns:
+            func 반환값
+        """
+        try:
+            return self.scheduler.run(kind, label, func, *args, priority=priority,
+                                      idempotent=idempotent, **kwargs)
+        finally:
+            if kind == 'write':
+                # 실패했어도 일부 반영됐을 수 있으므로 변경된 것으로 취급
+                with self._lock:
+                    self._writes += 1
+                    self._probe_at = None
+
+    def _expired_locked(self):
+        return self._spreadsheet is None or time.monotonic() - self._opened_at >= self.ttl
+
+    def _probe_locked(self, spreadsheet):
+        """현재 버전 (probe_ttl 안에서는 마지막 확인 결과 재사용, 확인할 수 없으면 None)"""
+        now = time.monotonic()
+        if self._probe_at is None or now - self._probe_at >= self.probe_ttl:
+            try:
+                modified = self.call('drive', 'modified_time', spreadsheet.get_lastUpdateTime)
+            except Exception as e:
+                print(f"스프레드시트 수정 시각 확인 오류: {str(e)}")
+                modified = None
+            self.probes += 1
+            self._probe_value = modified
+            self._probe_at = now
+
+        if self._probe_value is None:
+            return None
+        return (self._probe_value, self._writes)
+
+    @property
+    def spreadsheet(self):
+        """gspread.Spreadsheet (TTL이 지났고 그 사이 변경이 있으면 다시 열기)"""
+        with self._lock:
+            if self._expired_locked() and self._spreadsheet is not None and self._opened_version is not None:
+                # 바뀐 게 없으면 핸들/헤더를 그대로 쓰고 TTL 만 연장
+                if self._probe_locked(self._spreadsheet) == self._opened_version:
+                    self._opened_at = time.monotonic()
+
+            if self._expired_locked():
+                if self.spreadsheet_key:
+                    spreadsheet = self.call('read', 'open_by_key', self.client.open_by_key, self.spreadsheet_key)
+                else:
+                    spreadsheet = self.call('read', 'open', self.client.open, self.sheet_name)
+                    # 다음부터는 제목 검색 없이 키로 열기
+                    self.spreadsheet_key = spreadsheet.id
+
+                self.opens += 1
+                self._spreadsheet = spreadsheet
+                self._opened_at = time.monotonic()
+                self._worksheets.clear()
+                self._headers.clear()
+                # 변경 확인을 쓰는 세션만 열 때 버전 기록 (일회용 세션은 Drive 조회 없음)
+                self._opened_version = self._probe_locked(spreadsheet) if self.probes else None
+
+            return self._spreadsheet
+
+    def version(self):
+        """
+        스프레드시트 변경 확인용 버전
+
+        Returns:
+            tuple: (Drive modifiedTime, 이 세션의 쓰기 횟수) 또는 None (확인할 수 없음 → 항상 변경된 것으로 취급)
+        """
+        with self._lock:
+            return self._probe_locked(self.spreadsheet)
+
+    def snapshot_version(self, key):
+        """
+        스냅샷이 있을 때만 현재 버전 확인
+        (처음 읽을 때는 비교할 대상이 없으므로 Drive 조회 생략 → 일회용 세션은 추가 호출 없음)
+
+        Returns:
+            tuple: 현재 버전 또는 None
+        """
+        if key not in self.snapshots:
+            return None
+        return self.version()
+
+    def is_unchanged(self, snapshot, version):
+        """
+        스냅샷을 읽은 뒤 변경이 없었는지 (버전이 같고 cache_max_age 이내)
+
+        Args:
+            snapshot: save_snapshot() 으로 저장한 dict 또는 None
+            version: snapshot_version() 결과
+
+        Returns:
+            bool: 다시 읽지 않고 써도 되면 True
+        """
+        if snapshot is None or version is None or snapshot.get('version') != version:
+            return False
+        if time.monotonic() - snapshot['checked_at'] >= self.cache_max_age:
+            return False
+        with self._lock:
+            self.cache_hits += 1
+        return True
+
+    def save_snapshot(self, key, data, version, **fields):
+        """
+        읽은 값 저장
+
+        Args:
+            key: 스냅샷 이름
+            data: 읽은 값
+            version: 읽기 전에 확인한 버전 (읽는 도중 바뀌었으면 다음 확인에서 다시 읽음)
+            **fields: 함께 저장할 값
+        """
+        with self._lock:
+            self.snapshots[key] = {**fields, 'data': data, 'version': version, 'checked_at': time.monotonic()}
+
+    def cached_values(self, key, loader):
+        """
+        변경이 없으면 저장된 값, 있으면 loader() 로 다시 읽은 값
+
+        Args:
+            key: 스냅샷 이름 (예: 워크시트 이름)
+            loader: 인자 없는 읽기 함수
+
+        Returns:
+            loader() 반환값 (또는 저장된 값)
+        """
+        snapshot = self.snapshots.get(key)
+        version = self.snapshot_version(key)
+        if self.is_unchanged(snapshot, version):
+            return snapshot['data']
+
+        data = loader()
+        self.save_snapshot(key, data, version)
+        return data
+
+    def worksheet(self, title=None):
+        """
+        워크시트 핸들
+
+        Args:
+            title: 워크시트 이름 (None이면 기본 워크시트)
+
+        Returns:
+            gspread.Worksheet
+        """
+        title = title or self.worksheet_name
+        with self._lock:
+            spreadsheet = self.spreadsheet
+            worksheet = self._worksheets.get(title)
+            if worksheet is None:
+                worksheet = self.call('read', 'worksheet', spreadsheet.worksheet, title)
+                self._worksheets[title] = worksheet
+            return worksheet
+
+    @property
+    def sheet_id(self):
+        """기본 워크시트의 시트 ID (서식 요청용)"""
+        return self.worksheet().id
+
+    @property
+    def url(self):
+        """스프레드시트 URL"""
+        return self.spreadsheet.url
+
+    def headers(self, title=None):
+        """
+        워크시트 1행 (헤더) 리스트
+
+        Args:
+            title: 워크시트 이름 (None이면 기본 워크시트)
+
+        Returns:
+            list: 헤더 리스트 (복사본)
+        """
+        title = title or self.worksheet_name
+        with self._lock:
+            worksheet = self.worksheet(title)
+            headers = self._headers.get(title)
+            if headers is None:
+                headers = self.call('read', 'row_values', worksheet.row_values, 1)
+                self._headers[title] = headers
+            return list(headers)
+
+    def header_columns(self, title=None):
+        """
+        헤더명 → 열 번호 (1-based, 같은 이름이 여러 개면 첫 번째 열)
+
+        Args:
+            title: 워크시트 이름 (None이면 기본 워크시트)
+
+        Returns:
+            dict: {헤더명: 열 번호}
+        """
+        columns = {}
+        for col_idx, name in enumerate(self.headers(title), start=1):
+            columns.setdefault(name, col_idx)
+        return columns
+
+    def set_headers(self, headers, title=None):
+        """헤더를 직접 고친 뒤 캐시 갱신 (다시 읽지 않도록)"""
+        title = title or self.worksheet_name
+        with self._lock:
+            self._headers[title] = list(headers)
+
+    def invalidate(self):
+        """캐시된 핸들/헤더 전체 비우기 (다음 사용 시 다시 열기)"""
+        with self._lock:
+            self._spreadsheet = None
+            self._opened_at = 0.0
+            self._worksheets.clear()
+            self._headers.clear()
+            self._opened_version = None
+            self._probe_value = None
+            self._probe_at = None
+            self.snapshots.clear()
+
+
+def sheet_session(client, sheet_name=DEFAULT_SHEET_NAME):
+    """
+    gspread.Client 또는 SheetSession → SheetSession
+
+    이미 SheetSession 이면 그대로 반환하고, Client 면 이번 호출에서만 쓰는 세션을 만든다.
+
+    Args:
+        client: gspread.Client 또는 SheetSession
+        sheet_name: 스프레드시트 이름
+
+    Returns:
+        SheetSession
+    """
+    if isinstance(client, SheetSession):
+        return client
+    return SheetSession(client, sheet_name)
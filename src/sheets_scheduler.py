@@ -0,0 +1,325 @@
+"""
+구글 시트 API 호출 스케줄러 모듈
+- 읽기/쓰기 분당 할당량에 맞춘 토큰 버킷으로 호출 속도 제한 (Drive 메타데이터 조회는 별도 할당량)
+- 429(할당량 초과)/5xx 응답은 지수 백오프 + 지터로 재시도 (Retry-After 헤더 우선)
+  (열 추가처럼 두 번 실행되면 결과가 달라지는 호출은 요청이 거절된 429 만 재시도)
+- 화면 표시용 읽기(interactive)가 일괄 쓰기(bulk)보다 먼저 토큰을 받음
+- 호출 종류별 횟수/재시도/오류 수와 지연 시간 히스토그램 기록
+"""
+import bisect
+import http.client
+import os
+import random
+import threading
+import time
+
+
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BULK = 1
+
+DEFAULT_READ_PER_MINUTE = 60
+DEFAULT_WRITE_PER_MINUTE = 60
+DEFAULT_DRIVE_PER_MINUTE = 300
+DEFAULT_MAX_RETRIES = 5
+DEFAULT_BASE_DELAY = 1.0
+DEFAULT_MAX_DELAY = 32.0
+
+# 재시도할 HTTP 상태 코드
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+# 멱등이 아닌 호출도 재시도할 수 있는 코드 (실행 전에 거절됨, 5xx 는 이미 반영됐을 수 있음)
+REJECTED_STATUS_CODES = (429,)
+
+# 지연 시간 히스토그램 구간 상한(초) (마지막 구간은 그 이상)
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class QuotaWaitTimeout(Exception):
+    """토큰을 기다리다 제한 시간을 넘김"""
+
+
+def _status_code(error):
+    """예외 → HTTP 상태 코드 (gspread.exceptions.APIError 또는 code/response 속성이 있는 예외)"""
+    response = getattr(error, 'response', None)
+    status = getattr(response, 'status_code', None)
+    if status is None:
+        status = getattr(error, 'code', None)
+    try:
+        return int(status)
+    except (TypeError, ValueError):
+        return None
+
+
+def is_retryable_error(error):
+    """
+    다시 보내면 성공할 수 있는 오류인지 (429/5xx, 네트워크 오류, 할당량 대기 시간 초과)
+
+    400(시트 범위 초과)이나 상태 코드 없는 gspread 오류(워크시트 없음 등)는
+    다시 보내도 같은 결과이므로 False.
+    """
+    status = _status_code(error)
+    if status is not None:
+        return status in RETRY_STATUS_CODES
+    # requests/urllib3 연결 오류는 OSError 하위 클래스
+    return isinstance(error, (OSError, http.client.HTTPException, QuotaWaitTimeout))
+
+
+def _retry_after(error):
+    """응답의 Retry-After 헤더(초) 또는 None"""
+    response = getattr(error, 'response', None)
+    headers = getattr(response, 'headers', None) or {}
+    try:
+        return float(headers.get('Retry-After'))
+    except (TypeError, ValueError):
+        return None
+
+
+class TokenBucket:
+    """
+    분당 요청 수 기준 토큰 버킷 (우선순위 지원, 스레드 안전)
+
+    bulk 요청은 interactive 요청이 기다리고 있으면 양보하고,
+    버킷에 reserve 개 이상 남아 있을 때만 토큰을 가져간다
+    (일괄 쓰기가 할당량을 다 써서 화면 읽기가 막히지 않도록).
+    """
+
+    def __init__(self, per_minute, capacity=None, reserve=None, clock=time.monotonic):
+        """
+        Args:
+            per_minute: 분당 허용 요청 수
+            capacity: 최대 버스트 크기 (None이면 분당 허용량의 1/4)
+            reserve: interactive 전용으로 남겨둘 토큰 수 (None이면 버스트 크기의 1/5)
+            clock: 시간 함수 (테스트용)
+        """
+        self.rate = per_minute / 60.0
+        self.capacity = float(capacity if capacity is not None else max(1, per_minute // 4))
+        self.reserve = float(reserve if reserve is not None else self.capacity // 5)
+        self._clock = clock
+        self._tokens = self.capacity
+        self._updated = clock()
+        self._waiting_interactive = 0
+        self._cond = threading.Condition()
+
+    def _refill_locked(self):
+        now = self._clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, priority=PRIORITY_INTERACTIVE, timeout=None):
+        """
+        토큰 하나 가져오기 (없으면 기다림)
+
+        Args:
+            priority: PRIORITY_INTERACTIVE 또는 PRIORITY_BULK
+            timeout: 최대 대기 시간(초) (None이면 무한)
+
+        Returns:
+            float: 기다린 시간(초)
+
+        Raises:
+            QuotaWaitTimeout: 제한 시간 안에 토큰을 받지 못함
+        """
+        start = self._clock()
+        interactive = priority == PRIORITY_INTERACTIVE
+
+        with self._cond:
+            if interactive:
+                self._waiting_interactive += 1
+            try:
+                while True:
+                    self._refill_locked()
+                    need = 1.0 if interactive else 1.0 + self.reserve
+                    if self._tokens >= need and (interactive or self._waiting_interactive == 0):
+                        self._tokens -= 1.0
+                        return self._clock() - start
+
+                    # 다음 토큰이 생길 때까지 대기 (다른 스레드가 양보하면 더 빨리 깨어남)
+                    wait = max((need - self._tokens) / self.rate, 0.01) if self.rate > 0 else 1.0
+                    if timeout is not None:
+                        remaining = timeout - (self._clock() - start)
+                        if remaining <= 0:
+                            raise QuotaWaitTimeout("시트 API 할당량 대기 시간 초과")
+                        wait = min(wait, remaining)
+                    self._cond.wait(wait)
+            finally:
+                if interactive:
+                    self._waiting_interactive -= 1
+                    self._cond.notify_all()
+
+
+class SheetsScheduler:
+    """
+    구글 시트 API 호출 스케줄러 (프로세스 공용, 스레드 안전)
+
+    사용 예:
+        scheduler.run('read', 'get_all_values', worksheet.get_all_values)
+        scheduler.run('write', 'batch_update', spreadsheet.batch_update, body, priority=PRIORITY_BULK)
+    """
+
+    def __init__(self, read_per_minute=None, write_per_minute=None, drive_per_minute=None,
+                 max_retries=DEFAULT_MAX_RETRIES,
+                 base_delay=DEFAULT_BASE_DELAY, max_delay=DEFAULT_MAX_DELAY,
+                 sleep=time.sleep, clock=time.monotonic, jitter=random.random):
+        """
+        Args:
+            read_per_minute: 분당 읽기 할당량 (None이면 환경변수 SHEETS_READ_PER_MINUTE 또는 60)
+            write_per_minute: 분당 쓰기 할당량 (None이면 환경변수 SHEETS_WRITE_PER_MINUTE 또는 60)
+            drive_per_minute: 분당 Drive 조회 할당량 (None이면 환경변수 DRIVE_READ_PER_MINUTE 또는 300)
+            max_retries: 429/5xx 재시도 횟수
+            base_delay: 첫 재시도 대기 시간(초), 재시도마다 2배
+            max_delay: 재시도 대기 시간 상한(초)
+            sleep, clock, jitter: 시간/난수 함수 (테스트에서 가짜로 교체)
+        """
+        if read_per_minute is None:
+            read_per_minute = float(os.environ.get('SHEETS_READ_PER_MINUTE', DEFAULT_READ_PER_MINUTE))
+        if write_per_minute is None:
+            write_per_minute = float(os.environ.get('SHEETS_WRITE_PER_MINUTE', DEFAULT_WRITE_PER_MINUTE))
+        if drive_per_minute is None:
+            drive_per_minute = float(os.environ.get('DRIVE_READ_PER_MINUTE', DEFAULT_DRIVE_PER_MINUTE))
+
+        self.buckets = {
+            'read': TokenBucket(read_per_minute, clock=clock),
+            'write': TokenBucket(write_per_minute, clock=clock),
+            'drive': TokenBucket(drive_per_minute, clock=clock),
+        }
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._sleep = sleep
+        self._clock = clock
+        self._jitter = jitter
+
+        self._stats = {}  # 호출 이름 → 통계 dict
+        self._lock = threading.Lock()
+
+    def run(self, kind, label, func, *args, priority=PRIORITY_INTERACTIVE, idempotent=True, **kwargs):
+        """
+        할당량에 맞춰 API 호출 실행 (429/5xx 는 재시도)
+
+        Args:
+            kind: 'read', 'write' 또는 'drive' (할당량 종류)
+            label: 통계용 호출 이름 (예: 'get_all_values')
+            func: 실제 gspread 호출
+            *args, **kwargs: func 인자
+            priority: PRIORITY_INTERACTIVE (화면 표시) 또는 PRIORITY_BULK (일괄 쓰기)
+            idempotent: False 면 429 만 재시도 (appendDimension 처럼 다시 보내면 중복 반영되는 호출)
+
+        Returns:
+            func 반환값
+
+        Raises:
+            재시도 후에도 실패하면 마지막 예외
+        """
+        bucket = self.buckets[kind]
+        retry_codes = RETRY_STATUS_CODES if idempotent else REJECTED_STATUS_CODES
+        attempt = 0
+
+        while True:
+            waited = bucket.acquire(priority)
+            start = self._clock()
+            try:
+                result = func(*args, **kwargs)
+            except Exception as e:
+                status = _status_code(e)
+                failed = status not in retry_codes or attempt >= self.max_retries
+                self._record(kind, label, self._clock() - start, waited,
+                             error=failed, status=status, retried=not failed)
+                if failed:
+                    raise
+
+                # 지수 백오프 + 전체 지터 (Retry-After 가 있으면 그보다 짧게 기다리지 않음)
+                delay = min(self.max_delay, self.base_delay * (2 ** attempt)) * self._jitter()
+                retry_after = _retry_after(e)
+                if retry_after is not None:
+                    delay = max(delay, retry_after)
+                attempt += 1
+                print(f"시트 API {label} 재시도 {attempt}/{self.max_retries} (HTTP {status}, {delay:.1f}초 후)")
+                self._sleep(delay)
+                continue
+
+            self._record(kind, label, self._clock() - start, waited)
+            return result
+
+    def stats(self):
+        """
+        호출 종류별 통계
+
+        Returns:
+            dict: {호출 이름: {'kind', 'calls', 'retries', 'errors', 'throttled', 'wait_seconds',
+                              'status_counts', 'latency_buckets', 'latency_histogram', 'total_seconds'}}
+        """
+        with self._lock:
+            return {
+                label: {
+                    **stat,
+                    'status_counts': dict(stat['status_counts']),
+                    'latency_histogram': list(stat['latency_histogram']),
+                }
+                for label, stat in self._stats.items()
+            }
+
+    def totals(self):
+        """
+        전체 합계
+
+        Returns:
+            dict: {'calls', 'retries', 'errors', 'throttled', 'wait_seconds'}
+        """
+        totals = {'calls': 0, 'retries': 0, 'errors': 0, 'throttled': 0, 'wait_seconds': 0.0}
+        for stat in self.stats().values():
+            for key in totals:
+                totals[key] += stat[key]
+        return totals
+
+    def reset_stats(self):
+        """통계 초기화"""
+        with self._lock:
+            self._stats.clear()
+
+    def _record(self, kind, label, latency, waited, error=False, status=None, retried=False):
+        with self._lock:
+            stat = self._stats.get(label)
+            if stat is None:
+                stat = {
+                    'kind': kind,
+                    'calls': 0,
+                    'retries': 0,
+                    'errors': 0,
+                    'throttled': 0,
+                    'wait_seconds': 0.0,
+                    'total_seconds': 0.0,
+                    'status_counts': {},
+                    'latency_buckets': LATENCY_BUCKETS,
+                    'latency_histogram': [0] * (len(LATENCY_BUCKETS) + 1),
+                }
+                self._stats[label] = stat
+
+            stat['calls'] += 1
+            stat['total_seconds'] += latency
+            stat['latency_histogram'][bisect.bisect_left(LATENCY_BUCKETS, latency)] += 1
+            if waited > 0.001:
+                stat['throttled'] += 1
+                stat['wait_seconds'] += waited
+            if retried:
+                stat['retries'] += 1
+            if error:
+                stat['errors'] += 1
+            if status is not None:
+                stat['status_counts'][status] = stat['status_counts'].get(status, 0) + 1
+
+
+_default_scheduler = None
+_default_lock = threading.Lock()
+
+
+def get_scheduler():
+    """
+    프로세스 공용 스케줄러 (할당량은 서비스 계정 단위이므로 모든 세션이 공유)
+
+    Returns:
+        SheetsScheduler
+    """
+    global _default_scheduler
+    with _default_lock:
+        if _default_scheduler is None:
+            _default_scheduler = SheetsScheduler()
+        return _default_scheduler
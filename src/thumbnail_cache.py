@@ -0,0 +1,299 @@
+"""
+썸네일 2단계 캐시 모듈
+- 1단계: 프로세스 메모리 LRU (전체 바이트 수 상한)
+- 2단계: 디스크 저장소 (썸네일 내용 SHA-256 이름으로 저장, 같은 이미지는 한 번만 저장)
+- (URL, 크기) 키마다 ETag/Last-Modified 를 기록해 TTL 이 지나면 조건부 요청으로 재검증
+- 다운로드 실패는 짧은 시간 동안 실패로 기억해 같은 URL 을 반복 요청하지 않음
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from pathlib import Path
+
+from src.disk_store import atomic_write, evict_lru, remove_file, touch
+
+
+DEFAULT_THUMBNAIL_CACHE_DIR = os.path.join("temp", "thumbnail_cache")
+DEFAULT_MEMORY_MB = 32
+DEFAULT_DISK_MB = 256
+DEFAULT_TTL = 24 * 60 * 60
+DEFAULT_NEGATIVE_TTL = 60
+
+# 디스크 정리는 저장 N번마다 한 번
+_EVICT_EVERY = 50
+
+
+# 캐시 조회 결과
+# data: 썸네일 바이트 (실패로 기억된 항목이면 None)
+# fresh: TTL 이내 여부 (False면 etag/last_modified 로 재검증 필요)
+CachedThumbnail = namedtuple('CachedThumbnail', ['data', 'fresh', 'etag', 'last_modified'])
+
+
+def thumbnail_cache_key(image_url, size):
+    """(URL, 크기) → 캐시 키 (SHA-256 hex)"""
+    raw = f"{image_url}\x00{int(size[0])}x{int(size[1])}"
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+class ThumbnailCache:
+    """
+    썸네일 메모리 LRU + 디스크 2단계 캐시 (스레드 안전)
+
+    디스크 구조:
+        meta/{키}.json    - {'blob', 'etag', 'last_modified', 'fetched_at'}
+        blobs/{내용 해시}.jpg - 썸네일 바이트
+    """
+
+    def __init__(self, cache_dir=None, memory_bytes=None, disk_bytes=None, ttl=None,
+                 negative_ttl=DEFAULT_NEGATIVE_TTL):
+        """
+        Args:
+            cache_dir: 디스크 캐시 디렉토리 (None이면 환경변수 THUMBNAIL_CACHE_DIR 또는 temp/thumbnail_cache)
+            memory_bytes: 메모리 캐시 상한 (None이면 환경변수 THUMBNAIL_CACHE_MEMORY_MB 또는 32MB)
+            disk_bytes: 디스크 캐시 상한 (None이면 환경변수 THUMBNAIL_CACHE_DISK_MB 또는 256MB)
+            ttl: 재검증 없이 사용할 시간(초) (None이면 환경변수 THUMBNAIL_CACHE_TTL 또는 하루)
+            negative_ttl: 다운로드 실패를 기억할 시간(초)
+        """
+        if cache_dir is None:
+            cache_dir = os.environ.get('THUMBNAIL_CACHE_DIR', DEFAULT_THUMBNAIL_CACHE_DIR)
+        if memory_bytes is None:
+            memory_bytes = int(float(os.environ.get('THUMBNAIL_CACHE_MEMORY_MB', DEFAULT_MEMORY_MB)) * 1024 * 1024)
+        if disk_bytes is None:
+            disk_bytes = int(float(os.environ.get('THUMBNAIL_CACHE_DISK_MB', DEFAULT_DISK_MB)) * 1024 * 1024)
+        if ttl is None:
+            ttl = float(os.environ.get('THUMBNAIL_CACHE_TTL', DEFAULT_TTL))
+
+        self.cache_dir = Path(cache_dir)
+        self.memory_bytes = memory_bytes
+        self.disk_bytes = disk_bytes
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.negative_hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        self.failures = 0
+
+        self._memory = OrderedDict()   # 키 → (data, fetched_at, etag, last_modified)
+        self._memory_total = 0
+        self._failed = {}              # 키 → 실패 기억 만료 시각
+        self._puts = 0
+        self._lock = threading.Lock()
+
+    def get(self, image_url, size):
+        """
+        캐시 조회
+
+        Args:
+            image_url: 이미지 URL
+            size: 썸네일 크기 (width, height)
+
+        Returns:
+            CachedThumbnail 또는 None (캐시에 없음)
+        """
+        key = thumbnail_cache_key(image_url, size)
+        now = time.time()
+
+        with self._lock:
+            failed_until = self._failed.get(key)
+            if failed_until is not None:
+                if failed_until > now:
+                    self.negative_hits += 1
+                    return CachedThumbnail(None, True, None, None)
+                del self._failed[key]
+
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+                data, fetched_at, etag, last_modified = entry
+                fresh = now - fetched_at < self.ttl
+                if fresh:
+                    self.memory_hits += 1
+                return CachedThumbnail(data, fresh, etag, last_modified)
+
+        entry = self._read_disk(key)
+        if entry is None:
+            return None
+
+        data, fetched_at, etag, last_modified = entry
+        fresh = now - fetched_at < self.ttl
+        with self._lock:
+            if fresh:
+                self.disk_hits += 1
+            self._remember_locked(key, entry)
+        return CachedThumbnail(data, fresh, etag, last_modified)
+
+    def put(self, image_url, size, data, etag=None, last_modified=None):
+        """
+        다운로드한 썸네일 저장 (메모리 + 디스크)
+
+        Args:
+            image_url: 이미지 URL
+            size: 썸네일 크기 (width, height)
+            data: 썸네일 바이트
+            etag: 응답 ETag 헤더
+            last_modified: 응답 Last-Modified 헤더
+        """
+        key = thumbnail_cache_key(image_url, size)
+        entry = (data, time.time(), etag, last_modified)
+
+        with self._lock:
+            self.misses += 1
+            self._failed.pop(key, None)
+            self._remember_locked(key, entry)
+            self._puts += 1
+            run_evict = self._puts % _EVICT_EVERY == 0
+
+        self._write_disk(key, entry)
+        if run_evict:
+            self.evict()
+
+    def mark_revalidated(self, image_url, size):
+        """
+        조건부 요청 결과 304 (변경 없음) - 저장된 썸네일의 TTL 갱신
+
+        Returns:
+            bytes: 저장된 썸네일 바이트 또는 None
+        """
+        key = thumbnail_cache_key(image_url, size)
+        cached = self.get(image_url, size)
+        if cached is None or cached.data is None:
+            return None
+
+        entry = (cached.data, time.time(), cached.etag, cached.last_modified)
+        with self._lock:
+            self.revalidated += 1
+            self._remember_locked(key, entry)
+        self._write_disk(key, entry)
+        return cached.data
+
+    def mark_failed(self, image_url, size):
+        """다운로드 실패 기억 (negative_ttl 동안 네트워크 요청 없이 None 반환)"""
+        key = thumbnail_cache_key(image_url, size)
+        with self._lock:
+            self.failures += 1
+            self._failed[key] = time.time() + self.negative_ttl
+
+    def stats(self):
+        """
+        캐시 통계
+
+        Returns:
+            dict: 단계별 히트/미스 수, 메모리 사용량, 네트워크 없이 처리한 비율
+        """
+        with self._lock:
+            served = self.memory_hits + self.disk_hits + self.negative_hits
+            network = self.misses + self.revalidated + self.failures
+            total = served + network
+            return {
+                'memory_hits': self.memory_hits,
+                'disk_hits': self.disk_hits,
+                'negative_hits': self.negative_hits,
+                'revalidated': self.revalidated,
+                'misses': self.misses,
+                'failures': self.failures,
+                'memory_entries': len(self._memory),
+                'memory_bytes': self._memory_total,
+                'hit_rate': served / total if total else 0.0,
+            }
+
+    def clear(self):
+        """메모리 + 디스크 캐시 전체 삭제"""
+        with self._lock:
+            self._memory.clear()
+            self._memory_total = 0
+            self._failed.clear()
+
+        for sub_dir in ('meta', 'blobs'):
+            directory = self.cache_dir / sub_dir
+            if directory.exists():
+                for path in directory.iterdir():
+                    remove_file(path)
+
+    def evict(self):
+        """
+        디스크 용량 상한 초과 시 오래 사용하지 않은 썸네일부터 삭제
+        (삭제한 썸네일을 가리키는 메타 파일도 함께 삭제)
+
+        Returns:
+            int: 삭제한 파일 수 (메타 파일 포함)
+        """
+        blob_dir = self.cache_dir / 'blobs'
+        if not blob_dir.exists():
+            return 0
+
+        # 메타 파일은 작으므로 썸네일 파일 용량만 계산
+        removed = evict_lru(blob_dir.iterdir(), self.disk_bytes)
+        if removed:
+            removed += self._remove_orphan_meta()
+        return removed
+
+    def _remove_orphan_meta(self):
+        """썸네일 파일이 없는 메타 파일 삭제 (여러 키가 같은 썸네일을 공유할 수 있어 파일 존재로 확인)"""
+        meta_dir = self.cache_dir / 'meta'
+        if not meta_dir.exists():
+            return 0
+
+        removed = 0
+        for path in meta_dir.iterdir():
+            if path.suffix != '.json':
+                continue
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    blob = json.load(f)['blob']
+            except (OSError, ValueError, KeyError, TypeError):
+                blob = None
+            if blob is None or not self._blob_path(blob).exists():
+                removed += remove_file(path)
+        return removed
+
+    def _remember_locked(self, key, entry):
+        previous = self._memory.pop(key, None)
+        if previous is not None:
+            self._memory_total -= len(previous[0])
+
+        self._memory[key] = entry
+        self._memory_total += len(entry[0])
+
+        # 가장 최근 항목은 상한을 넘더라도 유지
+        while self._memory_total > self.memory_bytes and len(self._memory) > 1:
+            _, (data, _, _, _) = self._memory.popitem(last=False)
+            self._memory_total -= len(data)
+
+    def _meta_path(self, key):
+        return self.cache_dir / 'meta' / f"{key}.json"
+
+    def _blob_path(self, blob):
+        return self.cache_dir / 'blobs' / f"{blob}.jpg"
+
+    def _read_disk(self, key):
+        try:
+            with open(self._meta_path(key), 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            blob_path = self._blob_path(meta['blob'])
+            data = blob_path.read_bytes()
+        except (OSError, ValueError, KeyError):
+            return None
+
+        # LRU: 최근 사용 시각 갱신
+        touch(blob_path)
+
+        return data, meta['fetched_at'], meta.get('etag'), meta.get('last_modified')
+
+    def _write_disk(self, key, entry):
+        data, fetched_at, etag, last_modified = entry
+        blob = hashlib.sha256(data).hexdigest()
+        meta = {'blob': blob, 'etag': etag, 'last_modified': last_modified, 'fetched_at': fetched_at}
+
+        try:
+            blob_path = self._blob_path(blob)
+            if not blob_path.exists():
+                atomic_write(blob_path, data)
+            atomic_write(self._meta_path(key), json.dumps(meta).encode('utf-8'))
+        except Exception as e:
+            print(f"썸네일 캐시 저장 오류: {str(e)}")
@@ -3,9 +3,18 @@
 """
 import os
 import glob
+import hashlib
+import json
+import time
 import gspread
+from gspread.utils import rowcol_to_a1
 from google.oauth2 import service_account
+import numpy as np
 import pandas as pd
+from pandas.io.parsers import TextParser
+
+from src.sheet_session import sheet_session
+from src.sheets_scheduler import PRIORITY_BULK, get_scheduler, is_retryable_error
 
 
 def get_service_account_file(search_dir=None):
@@ -98,31 +107,172 @@ def get_gspread_client():
     return gspread.authorize(credentials)
 
 
+# 주문 스냅샷 전체 다시 읽기 주기(초) (그 사이에는 추가된 행 + 상품명/매칭 컬럼만 읽기)
+DEFAULT_ORDER_FULL_REFRESH = 600
+
+
+def _pad_rows(rows, width):
+    """행 길이를 width 로 맞추기 (get_all_values 와 같은 모양)"""
+    return [list(row) + [''] * (width - len(row)) for row in rows]
+
+
+def _trim_row(row):
+    """뒤쪽 빈 셀 제거 (row_values 와 같은 모양)"""
+    row = list(row)
+    while row and row[-1] == '':
+        row.pop()
+    return row
+
+
+def _column_letter(col_idx):
+    """열 번호(1-based) → 열 문자 (1 → A, 27 → AA)"""
+    return rowcol_to_a1(1, col_idx)[:-1]
+
+
+def _refresh_order_rows(session, worksheet, snapshot):
+    """
+    주문 스냅샷 증분 갱신
+    - 헤더, 상품명/매칭상품_상품명 컬럼, 스냅샷 이후 추가된 행만 batch_get 한 번으로 읽기
+    - 헤더가 바뀌었거나 기존 행의 상품명이 달라졌으면 (행 삭제/삽입 가능성) None
+
+    Args:
+        session: SheetSession
+        worksheet: gspread.Worksheet
+        snapshot: {'data': 헤더 포함 전체 값, ...}
+
+    Returns:
+        list: 갱신된 전체 값 (헤더 포함, get_all_values 형식) 또는 None (전체 다시 읽기 필요)
+    """
+    data = snapshot['data']
+    headers = _trim_row(data[0])
+    row_count = len(data) - 1
+
+    name_col = headers.index('상품명') + 1
+    match_col = headers.index('매칭상품_상품명') + 1 if '매칭상품_상품명' in headers else None
+
+    ranges = ['1:1', f'{_column_letter(name_col)}2:{_column_letter(name_col)}']
+    if match_col is not None:
+        ranges.append(f'{_column_letter(match_col)}2:{_column_letter(match_col)}')
+    # 스냅샷 마지막 행 + 추가된 행 (끝을 열어둔 범위, 시트 크기를 넘으면 오류 → 전체 다시 읽기)
+    first_row = max(row_count + 1, 2)
+    ranges.append(f'A{first_row}:{_column_letter(max(worksheet.col_count, len(data[0]), 1))}')
+
+    try:
+        value_ranges = session.call('read', 'batch_get', worksheet.batch_get, ranges)
+    except Exception as e:
+        print(f"주문 증분 읽기 실패, 전체 다시 읽기: {str(e)}")
+        return None
+
+    header_now = _trim_row(value_ranges[0][0]) if value_ranges[0] else []
+    if header_now != headers:
+        return None
+
+    names = [row[0] if row else '' for row in value_ranges[1]]
+    matches = [row[0] if row else '' for row in value_ranges[2]] if match_col is not None else []
+    new_rows = [list(row) for row in value_ranges[-1]]
+    match_idx = match_col - 1 if match_col is not None else None
+
+    # 스냅샷 마지막 행이 그대로인지 확인 (끝쪽 행이 삭제됐으면 전체 다시 읽기)
+    if row_count > 0:
+        last_now = new_rows.pop(0) if new_rows else []
+        last_before = list(data[-1])
+        if match_idx is not None:
+            for row in (last_now, last_before):
+                if match_idx < len(row):
+                    row[match_idx] = ''
+        if _trim_row(last_now) != _trim_row(last_before):
+            return None
+
+    # 기존 행의 상품명이 그대로인지 확인 (행이 밀렸으면 전체 다시 읽기)
+    name_idx = name_col - 1
+    for i in range(row_count):
+        current = names[i] if i < len(names) else ''
+        if data[i + 1][name_idx] != current:
+            return None
+
+    # 추가된 행의 상품명은 방금 읽은 상품명 컬럼과 같아야 함 (읽는 사이 변경 확인)
+    for offset, row in enumerate(new_rows):
+        current = names[row_count + offset] if row_count + offset < len(names) else ''
+        if (row[name_idx] if name_idx < len(row) else '') != current:
+            return None
+
+    width = max([len(data[0])] + [len(row) for row in new_rows])
+    refreshed = _pad_rows(data, width) if width > len(data[0]) else [list(row) for row in data]
+    refreshed.extend(_pad_rows(new_rows, width))
+
+    # 매칭 상태 갱신 (기존 행은 매칭상품_상품명 컬럼만 새 값으로)
+    if match_idx is not None:
+        for i in range(row_count):
+            refreshed[i + 1][match_idx] = matches[i] if i < len(matches) else ''
+
+    return refreshed
+
+
+def _load_order_rows(session, worksheet, full_refresh=DEFAULT_ORDER_FULL_REFRESH):
+    """
+    시트1 전체 값 (헤더 포함, get_all_values 형식)
+    스프레드시트가 바뀌지 않았으면 스냅샷을 그대로 쓰고 (API 읽기 없음),
+    바뀌었으면 추가된 행과 상품명/매칭 컬럼만 읽어서 갱신하고,
+    full_refresh 초마다 또는 증분 갱신이 불가능하면 전체를 다시 읽는다.
+
+    Returns:
+        list: 전체 값 (헤더 포함)
+    """
+    snapshot = session.snapshots.get('orders')
+    version = session.snapshot_version('orders')
+    now = time.monotonic()
+
+    if (snapshot is not None and now - snapshot['loaded_at'] < full_refresh
+            and session.is_unchanged(snapshot, version)):
+        return snapshot['data']
+
+    data = None
+    if (snapshot is not None and now - snapshot['loaded_at'] < full_refresh
+            and '상품명' in snapshot['data'][0]):
+        data = _refresh_order_rows(session, worksheet, snapshot)
+
+    if data is None:
+        # 전체 데이터 가져오기
+        data = session.call('read', 'get_all_values', worksheet.get_all_values)
+        loaded_at = now
+    else:
+        loaded_at = snapshot['loaded_at']
+
+    if data:
+        session.save_snapshot('orders', data, version, loaded_at=loaded_at)
+    else:
+        session.snapshots.pop('orders', None)
+    return data
+
+
 def load_matching_sheet_orders(client, sheet_name="상품매칭용시트"):
     """
     구글 스프레드시트에서 매칭 안 된 주문 데이터 읽기
     (매칭상품_상품명 컬럼이 비어있는 행만 반환)
 
+    SheetSession 을 넘기면 이전 결과를 기억해 두고 다음 호출에서는
+    추가된 행과 상품명/매칭상품_상품명 컬럼만 읽는다 (반환 형식/인덱스는 동일).
+
     Args:
-        client: gspread.Client
+        client: gspread.Client 또는 SheetSession
         sheet_name: 스프레드시트 이름
 
     Returns:
-        pd.DataFrame: 주문 데이터 (상품명 컬럼 포함, 매칭 안 된 행만)
+        pd.DataFrame: 주문 데이터 (상품명 컬럼 포함, 매칭 안 된 행만, 인덱스 = 시트 행 번호 - 2)
     """
     try:
-        spreadsheet = client.open(sheet_name)
-        worksheet = spreadsheet.worksheet("시트1")  # 시트1에서 읽기
+        session = sheet_session(client, sheet_name)
+        worksheet = session.worksheet("시트1")  # 시트1에서 읽기
 
-        # 전체 데이터 가져오기
-        data = worksheet.get_all_values()
+        data = _load_order_rows(session, worksheet)
 
         if not data:
             return pd.DataFrame()
 
-        # 헤더와 데이터 분리
+        # 헤더와 데이터 분리 (헤더는 세션에 기록해 다음 쓰기에서 재사용)
         headers = data[0]
         rows = data[1:]
+        session.set_headers(_trim_row(headers), "시트1")
 
         # DataFrame 생성
         df = pd.DataFrame(rows, columns=headers)
@@ -149,7 +299,7 @@ def load_excel_products(file_path, exclude_tabs=None):
     엑셀 파일의 모든 탭에서 상품 데이터 로드
 
     Args:
-        file_path: 엑셀 파일 경로
+        file_path: 엑셀 파일 경로 또는 파일 객체 (BytesIO 등)
         exclude_tabs: 제외할 탭 리스트 (기본: ['월말재고현황'])
 
     Returns:
@@ -188,12 +338,483 @@ def load_excel_products(file_path, exclude_tabs=None):
             excel_file.close()
 
 
+def _convert_xlsx_cell(cell):
+    """
+    openpyxl 셀 값을 pandas read_excel 과 같은 방식으로 변환
+    (빈 셀 → "", 오류 셀 → NaN, 정수로 떨어지는 숫자 → int)
+    """
+    value = cell.value
+    if value is None:
+        return ""
+    if cell.data_type == 'e':
+        return np.nan
+    if cell.data_type == 'n':
+        as_int = int(value)
+        if as_int == value:
+            return as_int
+        return float(value)
+    return value
+
+
+def _excel_header_names(header_row):
+    """pandas read_excel(header=0) 과 같은 컬럼명 생성 (빈 헤더 → Unnamed: n, 중복 → .1)"""
+    if not header_row:
+        return []
+    return list(TextParser([list(header_row)], header=0, skip_blank_lines=False).read().columns)
+
+
+def _projected_positions(header_names):
+    """매칭에 필요한 컬럼 위치 (TabSchema 가 사용하는 컬럼만)"""
+    from src.matcher import resolve_tab_schema
+
+    schema = resolve_tab_schema(header_names)
+    needed = set(schema.columns.values()) | set(schema.exact_columns.values())
+    needed.discard(None)
+    return [i for i, name in enumerate(header_names) if name in needed]
+
+
+def available_cpu_count():
+    """
+    컨테이너 CPU 할당량(cgroup)과 CPU affinity 를 반영한 사용 가능 CPU 수
+
+    Returns:
+        int: 1 이상의 CPU 수
+    """
+    try:
+        count = len(os.sched_getaffinity(0))
+    except AttributeError:
+        count = os.cpu_count() or 1
+
+    quota = None
+    try:
+        # cgroup v2: "할당량 주기" 또는 "max 주기"
+        with open('/sys/fs/cgroup/cpu.max') as f:
+            limit, period = f.read().split()[:2]
+        if limit != 'max':
+            quota = int(limit) / int(period)
+    except (OSError, ValueError):
+        try:
+            # cgroup v1
+            with open('/sys/fs/cgroup/cpu/cpu.cfs_quota_us') as f:
+                limit = int(f.read())
+            with open('/sys/fs/cgroup/cpu/cpu.cfs_period_us') as f:
+                period = int(f.read())
+            if limit > 0 and period > 0:
+                quota = limit / period
+        except (OSError, ValueError):
+            pass
+
+    if quota is not None:
+        count = min(count, int(quota))
+
+    return max(1, count)
+
+
+def _sheet_xml_size(workbook, sheet_name):
+    """시트 XML 의 압축 해제 크기 (작업 분배용, 알 수 없으면 1)"""
+    try:
+        worksheet = workbook[sheet_name]
+        return workbook._archive.getinfo(worksheet._worksheet_path).file_size
+    except Exception:
+        return 1
+
+
+def _parse_sheet_worker(task):
+    """
+    작업 프로세스: 워크북을 읽기 전용으로 한 번 열어 배정된 시트들만 파싱
+
+    Args:
+        task: (원본 경로, 시트명 리스트, project_columns)
+
+    Returns:
+        list: [(시트명, pd.DataFrame), ...]
+    """
+    from openpyxl import load_workbook
+
+    path, sheet_names, project_columns = task
+    workbook = load_workbook(path, read_only=True, data_only=True, keep_links=False)
+    try:
+        return [(name, _read_sheet_streaming(workbook[name], project_columns)) for name in sheet_names]
+    finally:
+        workbook.close()
+
+
+def _balance_sheets(sheet_sizes, workers):
+    """
+    시트 XML 크기 기준으로 작업 프로세스별 시트 묶음 배정 (큰 시트부터 가장 한가한 프로세스에)
+
+    Args:
+        sheet_sizes: [(시트명, 크기), ...] (탭 순서)
+        workers: 프로세스 수
+
+    Returns:
+        list: 프로세스별 시트명 리스트 (각 묶음 안에서는 탭 순서 유지)
+    """
+    loads = [0] * workers
+    groups = [[] for _ in range(workers)]
+    order = {name: i for i, (name, _) in enumerate(sheet_sizes)}
+
+    for name, size in sorted(sheet_sizes, key=lambda x: -x[1]):
+        target = loads.index(min(loads))
+        groups[target].append(name)
+        loads[target] += size
+
+    return [sorted(group, key=order.get) for group in groups if group]
+
+
+def _parse_sheets_parallel(source, sheet_sizes, project_columns, workers):
+    """
+    시트별 병렬 파싱 (결과는 sheet_sizes 의 탭 순서 그대로)
+
+    Streamlit 서버는 여러 스레드(쓰기 큐, 썸네일 풀 등)가 잠금을 잡고 있을 수 있어
+    fork 대신 forkserver/spawn 프로세스를 쓴다. 파일 객체는 임시 파일로 복사해 경로로 넘긴다.
+    작업 프로세스를 띄우지 못하면 None 을 반환한다 (호출 측에서 순차 처리).
+    """
+    import multiprocessing
+    import shutil
+    import tempfile
+    from concurrent.futures import ProcessPoolExecutor
+
+    if 'forkserver' in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context('forkserver')
+        # forkserver 가 이 모듈을 미리 import 해 두면 작업 프로세스 시작이 빠름 (서버 시작 전에만 적용)
+        context.set_forkserver_preload(['src.utils'])
+    else:
+        context = multiprocessing.get_context('spawn')
+
+    temp_path = None
+    try:
+        if isinstance(source, (str, os.PathLike)):
+            path = os.fspath(source)
+        else:
+            # 업로드 파일은 디스크로 복사 (메모리에 한 번 더 올리지 않고 스트리밍)
+            source.seek(0)
+            fd, temp_path = tempfile.mkstemp(suffix='.xlsx')
+            with os.fdopen(fd, 'wb') as f:
+                shutil.copyfileobj(source, f, 1024 * 1024)
+            source.seek(0)
+            path = temp_path
+
+        groups = _balance_sheets(sheet_sizes, workers)
+        tasks = [(path, group, project_columns) for group in groups]
+
+        parsed = {}
+        with ProcessPoolExecutor(max_workers=len(tasks), mp_context=context) as executor:
+            for result in executor.map(_parse_sheet_worker, tasks):
+                parsed.update(result)
+    except Exception as e:
+        print(f"병렬 파싱 실패, 순차 처리: {str(e)}")
+        return None
+    finally:
+        if temp_path is not None:
+            try:
+                os.unlink(temp_path)
+            except OSError:
+                pass
+
+    # 원래 탭 순서대로 병합
+    return [parsed[name] for name, _ in sheet_sizes]
+
+
+def load_excel_products_streaming(source, exclude_tabs=None, project_columns=True, workers=1):
+    """
+    엑셀(.xlsx, .xlsm) 파일을 읽기 전용 스트리밍 방식으로 로드
+    - 원본 zip 에서 시트 XML 만 읽음 (xl/media/, xl/drawings/ 는 열지 않음 → 이미지 제거 불필요)
+    - project_columns=True 면 매칭에 필요한 컬럼(TabSchema)만 보관해 메모리 사용량 최소화
+    - workers > 1 이면 시트별로 프로세스 풀에서 병렬 파싱 (탭 순서는 그대로 유지)
+    - 값/자료형은 load_excel_products(pd.read_excel)와 동일
+
+    Args:
+        source: 엑셀 파일 경로 또는 파일 객체 (BytesIO, Streamlit 업로드 파일)
+        exclude_tabs: 제외할 탭 리스트 (기본: ['월말재고현황'])
+        project_columns: True면 매칭에 필요한 컬럼만 로드
+            (상품명 컬럼이 없는 탭은 결과에서 제외됨)
+        workers: 병렬 파싱 프로세스 수 (1: 순차, None: 컨테이너 CPU 할당량 기준 자동)
+
+    Returns:
+        dict: {탭명: DataFrame} 형태
+    """
+    from openpyxl import load_workbook
+
+    if exclude_tabs is None:
+        exclude_tabs = ['월말재고현황']
+
+    workbook = None
+    try:
+        workbook = load_workbook(source, read_only=True, data_only=True, keep_links=False)
+
+        # 제외할 탭은 건너뛰기
+        sheet_names = [name for name in workbook.sheetnames if name not in exclude_tabs]
+
+        if workers is None:
+            workers = available_cpu_count()
+        workers = min(workers, len(sheet_names))
+
+        frames = None
+        if workers > 1:
+            sheet_sizes = [(name, _sheet_xml_size(workbook, name)) for name in sheet_names]
+
+            # 작업 프로세스가 각자 워크북을 열도록 부모 핸들은 먼저 닫기
+            workbook.close()
+            workbook = None
+            frames = _parse_sheets_parallel(source, sheet_sizes, project_columns, workers)
+
+            if frames is None:
+                workbook = load_workbook(source, read_only=True, data_only=True, keep_links=False)
+
+        if frames is None:
+            frames = [_read_sheet_streaming(workbook[name], project_columns) for name in sheet_names]
+
+        products = {}
+
+        for sheet_name, df in zip(sheet_names, frames):
+            # 빈 데이터프레임은 제외
+            if not df.empty:
+                products[sheet_name] = df
+
+        return products
+
+    except Exception as e:
+        raise Exception(f"엑셀 파일 로드 오류: {str(e)}")
+    finally:
+        # 읽기 전용 모드는 zip 핸들을 유지하므로 명시적으로 닫기
+        if workbook is not None:
+            workbook.close()
+
+
+def _sequence_digest(values):
+    """값 목록의 SHA-256 (공유 문자열/스타일 표가 앞부분 그대로인지 비교용)"""
+    digest = hashlib.sha256()
+    for value in values:
+        digest.update(str(value).encode('utf-8', 'surrogatepass'))
+        digest.update(b'\x00')
+    return digest.hexdigest()
+
+
+def _style_flags(workbook):
+    """셀 스타일 번호별 (날짜 서식 여부, 시간 간격 서식 여부) - 읽기 전용 워크북의 값 변환 기준"""
+    return [
+        (i in workbook._date_formats, i in workbook._timedelta_formats)
+        for i in range(len(workbook._cell_styles))
+    ]
+
+
+def _workbook_fingerprints(workbook, sheet_names, exclude_tabs, project_columns):
+    """
+    읽기 전용 워크북의 시트별 지문
+
+    시트 XML 은 zip 중앙 디렉토리의 CRC/크기를 그대로 사용하므로 압축 해제가 필요 없다.
+    시트 XML 이 같아도 공유 문자열 표나 날짜 서식 스타일이 바뀌면 값이 달라질 수 있어
+    두 표도 함께 기록한다 (Excel 은 보통 뒤에 추가만 하므로 앞부분 비교).
+    """
+    sheets = {}
+    for name in sheet_names:
+        try:
+            worksheet = workbook[name]
+            info = workbook._archive.getinfo(worksheet._worksheet_path)
+            sheets[name] = (worksheet._worksheet_path, info.CRC, info.file_size)
+        except Exception:
+            # 지문을 알 수 없는 시트는 항상 다시 파싱
+            sheets[name] = None
+
+    strings = workbook.shared_strings
+    styles = _style_flags(workbook)
+
+    return {
+        'options': (tuple(sorted(exclude_tabs)), bool(project_columns), str(workbook.epoch)),
+        'sheets': sheets,
+        'strings': (len(strings), _sequence_digest(strings)),
+        'styles': (len(styles), _sequence_digest(styles)),
+    }
+
+
+def _is_prefix_table(previous, values):
+    """이전 표(개수, 해시)가 새 표의 앞부분과 같은지 확인"""
+    count, digest = previous
+    return len(values) >= count and _sequence_digest(values[:count]) == digest
+
+
+def load_excel_fingerprints(source, exclude_tabs=None, project_columns=True):
+    """
+    엑셀(.xlsx, .xlsm) 파일의 시트별 지문만 계산 (시트 XML 은 읽지 않음)
+
+    Args:
+        source: 엑셀 파일 경로 또는 파일 객체
+        exclude_tabs: 제외할 탭 리스트 (기본: ['월말재고현황'])
+        project_columns: load_excel_products_streaming 에 넘긴 값과 같게
+
+    Returns:
+        dict: refresh_excel_products_streaming 에 넘길 지문
+    """
+    from openpyxl import load_workbook
+
+    if exclude_tabs is None:
+        exclude_tabs = ['월말재고현황']
+
+    workbook = None
+    try:
+        workbook = load_workbook(source, read_only=True, data_only=True, keep_links=False)
+        sheet_names = [name for name in workbook.sheetnames if name not in exclude_tabs]
+        return _workbook_fingerprints(workbook, sheet_names, exclude_tabs, project_columns)
+    except Exception as e:
+        raise Exception(f"엑셀 지문 계산 오류: {str(e)}")
+    finally:
+        if workbook is not None:
+            workbook.close()
+
+
+def refresh_excel_products_streaming(source, previous_data, previous_fingerprints,
+                                     exclude_tabs=None, project_columns=True):
+    """
+    다시 업로드한 엑셀 파일에서 바뀐 시트만 다시 파싱
+    - 시트 XML 지문(CRC/크기)이 같은 탭은 이전 DataFrame 을 그대로 재사용
+    - 공유 문자열/날짜 스타일 표가 앞부분까지 바뀌었거나 옵션이 다르면 전체 다시 파싱
+
+    Args:
+        source: 새 엑셀 파일 경로 또는 파일 객체
+        previous_data: 이전 결과 {탭명: DataFrame}
+        previous_fingerprints: 이전 파일의 지문 (없으면 전체 파싱)
+        exclude_tabs: 제외할 탭 리스트 (기본: ['월말재고현황'])
+        project_columns: True면 매칭에 필요한 컬럼만 로드
+
+    Returns:
+        tuple: ({탭명: DataFrame}, 새 지문, 갱신 결과)
+            갱신 결과: {'added': [...], 'updated': [...], 'removed': [...], 'unchanged': [...]}
+    """
+    from openpyxl import load_workbook
+
+    if exclude_tabs is None:
+        exclude_tabs = ['월말재고현황']
+
+    workbook = None
+    try:
+        workbook = load_workbook(source, read_only=True, data_only=True, keep_links=False)
+        sheet_names = [name for name in workbook.sheetnames if name not in exclude_tabs]
+        fingerprints = _workbook_fingerprints(workbook, sheet_names, exclude_tabs, project_columns)
+
+        previous_sheets = {}
+        if (
+            previous_fingerprints
+            and previous_fingerprints['options'] == fingerprints['options']
+            and _is_prefix_table(previous_fingerprints['strings'], workbook.shared_strings)
+            and _is_prefix_table(previous_fingerprints['styles'], _style_flags(workbook))
+        ):
+            previous_sheets = previous_fingerprints['sheets']
+
+        report = {'added': [], 'updated': [], 'removed': [], 'unchanged': []}
+        products = {}
+
+        for sheet_name in sheet_names:
+            fingerprint = fingerprints['sheets'][sheet_name]
+
+            if fingerprint is not None and previous_sheets.get(sheet_name) == fingerprint:
+                # 빈 탭은 이전 결과에도 없으므로 그대로 제외
+                if sheet_name in previous_data:
+                    products[sheet_name] = previous_data[sheet_name]
+                report['unchanged'].append(sheet_name)
+                continue
+
+            df = _read_sheet_streaming(workbook[sheet_name], project_columns)
+            if not df.empty:
+                products[sheet_name] = df
+            if previous_fingerprints and sheet_name in previous_fingerprints['sheets']:
+                report['updated'].append(sheet_name)
+            else:
+                report['added'].append(sheet_name)
+
+        if previous_fingerprints:
+            report['removed'] = [name for name in previous_fingerprints['sheets'] if name not in fingerprints['sheets']]
+
+        return products, fingerprints, report
+
+    except Exception as e:
+        raise Exception(f"엑셀 파일 갱신 오류: {str(e)}")
+    finally:
+        if workbook is not None:
+            workbook.close()
+
+
+def _read_sheet_streaming(worksheet, project_columns=True):
+    """
+    시트 하나를 행 단위로 읽어 DataFrame 생성 (1행이 헤더)
+
+    Args:
+        worksheet: openpyxl ReadOnlyWorksheet
+        project_columns: True면 TabSchema 가 사용하는 컬럼만 보관
+
+    Returns:
+        pd.DataFrame
+    """
+    if not hasattr(worksheet, 'reset_dimensions'):
+        # 차트 시트 등 셀이 없는 시트
+        return pd.DataFrame()
+
+    worksheet.reset_dimensions()
+    rows = worksheet.rows
+
+    header_cells = next(rows, None)
+    if header_cells is None:
+        return pd.DataFrame()
+
+    header_row = [_convert_xlsx_cell(cell) for cell in header_cells]
+    while header_row and header_row[-1] == "":
+        header_row.pop()
+    header_names = _excel_header_names(header_row)
+
+    if project_columns:
+        positions = _projected_positions(header_names)
+    else:
+        positions = None
+
+    data = []
+    last_row_with_data = -1
+    width = len(header_names)
+
+    for row_number, cells in enumerate(rows):
+        # 전체 컬럼 기준으로 데이터 유무 판단 (pandas 의 끝부분 빈 행 제거와 동일)
+        has_data = any(cell.value is not None and cell.value != "" for cell in cells)
+        if has_data:
+            last_row_with_data = row_number
+
+        if positions is None:
+            # 행 끝의 빈 셀은 버림 (서식만 있는 셀로 Unnamed 컬럼이 생기지 않도록, read_excel 과 동일)
+            converted = [_convert_xlsx_cell(cell) for cell in cells]
+            while converted and converted[-1] == "":
+                converted.pop()
+            width = max(width, len(converted))
+        else:
+            converted = [
+                _convert_xlsx_cell(cells[i]) if i < len(cells) else ""
+                for i in positions
+            ]
+        data.append(converted)
+
+    # 끝부분 빈 행 제거
+    data = data[: last_row_with_data + 1]
+
+    if positions is None:
+        # 헤더보다 긴 행이 있으면 pandas 와 같이 Unnamed 컬럼 추가
+        header_names = _excel_header_names(header_row + [""] * (width - len(header_row)))
+        data = [row + [""] * (width - len(row)) for row in data]
+        names = header_names
+    else:
+        names = [header_names[i] for i in positions]
+
+    if not names:
+        return pd.DataFrame()
+
+    if not data:
+        return pd.DataFrame(columns=names)
+
+    return TextParser(data, header=None, names=names, skip_blank_lines=False).read()
+
+
 def update_matching_result(client, sheet_name, row_index, matched_data, match_type="수동매칭"):
     """
     매칭 결과를 시트1에 업데이트
 
     Args:
-        client: gspread.Client
+        client: gspread.Client 또는 SheetSession
         sheet_name: 스프레드시트 이름
         row_index: 업데이트할 행 번호 (1-based)
         matched_data: 매칭된 데이터 딕셔너리
@@ -231,19 +852,15 @@ def get_matching_sheet_headers(client, sheet_name="상품매칭용시트"):
     스프레드시트의 헤더 정보 가져오기
 
     Args:
-        client: gspread.Client
+        client: gspread.Client 또는 SheetSession
         sheet_name: 스프레드시트 이름
 
     Returns:
         list: 헤더 리스트
     """
     try:
-        spreadsheet = client.open(sheet_name)
-        worksheet = spreadsheet.worksheet("시트1")
-
-        # 첫 번째 행 (헤더) 가져오기
-        headers = worksheet.row_values(1)
-        return headers
+        # 첫 번째 행 (헤더) 가져오기 (세션이면 캐시된 헤더 사용)
+        return sheet_session(client, sheet_name).headers("시트1")
 
     except Exception as e:
         print(f"헤더 가져오기 오류: {str(e)}")
@@ -255,63 +872,340 @@ def get_spreadsheet_url(client, sheet_name="상품매칭용시트"):
     스프레드시트 URL 가져오기
 
     Args:
-        client: gspread.Client
+        client: gspread.Client 또는 SheetSession
         sheet_name: 스프레드시트 이름
 
     Returns:
         str: 스프레드시트 URL 또는 None
     """
     try:
-        spreadsheet = client.open(sheet_name)
-        return spreadsheet.url
+        return sheet_session(client, sheet_name).url
 
     except Exception as e:
         print(f"URL 가져오기 오류: {str(e)}")
         return None
 
 
-def batch_update_matching_results(client, sheet_name, matched_results):
+# 매칭 결과를 쓰는 컬럼 (시트에 없으면 헤더 끝에 순서대로 추가)
+MATCHING_COLUMNS = ['매칭상품_상품명', '매칭_매입', '매칭_매출', '매칭_매입(업체)', '매칭_탭', '매칭_옵션', '매칭방식']
+
+# 기존 값 확인용 읽기: 대상 행 간격이 이 이하면 한 범위로 합쳐 읽기
+_READ_ROW_GAP = 20
+# batch_get 한 번에 보낼 범위 수 (요청 URL 길이 제한)
+_READ_RANGES_PER_CALL = 100
+# spreadsheets.batchUpdate 한 번에 보낼 최대 요청 수 / 본문 크기
+_MAX_BATCH_REQUESTS = 1000
+_MAX_BATCH_BYTES = 2 * 1024 * 1024
+# updateCells 하나에 담을 최대 행 수 (큰 블록도 나눠 보낼 수 있도록)
+_MAX_BLOCK_ROWS = 500
+
+# 서식 (배경색/글자색)
+_SOLDOUT_ROW_FORMAT = {
+    'backgroundColor': {'red': 1.0, 'green': 0.8, 'blue': 0.8}
+}
+_SOLDOUT_TAB_FORMAT = {
+    'backgroundColor': {'red': 1.0, 'green': 0.0, 'blue': 0.0},
+    'textFormat': {'foregroundColor': {'red': 1.0, 'green': 1.0, 'blue': 1.0}, 'bold': True}
+}
+_OPTION_VALUE_FORMAT = {
+    'backgroundColor': {'red': 1.0, 'green': 1.0, 'blue': 0.8}
+}
+_OPTION_EMPTY_FORMAT = {
+    'backgroundColor': {'red': 1.0, 'green': 1.0, 'blue': 1.0}
+}
+
+
+def _clean_number(value):
+    """숫자 값에서 .0 소수점 제거"""
+    if not value or value == '':
+        return ''
+    try:
+        # 숫자로 변환 시도
+        num = float(str(value))
+        # 정수면 .0 제거
+        if num.is_integer():
+            return str(int(num))
+        return str(value)
+    except:
+        return str(value)
+
+
+def _runs(numbers, max_gap=1):
+    """
+    정수 목록 → 구간 [(시작, 끝), ...] (간격이 max_gap 이하인 값은 한 구간)
+    """
+    runs = []
+    for number in sorted(set(numbers)):
+        if runs and number - runs[-1][1] <= max_gap:
+            runs[-1][1] = number
+        else:
+            runs.append([number, number])
+    return [tuple(run) for run in runs]
+
+
+def _payload_bytes(body):
+    """요청 본문 크기 (JSON 인코딩 기준)"""
+    return len(json.dumps(body, ensure_ascii=False).encode('utf-8'))
+
+
+def _read_cells(session, worksheet, columns, rows, report):
+    """
+    지정한 열/행만 batch_get 으로 읽기 (시트 전체를 내려받지 않음)
+
+    Args:
+        session: SheetSession (호출 스케줄링용)
+        worksheet: gspread.Worksheet
+        columns: 읽을 열 번호 목록 (1-based)
+        rows: 읽을 행 번호 목록 (1-based)
+        report: API 호출 통계 dict (호출 수/범위 수 누적)
+
+    Returns:
+        dict: {(행, 열): 값} (비어있지 않은 셀만)
+    """
+    ranges = []
+    origins = []
+    for row_start, row_end in _runs(rows, _READ_ROW_GAP):
+        for col_start, col_end in _runs(columns):
+            ranges.append(f'{rowcol_to_a1(row_start, col_start)}:{rowcol_to_a1(row_end, col_end)}')
+            origins.append((row_start, col_start))
+
+    cells = {}
+    for start in range(0, len(ranges), _READ_RANGES_PER_CALL):
+        chunk = ranges[start:start + _READ_RANGES_PER_CALL]
+        value_ranges = session.call('read', 'batch_get', worksheet.batch_get, chunk, priority=PRIORITY_BULK)
+        report['api_calls'] += 1
+        report['read_ranges'] += len(chunk)
+
+        # 응답은 범위 왼쪽 위 셀 기준 (뒤쪽 빈 행/열은 잘려서 옴)
+        for (row_start, col_start), values in zip(origins[start:start + _READ_RANGES_PER_CALL], value_ranges):
+            for row_offset, row_values in enumerate(values):
+                for col_offset, value in enumerate(row_values):
+                    if str(value).strip():
+                        cells[(row_start + row_offset, col_start + col_offset)] = value
+
+    return cells
+
+
+def _value_blocks(row_cells):
+    """
+    행별 쓸 셀 → 직사각형 블록 목록
+    - 한 행에서 연속된 열은 한 블록으로 묶기 (값이 있어 건너뛴 셀에서 끊김)
+    - 바로 아래 행의 열 구간이 같으면 여러 행을 한 블록으로 합치기
+
+    Args:
+        row_cells: {행 번호: {열 번호: 값}} (1-based)
+
+    Returns:
+        list: [(시작 행, 시작 열, [[값, ...], ...]), ...] (1-based)
+    """
+    blocks = []  # [시작 행, 끝 행, 열 구간 tuple, [행별 값 리스트]]
+    for row_idx in sorted(row_cells):
+        cells = row_cells[row_idx]
+        if not cells:
+            continue
+
+        spans = tuple(_runs(cells))
+        values = [[cells[col] for col in range(col_start, col_end + 1)] for col_start, col_end in spans]
+
+        last = blocks[-1] if blocks else None
+        if last is not None and last[1] == row_idx - 1 and last[2] == spans:
+            last[1] = row_idx
+            last[3].append(values)
+        else:
+            blocks.append([row_idx, row_idx, spans, [values]])
+
+    return [
+        (row_start, col_start, [row_values[span_pos] for row_values in rows])
+        for row_start, _, spans, rows in blocks
+        for span_pos, (col_start, _) in enumerate(spans)
+    ]
+
+
+def _update_cells_request(sheet_id, row_start, col_start, values):
+    """값 블록 → updateCells 요청 (RAW 입력과 같이 문자열 그대로 저장)"""
+    return {
+        'updateCells': {
+            'start': {'sheetId': sheet_id, 'rowIndex': row_start - 1, 'columnIndex': col_start - 1},
+            'rows': [
+                {'values': [{'userEnteredValue': {'stringValue': str(value)}} for value in row_values]}
+                for row_values in values
+            ],
+            'fields': 'userEnteredValue'
+        }
+    }
+
+
+def _repeat_cell_request(sheet_id, row_start, row_end, col_start, col_end, cell_format, fields):
+    """행/열 구간(1-based, 끝 포함) 서식 → repeatCell 요청"""
+    return {
+        'repeatCell': {
+            'range': {
+                'sheetId': sheet_id,
+                'startRowIndex': row_start - 1,
+                'endRowIndex': row_end,
+                'startColumnIndex': col_start - 1,
+                'endColumnIndex': col_end
+            },
+            'cell': {'userEnteredFormat': cell_format},
+            'fields': fields
+        }
+    }
+
+
+def _soldout_format_requests(sheet_id, soldout_rows, total_columns):
+    """
+    품절 탭 행 서식 요청 (이웃한 행은 범위 하나로)
+    - 전체 행: 연한 빨간색 배경 (#ffcccc)
+    - 매칭_탭 셀: 강한 빨간색 배경 (#ff0000) + 흰색 텍스트
+    """
+    requests = []
+
+    for row_start, row_end in _runs(info['row_idx'] for info in soldout_rows):
+        requests.append(_repeat_cell_request(
+            sheet_id, row_start, row_end, 1, total_columns,
+            _SOLDOUT_ROW_FORMAT, 'userEnteredFormat.backgroundColor'
+        ))
+
+    tab_rows = {}
+    for info in soldout_rows:
+        tab_rows.setdefault(info['tab_col_idx'], []).append(info['row_idx'])
+    for tab_col_idx, rows in tab_rows.items():
+        for row_start, row_end in _runs(rows):
+            requests.append(_repeat_cell_request(
+                sheet_id, row_start, row_end, tab_col_idx, tab_col_idx,
+                _SOLDOUT_TAB_FORMAT, 'userEnteredFormat(backgroundColor,textFormat)'
+            ))
+
+    return requests
+
+
+def _option_format_requests(sheet_id, option_rows):
+    """
+    옵션 셀 서식 요청 (같은 서식의 이웃한 행은 범위 하나로)
+    - 값이 없으면 (X): 흰색 배경
+    - 값이 있으면: 연한 노랑 배경 (#ffffcc)
+    """
+    # 같은 셀이 여러 번 오면 마지막 값 기준
+    states = {}
+    for info in option_rows:
+        states[(info['option_col_idx'], info['row_idx'])] = info['has_value']
+
+    groups = {}
+    for (option_col_idx, row_idx), has_value in states.items():
+        groups.setdefault((option_col_idx, has_value), []).append(row_idx)
+
+    requests = []
+    for (option_col_idx, has_value), rows in groups.items():
+        cell_format = _OPTION_VALUE_FORMAT if has_value else _OPTION_EMPTY_FORMAT
+        for row_start, row_end in _runs(rows):
+            requests.append(_repeat_cell_request(
+                sheet_id, row_start, row_end, option_col_idx, option_col_idx,
+                cell_format, 'userEnteredFormat.backgroundColor'
+            ))
+
+    return requests
+
+
+def _chunk_requests(requests, max_requests=_MAX_BATCH_REQUESTS, max_bytes=_MAX_BATCH_BYTES):
+    """
+    batchUpdate 요청 목록을 개수/크기 제한에 맞춰 순서대로 나누기
+
+    Returns:
+        list: [(요청 리스트, 본문 크기), ...]
+    """
+    chunks = []
+    current = []
+    current_bytes = 0
+
+    for request in requests:
+        size = _payload_bytes(request) + 1
+        if current and (len(current) >= max_requests or current_bytes + size > max_bytes):
+            chunks.append((current, current_bytes))
+            current = []
+            current_bytes = 0
+        current.append(request)
+        current_bytes += size
+
+    if current:
+        chunks.append((current, current_bytes))
+    return chunks
+
+
+def _append_columns(session, worksheet, count, report):
+    """
+    시트 끝에 열 추가 (appendDimension 은 멱등이 아니라 값/서식 batchUpdate 와 따로 전송)
+
+    5xx/네트워크 오류는 이미 반영됐을 수 있으므로 재시도하지 않고,
+    세션 캐시를 비워 다음 시도에서 시트 열 수/헤더를 다시 읽은 뒤 판단하게 한다.
+    """
+    body = {'requests': [{
+        'appendDimension': {
+            'sheetId': worksheet.id,
+            'dimension': 'COLUMNS',
+            'length': count
+        }
+    }]}
+    try:
+        session.call('write', 'append_columns', worksheet.spreadsheet.batch_update, body,
+                     priority=PRIORITY_BULK, idempotent=False)
+    except Exception:
+        session.invalidate()
+        raise
+    finally:
+        report['api_calls'] += 1
+        report['payload_bytes'] += _payload_bytes(body)
+
+
+def batch_update_matching_results(client, sheet_name, matched_results, report=None):
     """
     여러 매칭 결과를 시트1에 일괄 업데이트 (API 호출 최소화)
+    - 기존 값은 매칭 컬럼 × 대상 행 범위만 batch_get 으로 확인
+    - 값이 있는 셀은 덮어쓰지 않음 (매칭상품_상품명이 있는 행은 통째로 건너뜀)
+    - 행마다 연속된 셀을 한 범위로, 이웃한 행은 한 블록으로 묶어서 쓰기
+    - 헤더/값(updateCells)과 서식(repeatCell)을 spreadsheets.batchUpdate 한 번에 전송
+      (요청이 크면 순서를 유지한 채 여러 번으로 나눔)
 
     Args:
-        client: gspread.Client
+        client: gspread.Client 또는 SheetSession
         sheet_name: 스프레드시트 이름
         matched_results: 매칭 결과 리스트
             [
                 {
                     'row_index': int (1-based),
                     'data': {...},  # matched_data
-                    'match_type': str
+                    'match_type': str,
+                    'order_name': str  # 선택, 있으면 그 행의 상품명이 같을 때만 반영
                 },
                 ...
             ]
+        report: API 호출 통계를 받을 dict (선택)
+            {'api_calls', 'read_ranges', 'write_ranges', 'format_ranges', 'payload_bytes',
+             'mismatched': 상품명이 달라 건너뛴 행 번호 리스트}
+            (실패하면 'error' 에 오류 메시지, 'retryable' 에 다시 시도할 만한 오류인지)
 
     Returns:
         int: 성공한 업데이트 개수
     """
+    if report is None:
+        report = {}
+    report.update({'api_calls': 0, 'read_ranges': 0, 'write_ranges': 0, 'format_ranges': 0, 'payload_bytes': 0,
+                   'mismatched': []})
+
     if not matched_results:
         return 0
 
+    columns_appended = False
     try:
-        spreadsheet = client.open(sheet_name)
-        worksheet = spreadsheet.worksheet("시트1")
+        session = sheet_session(client, sheet_name)
+        worksheet = session.worksheet("시트1")
 
-        # 헤더 확인 및 필요 시 추가
-        headers = worksheet.row_values(1)
+        # 헤더 확인 및 필요 시 추가 (세션에 캐시된 헤더 사용, 스프레드시트가 바뀌었을 때만 다시 읽음)
+        headers = session.headers("시트1")
+        header_count = len(headers)
 
         # 매칭 컬럼 찾기 또는 추가
-        matching_columns = {
-            '매칭상품_상품명': None,
-            '매칭_매입': None,
-            '매칭_매출': None,
-            '매칭_매입(업체)': None,
-            '매칭_탭': None,
-            '매칭_옵션': None,
-            '매칭방식': None
-        }
-
-        for col_name in matching_columns.keys():
+        matching_columns = {}
+        for col_name in MATCHING_COLUMNS:
             try:
                 matching_columns[col_name] = headers.index(col_name) + 1  # 1-based
             except ValueError:
@@ -319,24 +1213,41 @@ def batch_update_matching_results(client, sheet_name, matched_results):
                 matching_columns[col_name] = len(headers) + 1
                 headers.append(col_name)
 
-        # 헤더 업데이트 (새 컬럼이 추가된 경우)
-        if len(headers) > len(worksheet.row_values(1)):
-            worksheet.update(f'A1:{chr(64 + len(headers))}1', [headers])
+        # 헤더 업데이트 (새 컬럼이 추가된 경우, 값/서식과 같은 batchUpdate 로 전송)
+        sheet_id = worksheet.id
+        header_requests = []
+        if len(headers) > header_count:
+            # 시트 열 수가 모자라면 먼저 열 추가
+            # (다시 보내면 열이 또 늘어나므로 따로 보내고 429 만 재시도)
+            if len(headers) > worksheet.col_count:
+                _append_columns(session, worksheet, len(headers) - worksheet.col_count, report)
+                columns_appended = True
+            new_headers = headers[header_count:]
+            header_requests.append(_update_cells_request(sheet_id, 1, header_count + 1, [new_headers]))
+
+        # 주문 확인용 상품명 (결과를 넣은 뒤 행이 밀리거나 삭제됐으면 다른 주문에 쓰지 않도록)
+        expected_names = {
+            result['row_index']: str(result['order_name']).strip()
+            for result in matched_results
+            if result.get('order_name') is not None
+        }
+        name_col = headers.index('상품명') + 1 if '상품명' in headers[:header_count] else None
 
-        # 기존 데이터 한 번에 가져오기
-        all_data = worksheet.get_all_values()
-        existing_matched = set()
+        # 기존 값은 매칭 컬럼 × 대상 행만 읽기 (방금 추가한 컬럼은 비어있으므로 제외, 상품명 열도 같은 호출로)
+        target_rows = [result['row_index'] for result in matched_results]
+        read_columns = [col for col in matching_columns.values() if col <= header_count]
+        if expected_names and name_col is not None:
+            read_columns.append(name_col)
+        existing_cells = {}
+        if read_columns:
+            existing_cells = _read_cells(session, worksheet, read_columns, target_rows, report)
 
-        for i, row in enumerate(all_data):
-            if i > 0:  # 헤더 제외
-                # 매칭상품_상품명 컬럼에 값이 있으면 이미 매칭됨
-                matched_col_idx = matching_columns['매칭상품_상품명'] - 1
-                if len(row) > matched_col_idx and row[matched_col_idx].strip():
-                    existing_matched.add(i + 1)  # 1-based index
+        # 매칭상품_상품명 컬럼에 값이 있으면 이미 매칭됨
+        matched_col = matching_columns['매칭상품_상품명']
+        existing_matched = {row for row, col in existing_cells if col == matched_col}
 
         # 일괄 업데이트 데이터 준비
-        updates = []
-        format_requests = []
+        row_cells = {}  # 행 번호 → {열 번호: 값}
         soldout_rows = []  # 품절 탭 행 추적
         option_rows = []  # 옵션 행 추적 (서식 적용용)
         success_count = 0
@@ -344,6 +1255,12 @@ def batch_update_matching_results(client, sheet_name, matched_results):
         for result in matched_results:
             row_idx = result['row_index']
 
+            # 행의 주문이 바뀌었으면 건너뛰기 (호출한 쪽에서 확인하도록 기록)
+            expected = expected_names.get(row_idx)
+            if expected is not None and str(existing_cells.get((row_idx, name_col), '')).strip() != expected:
+                report['mismatched'].append(row_idx)
+                continue
+
             # 이미 매칭된 행은 건너뛰기
             if row_idx in existing_matched:
                 continue
@@ -351,43 +1268,20 @@ def batch_update_matching_results(client, sheet_name, matched_results):
             data = result['data']
             match_type = result.get('match_type', '수동매칭')
             tab_name = data.get('탭', '')
-
-            # 현재 행의 데이터 가져오기 (안전한 인덱싱)
-            current_row_data = []
-            if row_idx <= len(all_data):
-                current_row_data = all_data[row_idx - 1]
-
-            def clean_number(value):
-                """숫자 값에서 .0 소수점 제거"""
-                if not value or value == '':
-                    return ''
-                try:
-                    # 숫자로 변환 시도
-                    num = float(str(value))
-                    # 정수면 .0 제거
-                    if num.is_integer():
-                        return str(int(num))
-                    return str(value)
-                except:
-                    return str(value)
+            cells = row_cells.setdefault(row_idx, {})
 
             def safe_add_update(col_name, value):
                 col_idx = matching_columns[col_name]
-                # 0-based index for list access
-                list_idx = col_idx - 1
 
                 # 이미 값이 있는지 확인 (값이 있으면 업데이트 하지 않음)
-                if list_idx < len(current_row_data) and current_row_data[list_idx].strip():
+                if (row_idx, col_idx) in existing_cells:
                     return
 
                 # 숫자 필드는 소수점 제거
                 if col_name in ['매칭_매입', '매칭_매출']:
-                    value = clean_number(value)
+                    value = _clean_number(value)
 
-                updates.append({
-                    'range': f'{chr(64 + col_idx)}{row_idx}',
-                    'values': [[value]]
-                })
+                cells[col_idx] = value
 
             # 각 컬럼별로 업데이트 (값이 없는 경우에만)
             safe_add_update('매칭상품_상품명', data.get('상품명', ''))
@@ -424,164 +1318,86 @@ def batch_update_matching_results(client, sheet_name, matched_results):
 
             success_count += 1
 
-        # 일괄 업데이트 실행
-        if updates:
-            worksheet.batch_update(updates)
-
-        # 품절 탭 서식 적용
-        if soldout_rows:
-            _apply_soldout_formatting(worksheet, soldout_rows, len(headers))
-
-        # 옵션 서식 적용
-        if option_rows:
-            _apply_option_formatting(worksheet, option_rows)
+        # 값 → 품절 서식 → 옵션 서식 순서 (옵션 셀은 품절 행 배경보다 나중에 적용)
+        value_requests = [
+            _update_cells_request(sheet_id, row_start + offset, col_start, values[offset:offset + _MAX_BLOCK_ROWS])
+            for row_start, col_start, values in _value_blocks(row_cells)
+            for offset in range(0, len(values), _MAX_BLOCK_ROWS)
+        ]
+        format_requests = (
+            _soldout_format_requests(sheet_id, soldout_rows, len(headers))
+            + _option_format_requests(sheet_id, option_rows)
+        )
 
+        # 일괄 업데이트 실행 (크기 제한에 맞춰 나눠서 순서대로)
+        for requests, size in _chunk_requests(header_requests + value_requests + format_requests):
+            session.call('write', 'batch_update', worksheet.spreadsheet.batch_update,
+                         {'requests': requests}, priority=PRIORITY_BULK)
+            report['api_calls'] += 1
+            report['payload_bytes'] += size
+
+        if header_requests:
+            session.set_headers(headers, "시트1")
+        report['write_ranges'] = len(value_requests) + (1 if header_requests else 0)
+        report['format_ranges'] = len(format_requests)
         return success_count
 
     except Exception as e:
+        # 열은 추가됐는데 헤더/값 쓰기가 실패하면 캐시된 열 수/헤더가 예전 그대로라
+        # 다시 시도할 때 열을 또 추가하게 됨 → 다음 시도에서 시트 상태를 다시 읽도록 비움
+        if columns_appended:
+            session.invalidate()
         print(f"일괄 업데이트 오류: {str(e)}")
+        report['error'] = str(e)
+        report['retryable'] = is_retryable_error(e)
         return 0
 
 
 def _apply_soldout_formatting(worksheet, soldout_rows, total_columns):
     """
-    품절 탭 행에 서식 적용
+    품절 탭 행에 서식 적용 (서식만 따로 보낼 때 사용)
     - 전체 행: 연한 빨간색 배경 (#ffcccc)
     - 매칭_탭 셀: 강한 빨간색 배경 (#ff0000) + 흰색 텍스트
+
+    Returns:
+        int: 전송한 요청 본문 크기 (bytes, 실패 시 0)
     """
     try:
-        requests = []
-
-        for row_info in soldout_rows:
-            row_idx = row_info['row_idx'] - 1  # 0-based index
-            tab_col_idx = row_info['tab_col_idx'] - 1  # 0-based index
-
-            # 전체 행 배경색 (연한 빨간색)
-            requests.append({
-                'repeatCell': {
-                    'range': {
-                        'sheetId': worksheet.id,
-                        'startRowIndex': row_idx,
-                        'endRowIndex': row_idx + 1,
-                        'startColumnIndex': 0,
-                        'endColumnIndex': total_columns
-                    },
-                    'cell': {
-                        'userEnteredFormat': {
-                            'backgroundColor': {
-                                'red': 1.0,
-                                'green': 0.8,
-                                'blue': 0.8
-                            }
-                        }
-                    },
-                    'fields': 'userEnteredFormat.backgroundColor'
-                }
-            })
-
-            # 매칭_탭 셀 강조 (강한 빨간색 + 흰색 텍스트)
-            requests.append({
-                'repeatCell': {
-                    'range': {
-                        'sheetId': worksheet.id,
-                        'startRowIndex': row_idx,
-                        'endRowIndex': row_idx + 1,
-                        'startColumnIndex': tab_col_idx,
-                        'endColumnIndex': tab_col_idx + 1
-                    },
-                    'cell': {
-                        'userEnteredFormat': {
-                            'backgroundColor': {
-                                'red': 1.0,
-                                'green': 0.0,
-                                'blue': 0.0
-                            },
-                            'textFormat': {
-                                'foregroundColor': {
-                                    'red': 1.0,
-                                    'green': 1.0,
-                                    'blue': 1.0
-                                },
-                                'bold': True
-                            }
-                        }
-                    },
-                    'fields': 'userEnteredFormat(backgroundColor,textFormat)'
-                }
-            })
+        requests = _soldout_format_requests(worksheet.id, soldout_rows, total_columns)
 
         # 서식 적용
         if requests:
-            worksheet.spreadsheet.batch_update({'requests': requests})
+            body = {'requests': requests}
+            get_scheduler().run('write', 'batch_update', worksheet.spreadsheet.batch_update,
+                                body, priority=PRIORITY_BULK)
+            return _payload_bytes(body)
 
     except Exception as e:
         print(f"서식 적용 오류: {str(e)}")
 
+    return 0
+
 
 def _apply_option_formatting(worksheet, option_rows):
     """
-    옵션 셀에 서식 적용
+    옵션 셀에 서식 적용 (서식만 따로 보낼 때 사용)
     - 값이 없으면 (X): 흰색 배경
     - 값이 있으면: 연한 노랑 배경 (#ffffcc)
+
+    Returns:
+        int: 전송한 요청 본문 크기 (bytes, 실패 시 0)
     """
     try:
-        requests = []
-
-        for row_info in option_rows:
-            row_idx = row_info['row_idx'] - 1  # 0-based index
-            option_col_idx = row_info['option_col_idx'] - 1  # 0-based index
-            has_value = row_info['has_value']
-
-            if has_value:
-                # 값이 있으면: 연한 노랑 배경
-                requests.append({
-                    'repeatCell': {
-                        'range': {
-                            'sheetId': worksheet.id,
-                            'startRowIndex': row_idx,
-                            'endRowIndex': row_idx + 1,
-                            'startColumnIndex': option_col_idx,
-                            'endColumnIndex': option_col_idx + 1
-                        },
-                        'cell': {
-                            'userEnteredFormat': {
-                                'backgroundColor': {
-                                    'red': 1.0,
-                                    'green': 1.0,
-                                    'blue': 0.8
-                                }
-                            }
-                        },
-                        'fields': 'userEnteredFormat.backgroundColor'
-                    }
-                })
-            else:
-                # 값이 없으면 (X): 흰색 배경 (기본값이지만 명시적 설정)
-                requests.append({
-                    'repeatCell': {
-                        'range': {
-                            'sheetId': worksheet.id,
-                            'startRowIndex': row_idx,
-                            'endRowIndex': row_idx + 1,
-                            'startColumnIndex': option_col_idx,
-                            'endColumnIndex': option_col_idx + 1
-                        },
-                        'cell': {
-                            'userEnteredFormat': {
-                                'backgroundColor': {
-                                    'red': 1.0,
-                                    'green': 1.0,
-                                    'blue': 1.0
-                                }
-                            }
-                        },
-                        'fields': 'userEnteredFormat.backgroundColor'
-                    }
-                })
+        requests = _option_format_requests(worksheet.id, option_rows)
 
         # 서식 적용
         if requests:
-            worksheet.spreadsheet.batch_update({'requests': requests})
+            body = {'requests': requests}
+            get_scheduler().run('write', 'batch_update', worksheet.spreadsheet.batch_update,
+                                body, priority=PRIORITY_BULK)
+            return _payload_bytes(body)
 
     except Exception as e:
         print(f"옵션 서식 적용 오류: {str(e)}")
+
+    return 0
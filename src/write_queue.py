@@ -0,0 +1,432 @@
+"""
+수동 매칭 결과 쓰기 지연(write-behind) 큐 모듈
+- "매칭하기" 클릭은 큐에 넣기만 하고 바로 반환 (시트 쓰기를 기다리지 않음)
+- 백그라운드 스레드가 쌓인 결과를 batch_update_matching_results 한 번으로 모아서 반영
+- 대기 중인 결과는 디스크에 기록해 두고, 429/5xx/네트워크 오류면 간격을 늘려가며 다시 시도
+  (프로세스가 재시작돼도 남은 결과를 이어서 반영)
+- 다시 보내도 같은 오류(400 범위 초과, 시트 없음 등)는 묶음을 나눠 문제 행만 보류 목록으로 빼고
+  나머지는 반영 (보류된 행은 화면에서 확인 후 다시 시도하거나 삭제)
+- 결과마다 주문 상품명을 같이 저장해, 그 사이 행이 밀리거나 삭제됐으면 다른 주문에 쓰지 않고 보류
+"""
+import json
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+
+DEFAULT_QUEUE_DIR = os.path.join("temp", "match_queue")
+DEFAULT_FLUSH_INTERVAL = 2.0
+DEFAULT_MAX_BATCH = 200
+DEFAULT_MAX_RETRY_DELAY = 60.0
+
+ORDER_CHANGED_ERROR = "시트의 주문이 바뀌어 반영하지 않음 (행 이동/삭제)"
+
+
+class MatchWriteQueue:
+    """
+    프로세스 공용 매칭 결과 쓰기 큐 (스레드 안전)
+
+    같은 행을 여러 번 넣으면 처음 넣은 결과만 사용한다
+    (시트에서도 이미 매칭된 행은 덮어쓰지 않으므로 같은 규칙).
+    보류된 행을 다시 넣으면 보류 결과 대신 새 결과를 반영한다.
+    """
+
+    def __init__(self, sheets, sheet_name="상품매칭용시트", queue_dir=None,
+                 flush_interval=None, max_batch=DEFAULT_MAX_BATCH,
+                 max_retry_delay=DEFAULT_MAX_RETRY_DELAY, start=True):
+        """
+        Args:
+            sheets: gspread.Client 또는 SheetSession
+            sheet_name: 스프레드시트 이름
+            queue_dir: 대기 결과 저장 디렉토리 (None이면 환경변수 MATCH_QUEUE_DIR 또는 temp/match_queue)
+            flush_interval: 반영 주기(초) (None이면 환경변수 MATCH_QUEUE_FLUSH_INTERVAL 또는 2초)
+            max_batch: 한 번에 반영할 최대 행 수
+            max_retry_delay: 실패 시 재시도 간격 상한(초)
+            start: True면 백그라운드 반영 스레드 바로 시작
+        """
+        if queue_dir is None:
+            queue_dir = os.environ.get('MATCH_QUEUE_DIR', DEFAULT_QUEUE_DIR)
+        if flush_interval is None:
+            flush_interval = float(os.environ.get('MATCH_QUEUE_FLUSH_INTERVAL', DEFAULT_FLUSH_INTERVAL))
+
+        self.sheets = sheets
+        self.sheet_name = sheet_name
+        self.journal_path = Path(queue_dir) / "pending.json"
+        self.failed_path = Path(queue_dir) / "failed.json"
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self.max_retry_delay = max_retry_delay
+
+        self.flushed = 0          # 시트에 반영된 행 수 (이미 매칭돼 있어 건너뛴 행 포함)
+        self.failed_attempts = 0  # 반영 실패 횟수 (재시도할 오류)
+        self.last_error = None
+        self.last_flush_at = None
+
+        self._pending = {}        # 행 번호 → 매칭 결과 (넣은 순서 유지)
+        self._in_flight = {}      # 반영 중인 결과
+        self._failed = {}         # 행 번호 → 보류된 결과 (다시 보내도 실패하는 오류, 'error' 포함)
+        self._retry_delay = 0.0
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._idle = threading.Condition(self._lock)
+        self._stopped = False
+        self._thread = None
+
+        self._load_journal()
+        if start:
+            self.start()
+
+    def start(self):
+        """백그라운드 반영 스레드 시작 (이미 실행 중이면 무시)"""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stopped = False
+            self._thread = threading.Thread(target=self._run, name="match-write-queue", daemon=True)
+            self._thread.start()
+
+    def submit(self, row_index, matched_data, match_type="수동매칭", order_name=None):
+        """
+        매칭 결과 넣기 (바로 반환)
+
+        Args:
+            row_index: 업데이트할 행 번호 (1-based)
+            matched_data: update_matching_result 의 matched_data 와 같은 형식
+            match_type: 매칭 방식
+            order_name: 그 행 주문의 상품명 (있으면 반영 직전에 시트 값과 같은지 확인)
+
+        Returns:
+            bool: 새로 넣었으면 True, 이미 대기/반영 중인 행이면 False
+        """
+        row_index = int(row_index)
+        with self._lock:
+            if row_index in self._pending or row_index in self._in_flight:
+                return False
+            self._failed.pop(row_index, None)
+            self._pending[row_index] = {
+                'row_index': row_index,
+                'data': dict(matched_data),
+                'match_type': match_type,
+                'order_name': None if order_name is None else str(order_name)
+            }
+            self._save_journal_locked()
+
+        self._wakeup.set()
+        return True
+
+    def pending_rows(self):
+        """아직 시트에 반영되지 않은 행 번호 집합 (반영 중 포함)"""
+        with self._lock:
+            return set(self._pending) | set(self._in_flight)
+
+    def failed_rows(self):
+        """
+        보류된 결과 (다시 보내도 실패하는 오류 또는 주문이 바뀐 행)
+
+        Returns:
+            list: [{'row_index', 'data', 'match_type', 'order_name', 'error'}, ...]
+        """
+        with self._lock:
+            return [dict(entry) for entry in self._failed.values()]
+
+    def retry_failed(self, rows=None):
+        """
+        보류된 결과를 다시 대기열로 (시트를 고친 뒤 사용)
+
+        Args:
+            rows: 행 번호 목록 (None이면 전체)
+
+        Returns:
+            int: 다시 넣은 개수
+        """
+        with self._lock:
+            rows = list(self._failed) if rows is None else [row for row in rows if row in self._failed]
+            for row in rows:
+                entry = self._failed.pop(row)
+                entry.pop('error', None)
+                self._pending.setdefault(row, entry)
+            if rows:
+                self._save_journal_locked()
+
+        if rows:
+            self._wakeup.set()
+        return len(rows)
+
+    def discard_failed(self, rows=None):
+        """
+        보류된 결과 삭제
+
+        Args:
+            rows: 행 번호 목록 (None이면 전체)
+
+        Returns:
+            int: 삭제한 개수
+        """
+        with self._lock:
+            rows = list(self._failed) if rows is None else [row for row in rows if row in self._failed]
+            for row in rows:
+                del self._failed[row]
+            if rows:
+                self._save_journal_locked()
+        return len(rows)
+
+    def stats(self):
+        """
+        현재 상태
+
+        Returns:
+            dict: {'pending', 'in_flight', 'failed', 'flushed', 'failed_attempts', 'last_error', 'last_flush_at'}
+        """
+        with self._lock:
+            return {
+                'pending': len(self._pending),
+                'in_flight': len(self._in_flight),
+                'failed': len(self._failed),
+                'flushed': self.flushed,
+                'failed_attempts': self.failed_attempts,
+                'last_error': self.last_error,
+                'last_flush_at': self.last_flush_at,
+            }
+
+    def flush(self, timeout=None):
+        """
+        대기 중인 결과가 모두 반영될 때까지 기다리기
+
+        Args:
+            timeout: 최대 대기 시간(초) (None이면 무한)
+
+        Returns:
+            bool: 모두 반영됐으면 True
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        self._wakeup.set()
+        with self._idle:
+            while self._pending or self._in_flight:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._idle.wait(remaining)
+            return True
+
+    def close(self, timeout=10):
+        """남은 결과 반영을 기다린 뒤 스레드 종료 (반영 못 한 결과는 디스크에 남음)"""
+        self.flush(timeout)
+        with self._lock:
+            self._stopped = True
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def flush_once(self):
+        """
+        대기 결과 한 묶음 반영 (백그라운드 스레드가 호출, 직접 호출도 가능)
+
+        429/5xx/네트워크 오류면 묶음을 다시 대기열 앞쪽으로 되돌리고,
+        다시 보내도 같은 오류면 묶음을 나눠 문제 행만 보류 목록으로 뺀다.
+
+        Returns:
+            bool: 성공 여부 (반영할 결과가 없거나 보류만 생겼으면 True,
+                  재시도할 오류가 났거나 다른 묶음을 반영 중이면 False)
+        """
+        with self._lock:
+            if self._in_flight:
+                return False
+            if not self._pending:
+                return True
+            rows = list(self._pending)[:self.max_batch]
+            self._in_flight = {row: self._pending.pop(row) for row in rows}
+            batch = list(self._in_flight.values())
+
+        outcome = {'written': 0, 'parked': [], 'retry': [], 'error': None}
+        error = self._write_batch(batch, outcome)
+        if error is not None:
+            self._write_split(batch, error, outcome)
+
+        with self._lock:
+            if outcome['retry']:
+                # 재시도할 결과는 앞쪽으로 되돌려 다음 시도에 먼저 반영
+                retry = {entry['row_index']: entry for entry in outcome['retry']}
+                self._pending = {**retry, **self._pending}
+            for entry, reason in outcome['parked']:
+                self._failed[entry['row_index']] = {**entry, 'error': reason}
+
+            self.flushed += outcome['written']
+            if outcome['error']:
+                self.failed_attempts += 1
+                self.last_error = outcome['error']
+                self._retry_delay = min(max(self._retry_delay * 2, self.flush_interval, 1.0), self.max_retry_delay)
+            else:
+                self.last_error = None
+                self.last_flush_at = time.time()
+                self._retry_delay = 0.0
+
+            self._in_flight = {}
+            self._save_journal_locked()
+            self._idle.notify_all()
+
+        if outcome['error']:
+            print(f"매칭 결과 반영 실패 (재시도 예정): {outcome['error']}")
+        for entry, reason in outcome['parked']:
+            print(f"매칭 결과 보류 ({entry['row_index']}행): {reason}")
+        return not outcome['error']
+
+    def _write(self, batch):
+        """
+        batch_update_matching_results 한 번 호출
+
+        Returns:
+            tuple: (오류 메시지 또는 None, 재시도할 오류인지, 주문이 바뀌어 건너뛴 행 번호 리스트)
+        """
+        # 늦게 import (utils 가 이 모듈을 import 하지 않도록)
+        from src.sheets_scheduler import is_retryable_error
+        from src.utils import batch_update_matching_results
+
+        report = {}
+        try:
+            batch_update_matching_results(self.sheets, self.sheet_name, batch, report=report)
+        except Exception as e:
+            return str(e), is_retryable_error(e), []
+        return report.get('error'), report.get('retryable', True), report.get('mismatched', [])
+
+    def _write_batch(self, batch, outcome):
+        """
+        묶음 하나 반영 후 outcome 에 기록
+
+        앞선 묶음에서 재시도할 오류가 났으면 보내지 않고 모두 재시도로 넘긴다.
+
+        Returns:
+            str or None: 다시 보내도 실패하는 오류 메시지 (없으면 None)
+        """
+        if outcome['error']:
+            outcome['retry'].extend(batch)
+            return None
+
+        error, retryable, mismatched = self._write(batch)
+        if error and retryable:
+            outcome['error'] = error
+            outcome['retry'].extend(batch)
+            return None
+        if error:
+            return error
+
+        mismatched = set(mismatched)
+        for entry in batch:
+            if entry['row_index'] in mismatched:
+                outcome['parked'].append((entry, ORDER_CHANGED_ERROR))
+            else:
+                outcome['written'] += 1
+        return None
+
+    def _write_split(self, batch, error, outcome):
+        """다시 보내도 실패하는 묶음을 반으로 나눠 반영 (문제 행만 보류)"""
+        if len(batch) == 1:
+            outcome['parked'].append((batch[0], error))
+            return
+
+        mid = len(batch) // 2
+        halves = [batch[:mid], batch[mid:]]
+        errors = [self._write_batch(half, outcome) for half in halves]
+
+        # 양쪽이 묶음 전체와 같은 오류면 특정 행 문제가 아님 (시트 없음 등) → 더 나누지 않고 모두 보류
+        if errors[0] is not None and errors[0] == errors[1] == error:
+            outcome['parked'].extend((entry, error) for entry in batch)
+            return
+
+        for half, half_error in zip(halves, errors):
+            if half_error is not None:
+                self._write_split(half, half_error, outcome)
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+
+            with self._lock:
+                if self._stopped:
+                    return
+                retry_delay = self._retry_delay
+
+            # 실패 직후에는 재시도 간격만큼 쉬기 (그 사이 들어온 결과도 함께 반영)
+            if retry_delay:
+                time.sleep(retry_delay)
+
+            # 클릭이 몰릴 때 조금 더 모아서 한 번에 반영
+            time.sleep(min(self.flush_interval, 0.5))
+            while True:
+                with self._lock:
+                    if not self._pending:
+                        break
+                if not self.flush_once():
+                    break
+
+    def _load_journal(self):
+        for path, target in ((self.journal_path, self._pending), (self.failed_path, self._failed)):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    items = json.load(f)
+            except (OSError, ValueError):
+                continue
+            for item in items:
+                target.setdefault(int(item['row_index']), item)
+
+        if self._pending:
+            print(f"이전에 반영하지 못한 매칭 결과 {len(self._pending)}건을 다시 반영합니다")
+
+    def _save_journal_locked(self):
+        # 반영 중인 결과도 함께 기록 (반영 도중 종료돼도 유실 방지)
+        self._write_json(self.journal_path, list(self._in_flight.values()) + list(self._pending.values()))
+        self._write_json(self.failed_path, list(self._failed.values()))
+
+    @staticmethod
+    def _write_json(path, items):
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    json.dump(items, f, ensure_ascii=False)
+                os.replace(tmp_path, path)
+            except Exception:
+                try:
+                    os.unlink(tmp_path)
+                except OSError:
+                    pass
+                raise
+        except Exception as e:
+            print(f"매칭 대기열 저장 오류: {str(e)}")
+
+
+_shared_queues = {}
+_shared_lock = threading.Lock()
+
+
+def shared_write_queue(sheets, sheet_name="상품매칭용시트", queue_dir=None):
+    """
+    저장 디렉토리별 프로세스 공용 쓰기 큐
+
+    Streamlit 캐시를 비워도 큐(와 백그라운드 스레드)는 하나만 유지하고
+    새 시트 세션만 바꿔 끼운다 (같은 대기 파일을 두 큐가 동시에 쓰지 않도록).
+
+    Args:
+        sheets: gspread.Client 또는 SheetSession
+        sheet_name: 스프레드시트 이름
+        queue_dir: 대기 결과 저장 디렉토리 (None이면 기본값)
+
+    Returns:
+        MatchWriteQueue
+    """
+    if queue_dir is None:
+        queue_dir = os.environ.get('MATCH_QUEUE_DIR', DEFAULT_QUEUE_DIR)
+    key = os.path.abspath(queue_dir)
+
+    with _shared_lock:
+        queue = _shared_queues.get(key)
+        if queue is None:
+            queue = MatchWriteQueue(sheets, sheet_name, queue_dir=queue_dir)
+            _shared_queues[key] = queue
+        else:
+            queue.sheets = sheets
+            queue.sheet_name = sheet_name
+        return queue